@@ -0,0 +1,181 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, NamedTuple
+from config import ALERT_RULES, ALERT_INTERVAL, ALERT_HYSTERESIS, ALERT_RATE_LIMIT
+from sampler import sampler
+from probes import probe_services
+from userstore import store, ROLE_ADMIN
+from outbox import outbox
+from pages import escape, code
+
+RED_THRESHOLD = 85       # where status_icon() turns 🔴
+
+LABELS = {"cpu": "CPU", "ram": "RAM", "disk": "Disk"}
+
+COMM_LEN = 15            # Linux truncates process names (comm) to this many characters
+
+
+# ──────────────────────────────────────────────
+#  RULES
+# ──────────────────────────────────────────────
+
+class Rule(NamedTuple):
+    name:   str
+    metric: str          # cpu / ram / disk / service:<unit> / process:<name>
+    above:  float        # fire when the value goes above this …
+    clear:  float        # … and resolve only once it drops below this
+    for_:   float        # seconds the condition must hold before firing
+    repeat: float        # re-notify every N s while firing (0 = once)
+
+
+def parse_rule(d: dict) -> Rule:
+    """Build a Rule from a config.ALERT_RULES entry."""
+    unknown = set(d) - {"name", "metric", "above", "clear", "for", "repeat"}
+    if unknown or "metric" not in d:
+        raise ValueError(f"Bad alert rule {d!r}")
+    metric = d["metric"]
+    if metric.startswith(("service:", "process:")):
+        above, clear = 0.5, 0.5          # boolean facts: 1 = down / missing
+    elif metric in LABELS:
+        above = float(d.get("above", RED_THRESHOLD))
+        clear = float(d.get("clear", above - ALERT_HYSTERESIS))
+    else:
+        raise ValueError(f"Unknown alert metric {metric!r}")
+    return Rule(d.get("name", metric), metric, above, clear,
+                float(d.get("for", 0)), float(d.get("repeat", 0)))
+
+
+def facts_from(snap, services: list = ()) -> dict:
+    """Metric values for one tick: percentages plus 0/1 service / process facts."""
+    facts = {"cpu": snap.cpu, "ram": snap.ram.percent, "disk": snap.disk.percent}
+    for unit, state in services:
+        facts[f"service:{unit}"] = 0.0 if state == "active" else 1.0
+    return facts
+
+
+# ──────────────────────────────────────────────
+#  ENGINE
+# ──────────────────────────────────────────────
+
+class AlertEngine:
+    """Evaluates rules against a dict of facts; sends on fire / resolve only.
+
+    `send(chat_id, text)` is an async callable and `recipients()` returns the
+    chat ids to notify; both, and `clock`, are injectable for tests.  Rule
+    state is keyed by name, so names must be unique.  Sends run as tasks,
+    so a chat that is paced or answered 429 never holds up evaluation.
+    """
+
+    def __init__(self, rules, send: Callable, recipients: Callable,
+                 clock: Callable = time.monotonic, rate: tuple = ALERT_RATE_LIMIT):
+        self.rules      = [r if isinstance(r, Rule) else parse_rule(r) for r in rules]
+        names           = [r.name for r in self.rules]
+        dupes           = sorted({n for n in names if names.count(n) > 1})
+        if dupes:                            # state is keyed by name
+            raise ValueError(f"Duplicate alert rule name(s) {', '.join(map(repr, dupes))}")
+        self.send       = send
+        self.recipients = recipients
+        self.clock      = clock
+        self.rate       = rate               # (max messages, per seconds) per chat
+        self._pending   = {}                 # {rule name: time the condition started}
+        self._firing    = {}                 # {rule name: time last notified}
+        self._sent      = {}                 # {chat_id: deque of send times}
+        self._sending   = set()              # send tasks not finished yet
+        self.dropped    = 0
+
+    def evaluate(self, facts: dict, processes=None) -> list:
+        """Return [(rule, 'fire' | 'resolve', value), …] for this tick."""
+        now, events = self.clock(), []
+        for r in self.rules:
+            if r.metric.startswith("process:"):
+                if processes is None:
+                    continue
+                name  = r.metric[8:]
+                value = 0.0 if name in processes or name[:COMM_LEN] in processes else 1.0
+            else:
+                value = facts.get(r.metric)
+                if value is None:
+                    continue
+
+            if r.name in self._firing:
+                if value < r.clear:
+                    del self._firing[r.name]
+                    events.append((r, "resolve", value))
+                elif r.repeat and now - self._firing[r.name] >= r.repeat:
+                    self._firing[r.name] = now
+                    events.append((r, "fire", value))
+            elif value > r.above:
+                started = self._pending.setdefault(r.name, now)
+                if now - started >= r.for_:
+                    del self._pending[r.name]
+                    self._firing[r.name] = now
+                    events.append((r, "fire", value))
+            else:
+                self._pending.pop(r.name, None)
+        return events
+
+    def _allow(self, chat_id: int) -> bool:
+        limit, window = self.rate
+        now  = self.clock()
+        sent = self._sent.setdefault(chat_id, deque())
+        while sent and now - sent[0] >= window:
+            sent.popleft()
+        if len(sent) >= limit:
+            return False
+        sent.append(now)
+        return True
+
+    async def tick(self, facts: dict, processes=None) -> list:
+        events = self.evaluate(facts, processes)
+        for rule, kind, value in events:
+            text = format_event(rule, kind, value)
+            for chat_id in self.recipients():
+                if not self._allow(chat_id):
+                    self.dropped += 1
+                    continue
+                task = asyncio.ensure_future(self.send(chat_id, text))
+                task.add_done_callback(lambda t, chat_id=chat_id: self._done(chat_id, t))
+                self._sending.add(task)
+        return events
+
+    def _done(self, chat_id: int, task: asyncio.Future):
+        self._sending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Alert to {chat_id} failed: {task.exception()}")
+
+
+def format_event(rule: Rule, kind: str, value: float) -> str:
+    icon = "🔴 *ALERT*" if kind == "fire" else "🟢 *RESOLVED*"
+    family, _, target = rule.metric.partition(":")
+    if family == "service":
+        what = f"service `{code(target)}` is {'down' if value else 'back up'}"
+    elif family == "process":
+        what = f"process `{code(target)}` is {'missing' if value else 'running again'}"
+    else:
+        what = f"{LABELS[rule.metric]} `{value:.1f}%`"
+        if kind == "fire":
+            what += f" > {rule.above:g}%" + (f" for {rule.for_:g}s" if rule.for_ else "")
+    return f"{icon}  {escape(rule.name)}\n{what}"
+
+
+# ──────────────────────────────────────────────
+#  BACKGROUND LOOP
+# ──────────────────────────────────────────────
+
+async def run_alerts(interval: float = ALERT_INTERVAL):
+    """Evaluate config.ALERT_RULES against the sampler snapshot forever; notify admins."""
+    async def send(chat_id, text):
+        await outbox.send_message(chat_id, text, parse_mode="Markdown")
+
+    engine = AlertEngine(ALERT_RULES, send, lambda: store.with_role(ROLE_ADMIN))
+    units  = [r.metric[8:] for r in engine.rules if r.metric.startswith("service:")]
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            snap     = sampler.snapshot()
+            services = await probe_services(units) if units else []
+            await engine.tick(facts_from(snap, services), snap.pnames)
+        except Exception as e:
+            logging.error(f"Alert tick failed: {e}")
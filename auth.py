@@ -1,3 +1,12 @@
+import os
+import threading
+from typing import NamedTuple
+from userstore import store, ROLE_USER, ROLE_ADMIN
+from config import TRANSFER_READ_ROOTS, TRANSFER_WRITE_ROOTS
+
+# Seed ids: granted once, when the user store (users.db) is first created.
+# Later changes go through the terminal panel and are persisted in the store;
+# editing these sets does not touch an existing store.
 AUTHORIZED_USERS = set([
     123456789,
 ])
@@ -6,8 +15,70 @@ ADMIN_USERS = set([
     123456789,
 ])
 
+def seed_roles() -> dict:
+    roles = {uid: ROLE_USER for uid in AUTHORIZED_USERS}
+    roles.update({uid: ROLE_ADMIN for uid in ADMIN_USERS})
+    return roles
+
+
+# ──────────────────────────────────────────────
+#  ACL SNAPSHOT
+# ──────────────────────────────────────────────
+
+class ACL(NamedTuple):
+    """Immutable view of who may do what; replaced whole, never mutated."""
+    version: int
+    users:   frozenset    # ROLE_USER and up
+    admins:  frozenset    # ROLE_ADMIN
+
+_acl  = ACL(0, frozenset(), frozenset())
+_swap = threading.Lock()  # serialises writers only; readers never lock
+
+def refresh():
+    """Rebuild the snapshot from the store and swap it in (one rebinding).
+
+    The store calls this after every change — a bulk set_roles() of
+    thousands of ids is still a single swap — and after reloading edits
+    made by another process.
+    """
+    global _acl
+    with _swap:
+        roles = store.roles()
+        _acl  = ACL(
+            _acl.version + 1,
+            frozenset(uid for uid, r in roles.items() if r >= ROLE_USER),
+            frozenset(uid for uid, r in roles.items() if r >= ROLE_ADMIN),
+        )
+
+def acl() -> ACL:
+    return _acl
+
 def is_authorized(user_id: int) -> bool:
-    return user_id in AUTHORIZED_USERS
+    return user_id in _acl.users
 
 def is_admin(user_id: int) -> bool:
-    return user_id in ADMIN_USERS
\ No newline at end of file
+    return user_id in _acl.admins
+
+
+# ──────────────────────────────────────────────
+#  FILE ACCESS
+# ──────────────────────────────────────────────
+
+def allowed_path(user_id: int, path: str, write: bool = False) -> str:
+    """The resolved `path` if `user_id` may read it (or write it), else PermissionError.
+
+    Admins only, and only under TRANSFER_READ_ROOTS / TRANSFER_WRITE_ROOTS.
+    Symlinks and `..` are resolved before the check, so a link inside a
+    root cannot reach outside it.
+    """
+    if not is_admin(user_id):
+        raise PermissionError("admin only")
+    real = os.path.realpath(os.path.expanduser(path))
+    for root in (TRANSFER_WRITE_ROOTS if write else TRANSFER_READ_ROOTS):
+        root = os.path.realpath(os.path.expanduser(root))
+        if real == root or real.startswith(root.rstrip("/") + "/"):
+            return real
+    raise PermissionError(f"{path} is outside the allowed {'upload' if write else 'download'} paths")
+
+
+store.subscribe(refresh)
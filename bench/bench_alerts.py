@@ -0,0 +1,156 @@
+"""Alert engine transitions driven by a fake clock.
+
+    python bench/bench_alerts.py [rules]
+
+Feeds AlertEngine a scripted series of facts, one tick at a time, with
+`clock` and `send` replaced, and checks when it fires and resolves: the
+`for` hold time (and its reset when the value dips), hysteresis between
+`clear` and `above`, `repeat`, the per-chat rate limit, service and
+process facts (including names Linux cuts to 15 characters), Markdown
+escaping of rule names and targets, that a send stuck in the outbox
+does not hold up the next tick, and that duplicate rule names are
+rejected.  Then times evaluate() over `rules` CPU rules (default 1000).
+Exits non-zero on any failed check.
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from alerts import AlertEngine, parse_rule, format_event
+
+FAILED = []
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def engine(rules, rate=(100, 60), chats=(1,)):
+    clock, sent = Clock(), []
+
+    async def send(chat_id, text):
+        sent.append((clock.now, chat_id, text.split("\n")[0]))
+
+    return AlertEngine(rules, send, lambda: chats, clock=clock, rate=rate), clock, sent
+
+
+def check(label: str, got, want):
+    ok = got == want
+    if not ok:
+        FAILED.append(label)
+    print(f"{label:<44} {'ok' if ok else f'FAILED: got {got!r}, want {want!r}'}")
+
+
+async def script(e, clock, steps, processes=None) -> list:
+    """Run `steps` of (seconds, facts); return [(second, rule, kind), …] offsets from the start."""
+    t0, out = clock.now, []
+    for at, facts in steps:
+        clock.now = t0 + at
+        for rule, kind, _ in await e.tick(facts, processes):
+            out.append((at, rule.name, kind))
+        await asyncio.sleep(0)              # let the queued sends run
+    return out
+
+
+async def run() -> int:
+    # for: fires only once the value held above for 60 s; a dip restarts the wait
+    e, clock, _ = engine([{"name": "cpu", "metric": "cpu", "above": 90, "for": 60}])
+    got = await script(e, clock, [(0, {"cpu": 95}), (30, {"cpu": 95}), (45, {"cpu": 50}),
+                                  (50, {"cpu": 95}), (100, {"cpu": 95}), (110, {"cpu": 95})])
+    check("for: dip restarts the hold, fires once", got, [(110, "cpu", "fire")])
+
+    # hysteresis: between clear (85) and above (90) neither fires nor resolves
+    e, clock, _ = engine([{"name": "ram", "metric": "ram", "above": 90, "clear": 85}])
+    got = await script(e, clock, [(0, {"ram": 91}), (10, {"ram": 87}), (20, {"ram": 91}),
+                                  (30, {"ram": 86}), (40, {"ram": 84}), (50, {"ram": 88})])
+    check("hysteresis: resolves only below clear", got, [(0, "ram", "fire"), (40, "ram", "resolve")])
+
+    e, clock, _ = engine([{"name": "ram", "metric": "ram", "above": 90}])
+    check("hysteresis: clear defaults to above - 5", e.rules[0].clear, 85.0)
+
+    # repeat: re-notifies every 300 s while firing, never after resolving
+    e, clock, _ = engine([{"name": "disk", "metric": "disk", "above": 95, "repeat": 300}])
+    got = await script(e, clock, [(t, {"disk": 97}) for t in range(0, 700, 100)] + [(700, {"disk": 50}),
+                                                                                    (1100, {"disk": 50})])
+    check("repeat: every 300 s while firing", got,
+          [(0, "disk", "fire"), (300, "disk", "fire"), (600, "disk", "fire"), (700, "disk", "resolve")])
+
+    # rate limit: at most 2 messages per chat per 60 s, the rest are dropped
+    e, clock, sent = engine([{"name": f"svc{i}", "metric": f"service:u{i}"} for i in range(3)],
+                            rate=(2, 60), chats=(1, 2))
+    down = {f"service:u{i}": 1.0 for i in range(3)}
+    up   = {f"service:u{i}": 0.0 for i in range(3)}
+    await script(e, clock, [(0, down), (70, up)])
+    check("rate limit: 2 of 3 per chat in the window", [(t - 1000, c) for t, c, _ in sent],
+          [(0, 1), (0, 2), (0, 1), (0, 2), (70, 1), (70, 2), (70, 1), (70, 2)])
+    check("rate limit: dropped counted", e.dropped, 4)
+
+    # service / process facts: 1 = down / missing
+    e, clock, _ = engine([{"name": "ssh", "metric": "service:ssh"}, {"name": "nginx", "metric": "process:nginx"}])
+    got  = await script(e, clock, [(0, {"service:ssh": 1.0})], processes={"sshd"})
+    got += await script(e, clock, [(10, {"service:ssh": 0.0})], processes={"sshd", "nginx"})
+    got += await script(e, clock, [(20, {"service:ssh": 0.0})], processes=None)
+    check("service / process: fire and resolve", got,
+          [(0, "ssh", "fire"), (0, "nginx", "fire"), (10, "ssh", "resolve"), (10, "nginx", "resolve")])
+
+    # process names longer than 15 characters show up truncated (comm)
+    e, clock, _ = engine([{"name": "resolved", "metric": "process:systemd-resolved"}])
+    got  = await script(e, clock, [(0, {})], processes={"systemd-resolve"})
+    got += await script(e, clock, [(10, {})], processes={"systemd-resolved"})
+    got += await script(e, clock, [(20, {})], processes={"systemd"})
+    check("process: matches the 15-character comm", got, [(20, "resolved", "fire")])
+
+    # names and targets are escaped, so Telegram can parse the message
+    text = format_event(parse_rule({"name": "disk_full *now*", "metric": "process:my`app"}), "fire", 1.0)
+    check("escaping: name and target", text, "🔴 *ALERT*  disk\\_full \\*now\\*\nprocess `myˋapp` is missing")
+
+    # a send that never finishes (chat paced, 429) does not hold up evaluation
+    stuck = asyncio.Event()
+
+    async def hang(chat_id, text):
+        await stuck.wait()
+
+    e = AlertEngine([{"name": "cpu", "metric": "cpu", "above": 90}], hang, lambda: (1,), clock=Clock())
+    try:
+        got = [kind for _, kind, _ in await asyncio.wait_for(e.tick({"cpu": 95}), 1)]
+        got += [kind for _, kind, _ in await asyncio.wait_for(e.tick({"cpu": 10}), 1)]
+    except asyncio.TimeoutError:
+        got = "tick blocked on the send"
+    check("stuck send: ticks go on", got, ["fire", "resolve"])
+    stuck.set()
+
+    # duplicate names share state, so they are refused
+    try:
+        engine([{"name": "Disk", "metric": "disk", "above": 90}, {"name": "Disk", "metric": "disk", "above": 95}])
+        got = None
+    except ValueError as err:
+        got = str(err)
+    check("duplicate names rejected", got, "Duplicate alert rule name(s) 'Disk'")
+    try:
+        engine([{"metric": "cpu"}, {"metric": "cpu", "above": 95}])
+        got = None
+    except ValueError as err:
+        got = str(err)
+    check("duplicate default names rejected", got, "Duplicate alert rule name(s) 'cpu'")
+    check("distinct names accepted", len(engine([{"metric": "cpu"}, {"metric": "ram"}])[0].rules), 2)
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    e, clock, _ = engine([parse_rule({"name": f"r{i}", "metric": "cpu", "above": i % 100}) for i in range(n)])
+    t0 = time.perf_counter()
+    for i in range(100):
+        clock.now += 1
+        e.evaluate({"cpu": float(i % 100)})
+    took = (time.perf_counter() - t0) / 100
+    print(f"\nevaluate(): {n:,} rules in {took * 1e3:.2f} ms per tick ({took / n * 1e6:.2f} µs/rule)")
+    return len(FAILED)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(run()) else 0)
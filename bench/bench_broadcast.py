@@ -0,0 +1,111 @@
+"""A broadcast to many users against a local fake Bot API, cut short and resumed.
+
+    python bench/bench_broadcast.py [recipients] [msgs_per_second]
+
+Registers `recipients` users in a throw-away store (one in 500 has blocked
+the bot, every 997th request is answered 429) and broadcasts to all of
+them through an Outbox paced at `msgs_per_second` (Telegram's real limit
+is 30; the default 1000 keeps the run short).  Part way through the
+broadcast task is cancelled as if the bot had been stopped; a new
+Broadcaster resumes from the state file.  Reports delivery counts, users
+missed or messaged twice, the status message edits and the process RSS
+over the run.
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import collections
+import psutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from telegram import Bot
+from outbox import Outbox
+from userstore import UserStore
+from fakebotapi import FakeBotAPI, TOKEN
+import broadcast
+
+ADMIN = 1
+FIRST = 1000          # recipient ids: FIRST … FIRST + n - 1
+
+
+async def sample_rss(peak: list):
+    proc = psutil.Process()
+    while True:
+        peak[0] = max(peak[0], proc.memory_info().rss)
+        await asyncio.sleep(0.1)
+
+
+async def run(n: int, rate: int):
+    tmp   = tempfile.mkdtemp(prefix="bench_broadcast_")
+    store = broadcast.store = UserStore(os.path.join(tmp, "users.db"))
+    store.load(seeds={ADMIN: broadcast.ROLE_ADMIN})
+    for uid in range(FIRST, FIRST + n):
+        store.register(uid, f"user{uid}")
+    store.register(ADMIN, "admin")
+
+    server = FakeBotAPI(flood_every=997, retry_after=1)
+    server.calls   = collections.deque(maxlen=0)            # 50k recorded calls would be the bench's memory
+    server.blocked = set(range(FIRST, FIRST + n, 500))
+    got, edits = bytearray(n), [0]
+
+    def on_call(method, params):
+        chat = int(params.get("chat_id", 0))
+        if method == "sendMessage" and chat >= FIRST and chat not in server.blocked:
+            got[chat - FIRST] = min(255, got[chat - FIRST] + 1)
+        elif method == "editMessageText":
+            edits[0] += 1
+    server.on_call = on_call
+    await server.start()
+
+    async with Bot(TOKEN, base_url=server.base_url) as bot:
+        box   = Outbox(bot, rate=(rate, rate))
+        loop  = asyncio.create_task(box.run())
+        path  = os.path.join(tmp, "broadcast.json")
+        rss0  = psutil.Process().memory_info().rss
+        peak  = [rss0]
+        probe = asyncio.create_task(sample_rss(peak))
+
+        t0 = time.perf_counter()
+        b  = broadcast.Broadcaster(path, progress=1, box=box)
+        b.start("Maintenance at 22:00 UTC, about 15 minutes of downtime.", "all", by=ADMIN, chat_id=ADMIN)
+        total = b.state["total"]
+        while b.state["cursor"] < FIRST + n * 2 // 5:
+            await asyncio.sleep(0.05)
+        b._task.cancel()                                    # the bot is stopped mid-broadcast
+        await asyncio.gather(b._task, return_exceptions=True)
+        cut = b.state["cursor"]
+        await asyncio.sleep(0.5)                            # sends already queued still go out
+
+        b = broadcast.Broadcaster(path, progress=1, box=box)
+        resumed = b.resume()
+        await b._task
+        took = time.perf_counter() - t0
+        while box.depth or box.stats()["in_flight"]:       # the last status edit
+            await asyncio.sleep(0.05)
+        probe.cancel()
+        loop.cancel()
+    await server.stop()
+    store.close()
+
+    st      = b.state
+    missed  = sum(1 for i, c in enumerate(got) if c == 0 and FIRST + i not in server.blocked)
+    twice   = sum(1 for c in got if c > 1)
+    print(f"{n:,} recipients ({total:,} with the admin), {len(server.blocked):,} blocked the bot, "
+          f"outbox at {rate}/s")
+    print(f"  stopped after id {cut:,}, resumed: {resumed}, final status: {st['status']}")
+    print(f"  sent {st['sent']:,} · blocked {st['blocked']:,} · failed {st['failed']:,}"
+          f"  (counters since the start, across the restart)")
+    print(f"  missed {missed}, messaged twice {twice}  (about the in-flight window per restart)")
+    print(f"  {edits[0]} status edits, {server.floods} 429s answered")
+    print(f"  wall {took:.1f} s  ({st['sent'] / took:,.0f} msg/s)")
+    print(f"  RSS {rss0 / 1e6:.1f} MB before, {peak[0] / 1e6:.1f} MB peak  (+{(peak[0] - rss0) / 1e6:.1f} MB)")
+    print(f"  state file left behind: {os.path.exists(path)}")
+
+
+if __name__ == "__main__":
+    n    = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rate = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    asyncio.run(run(n, rate))
@@ -0,0 +1,116 @@
+"""Cost of a cgroup tick against a fake cgroup v2 tree.
+
+    python bench/bench_cgroups.py [containers ...]
+    python bench/bench_cgroups.py --real          # this host's /sys/fs/cgroup
+
+Builds a tree like a Docker host (system.slice/docker-<id>.scope per
+container, plus services and a user session; every directory padded with
+the ~70 control files a real one has), then times CgroupSampler.sample()
+with the incremental walk (tree walked once) and with a walk on every
+tick.  Between two ticks each container's counters are bumped by a known
+amount, and the top-10 by CPU and IO are checked against it.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cgroups import CgroupSampler, top
+
+PADDING = [f"ctl.{i}" for i in range(64)]      # stand-ins for cgroup.procs, memory.events, …
+
+
+def write(path: str, text: str):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def group(path: str, usage: int = 0, io: int = 0, mem: int = 0, leaf: bool = True):
+    os.makedirs(path, exist_ok=True)
+    for name in PADDING:
+        write(os.path.join(path, name), "0\n")
+    if leaf:
+        counters(path, usage, io)
+        write(os.path.join(path, "memory.current"), f"{mem}\n")
+        write(os.path.join(path, "memory.max"), "max\n" if mem % 2 else f"{2 * mem}\n")
+        write(os.path.join(path, "pids.current"), f"{mem % 97}\n")
+
+
+def counters(path: str, usage: int, io: int):
+    write(os.path.join(path, "cpu.stat"), f"usage_usec {usage}\nuser_usec {usage // 2}\n"
+                                          f"system_usec {usage // 2}\nnr_periods 0\nnr_throttled 0\n"
+                                          f"throttled_usec 0\n")
+    write(os.path.join(path, "io.stat"), f"8:0 rbytes={io} wbytes={io} rios=1 wios=1 dbytes=0 dios=0\n"
+                                         f"259:0 rbytes={io} wbytes=0 rios=1 wios=0 dbytes=0 dios=0\n")
+
+
+def build(root: str, n: int) -> list:
+    os.makedirs(root, exist_ok=True)
+    write(os.path.join(root, "cgroup.controllers"), "cpuset cpu io memory pids\n")
+    for parent in ("system.slice", "user.slice", "user.slice/user-1000.slice"):
+        group(os.path.join(root, parent), leaf=False)
+    for unit in ("ssh.service", "cron.service", "containerd.service", "docker.service"):
+        group(os.path.join(root, "system.slice", unit), mem=50_000_000)
+    group(os.path.join(root, "user.slice/user-1000.slice/session-1.scope"), mem=10_000_000)
+    group(os.path.join(root, "init.scope"), mem=5_000_000)
+    paths = []
+    for i in range(n):
+        path = os.path.join(root, "system.slice", f"docker-{i:064x}.scope")
+        group(path, mem=(i + 1) * 1_000_000)
+        paths.append(path)
+    return paths
+
+
+def tick(sampler: CgroupSampler, rounds: int = 20) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        rows = sampler.sample()
+    return (time.perf_counter() - t0) / rounds, rows
+
+
+def run(n: int):
+    root  = tempfile.mkdtemp(prefix="bench_cgroups_")
+    paths = build(root, n)
+
+    for label, rescan in (("incremental", float("inf")), ("walk each tick", 0)):
+        s = CgroupSampler(root, rescan=rescan)
+        s.sample()
+        secs, rows = tick(s)
+        print(f"{n:5} containers  {label:<15} {secs * 1e3:7.2f} ms/tick  "
+              f"({secs / len(rows) * 1e6:5.1f} µs per group, {len(rows)} groups)")
+
+    s = CgroupSampler(root, rescan=float("inf"))
+    s.sample()
+    for i, path in enumerate(paths):              # container i: i ms of CPU, i KiB × 3 of IO
+        counters(path, i * 1000, i * 1024)
+    rows  = s.sample()
+    want  = {f"docker:{i:064x}"[:19] for i in range(n - 10, n)}
+    cpu   = {r.name for r in top(rows, 10, "cpu")}
+    io    = {r.name for r in top(rows, 10, "io")}
+    print(f"{'':5}             top-10 by CPU {'ok' if cpu == want else 'WRONG'},"
+          f" by IO {'ok' if io == want else 'WRONG'}\n")
+    shutil.rmtree(root)
+
+
+def real():
+    s = CgroupSampler()
+    if not s.available:
+        sys.exit(f"no cgroup v2 hierarchy at {s.root}")
+    s.sample()
+    time.sleep(1)
+    secs, rows = tick(s, 1)
+    print(f"{len(rows)} groups, {secs * 1e3:.2f} ms per tick\n")
+    for r in top(rows, 10, "cpu"):
+        print(f"{r.name[:40]:<40} cpu {r.cpu:6.1f}%  mem {(r.mem or 0) / 1e6:8.1f} MB"
+              f"  io {(r.io or 0) / 1e6:6.2f} MB/s  pids {r.pids}")
+
+
+if __name__ == "__main__":
+    if "--real" in sys.argv:
+        real()
+    else:
+        for n in [int(a) for a in sys.argv[1:]] or [100, 500, 1000]:
+            run(n)
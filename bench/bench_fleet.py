@@ -0,0 +1,81 @@
+"""Fleet server with many agents on loopback, all on one event loop.
+
+    python bench/bench_fleet.py [agents] [seconds] [interval]
+
+Agents send synthetic snapshots (a slow random walk, like a real host)
+every `interval` seconds.  Reports frames/s, wire bytes per frame against
+a full keyframe, event-loop lag and the /fleet view rendered from the
+collected state.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fleet import FleetServer, Agent, HEADER, PACKERS
+from views import Request
+import commands
+
+TOKEN = "bench"
+
+
+def synthetic(seed: int):
+    rnd  = random.Random(seed)
+    gb   = 1 << 30
+    vals = [rnd.uniform(1, 60), 8, 16 * gb, rnd.randint(2, 12) * gb, 0.0,
+            500 * gb, rnd.randint(100, 495) * gb, 0.0, 1700000000, 0, 0, rnd.randint(80, 400), 50]
+
+    def collect():
+        vals[0]  = min(100.0, max(0.0, vals[0] + rnd.uniform(-3, 3)))
+        if rnd.random() < 0.2:
+            vals[3] += rnd.randint(-1, 1) << 20
+        vals[4]  = round(100 * vals[3] / vals[2], 1)
+        vals[7]  = round(100 * vals[6] / vals[5], 1)
+        vals[9]  += rnd.randint(0, 1 << 16)
+        vals[10] += rnd.randint(0, 1 << 16)
+        return tuple(vals)
+    return collect
+
+
+async def lag_probe(samples: list, period: float = 0.01):
+    while True:
+        t0 = time.perf_counter()
+        await asyncio.sleep(period)
+        samples.append(time.perf_counter() - t0 - period)
+
+
+async def run(n: int, seconds: float, interval: float):
+    server = FleetServer(token=TOKEN, stale=max(3, 3 * interval))
+    await server.start("127.0.0.1", 0)
+    agents = [Agent(("127.0.0.1", server.port), TOKEN, f"host{i:03d}", synthetic(i), interval)
+              for i in range(n)]
+    lags   = []
+    tasks  = [asyncio.create_task(a.run()) for a in agents] + [asyncio.create_task(lag_probe(lags))]
+
+    await asyncio.sleep(seconds)
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    frames, wire = server.frames, server.bytes
+
+    key = HEADER.size + sum(p.size for p in PACKERS)
+    lags.sort()
+    print(f"{n} agents, {seconds:g} s, one frame per {interval:g} s each")
+    print(f"  hosts seen   {len(server.hosts)}  (up {len(server.live())})")
+    print(f"  frames       {frames:,}  ({frames / seconds:,.0f}/s)")
+    print(f"  bytes/frame  {wire / max(1, frames):.1f}  (keyframe {key})")
+    print(f"  loop lag     p50 {lags[len(lags) // 2] * 1e3:.2f} ms  p99 {lags[int(len(lags) * .99)] * 1e3:.2f} ms")
+
+    commands.fleet = server
+    text, _ = commands.fleet_view(None, Request(0, ("cpu",), {}, False))
+    print("\n" + text)
+    await asyncio.sleep(0.2)             # let the server see the agents hang up
+    await server.stop()
+
+
+if __name__ == "__main__":
+    args = [float(a) for a in sys.argv[1:]] + [300, 10, 1][len(sys.argv) - 1:]
+    asyncio.run(run(int(args[0]), args[1], args[2]))
@@ -0,0 +1,359 @@
+"""Latency, loop blocking and throughput of every bot handler.
+
+    python bench/bench_handlers.py [--real] [--cold] [--iters N] [--users N]
+                                   [--json out.json] [--compare old.json]
+
+Drives each command, button and callback branch through fake Update /
+Context objects; replies go through the real outbox into a recording Bot
+stub.  By default psutil, /proc/net, cgroupfs and `systemctl` are
+replaced by deterministic fakes (a synthetic procfs with 500 processes,
+a cgroup tree with 200 containers, 4 disks in /proc/diskstats) and the log and user store are
+throw-away files, so runs are comparable between commits.  `--real` samples this host and runs the real `systemctl`.
+`--cold` drops the shared pages and collector results before every call.
+
+Per scenario: p50 / p99 handler latency, the longest event-loop stall seen
+by a 1 ms probe task, and requests/s with `--users` concurrent users.
+`--json` writes the results; `--compare` prints the change against an
+earlier file.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from types import SimpleNamespace
+from collections import namedtuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import psutil
+import config
+import userstore
+
+ADMIN_ID = 1
+USER_ID  = 2
+NEW_ID   = 3
+STRANGER = 4
+
+
+# ──────────────────────────────────────────────
+#  DETERMINISTIC HOST
+# ──────────────────────────────────────────────
+
+def mock_host(root: str):
+    """Replace the psutil calls the sampler makes, /proc/net, cgroupfs and systemctl."""
+    from bench_procs import make_procfs
+    from bench_cgroups import build
+    from bench_diskio import diskstats
+    from cgroups import CgroupSampler
+    from diskio import DiskSampler, Devices
+    import sampler, probes
+    from netstat import ConnSummary
+
+    os.makedirs(root)
+    make_procfs(root, 500)
+    psutil.PROCFS_PATH = root
+    cgroot = os.path.join(os.path.dirname(root), "cgroup")
+    build(cgroot, 200)
+    sampler.sampler.cgroups = CgroupSampler(cgroot)
+    with open(os.path.join(root, "diskstats"), "w") as f:
+        f.write(diskstats(4, 40, 1))
+    sampler.sampler.disks = DiskSampler(os.path.join(root, "diskstats"), Devices(os.path.join(root, "no-sysfs")))
+
+    gb   = 1 << 30
+    vmem = namedtuple("svmem", "total available percent used free")
+    disk = namedtuple("sdiskusage", "total used free percent")
+    part = namedtuple("sdiskpart", "device mountpoint fstype opts")
+    nio  = namedtuple("snetio", "bytes_sent bytes_recv packets_sent packets_recv errin errout dropin dropout")
+    tick = [0]
+
+    def net_io_counters(pernic=False):
+        tick[0] += 1
+        n = tick[0]
+        if pernic:
+            return {f"eth{i}": nio(n * 10_000 * (i + 1), n * 40_000 * (i + 1), n * 10, n * 30, 0, 0, 0, 0)
+                    for i in range(4)}
+        return nio(n * 100_000, n * 400_000, n * 100, n * 300, 0, 0, 0, 0)
+
+    psutil.cpu_percent     = lambda interval=None, percpu=False: 37.5
+    psutil.cpu_count       = lambda logical=True: 8
+    psutil.virtual_memory  = lambda: vmem(16 * gb, 10 * gb, 37.5, 6 * gb, 10 * gb)
+    psutil.disk_usage      = lambda path: disk(500 * gb, 300 * gb, 200 * gb, 60.0)
+    psutil.disk_partitions = lambda all=False: [part("/dev/sda1", "/", "ext4", "rw"),
+                                                part("/dev/sdb1", "/tmp", "ext4", "rw")]
+    psutil.boot_time       = lambda: time.time() - 86400 * 3
+    psutil.net_io_counters = net_io_counters
+    sampler.conn_summary   = lambda: ConnSummary({"ESTABLISHED": 120, "LISTEN": 12, "TIME_WAIT": 40},
+                                                 8, time.time())
+
+    async def is_active(units, timeout):
+        await asyncio.sleep(0.002)          # a fork + exec, roughly
+        return {u: "active" if i % 3 else "inactive" for i, u in enumerate(units)}
+    probes._is_active = is_active
+
+
+def fake_log(path: str, lines: int = 50_000):
+    rnd = random.Random(0)
+    t0  = time.time() - lines
+    with open(path, "w") as f:
+        for i in range(lines):
+            ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t0 + i))
+            lvl, msg = ("ERROR", f"probe failed: code {rnd.randint(1, 9)}") if i % 97 == 0 \
+                else ("INFO", f"{rnd.randint(1, 9) * 1000} used /status")
+            f.write(f"{ts},000 - {lvl} - {msg}\n")
+
+
+# ──────────────────────────────────────────────
+#  FAKE TELEGRAM
+# ──────────────────────────────────────────────
+
+class RecordingBot:
+    """Answers every Bot API call instantly and counts them."""
+
+    def __init__(self):
+        self.calls = 0
+        self._ids  = 100
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls += 1
+        self._ids  += 1
+        return SimpleNamespace(message_id=self._ids, chat_id=chat_id, text=text)
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        self.calls += 1
+        return True
+
+
+class FakeQuery:
+    def __init__(self, data: str, user_id: int):
+        self.data      = data
+        self.from_user = SimpleNamespace(id=user_id)
+        self.message   = SimpleNamespace(chat_id=user_id, message_id=42)
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+    async def edit_message_text(self, text, **kwargs):      # only used by legacy paths
+        pass
+
+
+def fake_update(user_id: int, text: str = None, data: str = None):
+    return SimpleNamespace(
+        effective_user = SimpleNamespace(id=user_id),
+        effective_chat = SimpleNamespace(id=user_id),
+        message        = SimpleNamespace(text=text, chat_id=user_id),
+        callback_query = FakeQuery(data, user_id) if data else None,
+    )
+
+
+def fake_context(args=()):
+    return SimpleNamespace(args=list(args), user_data={}, bot=None)
+
+
+# ──────────────────────────────────────────────
+#  SCENARIOS
+# ──────────────────────────────────────────────
+
+def scenarios(log_cursor: int) -> dict:
+    """{name: async fn()} — one handler invocation each."""
+    import commands
+    from views import command_handler, button_handler
+    from live import live_button
+    from pages import token
+
+    def cmd(name, *args, user=ADMIN_ID):
+        h = command_handler(name)
+        return lambda: h(fake_update(user, f"/{name}"), fake_context(args))
+
+    def btn(data, user=ADMIN_ID, handler=button_handler):
+        return lambda: handler(fake_update(user, data=data), fake_context())
+
+    return {
+        "start":             lambda: commands.start(fake_update(ADMIN_ID, "/start"), fake_context()),
+        "start:unregistered": lambda: commands.start(fake_update(STRANGER, "/start"), fake_context()),
+        "register":          lambda: commands.save_contact(fake_update(NEW_ID, "Bench User"), fake_context()),
+        "ping":              cmd("ping"),
+        "status":            cmd("status"),
+        "status:denied":     cmd("status", user=STRANGER),
+        "system":            cmd("system"),
+        "system mem":        cmd("system", "mem"),
+        "system io":         cmd("system", "io"),
+        "system fds":        cmd("system", "fds"),
+        "system bad":        cmd("system", "nope"),
+        "containers":        cmd("containers"),
+        "containers mem":    cmd("containers", "mem"),
+        "diskio":            cmd("diskio"),
+        "network":           cmd("network"),
+        "storage":           cmd("storage"),
+        "services":          cmd("services"),
+        "history":           cmd("history", "cpu", "1h"),
+        "log":               cmd("log"),
+        "log grep":          cmd("log", "grep", "ERROR"),
+        "log since":         cmd("log", "since", "15m"),
+        "log bad":           cmd("log", "nope"),
+        "list":              cmd("list"),
+        "list:denied":       cmd("list", user=USER_ID),
+        "reboot":            cmd("reboot"),
+        "btn:menu":          btn("menu"),
+        "btn:status":        btn("status"),
+        "btn:system:io":     btn("system:io"),
+        "btn:containers:io": btn("containers:io"),
+        "btn:network":       btn("network"),
+        "btn:services":      btn("services"),
+        "btn:log:older":     btn(f"log:t:{token(log_cursor)}"),
+        "btn:list:next":     btn(f"list:n:{token(ADMIN_ID)}"),
+        "btn:unknown":       btn("nope"),
+        "btn:live":          btn("live:status", handler=live_button),
+        "btn:live:stop":     btn("live:stop", handler=live_button),
+    }
+
+
+# ──────────────────────────────────────────────
+#  MEASUREMENT
+# ──────────────────────────────────────────────
+
+async def stall_probe(stalls: list, period: float = 0.001):
+    while True:
+        t0 = time.perf_counter()
+        await asyncio.sleep(period)
+        stalls.append(time.perf_counter() - t0 - period)
+
+
+def pct(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def measure(fn, iters: int, users: int, cold: bool) -> dict:
+    from singleflight import flights
+
+    stalls = []
+    probe  = asyncio.create_task(stall_probe(stalls))
+    await asyncio.sleep(0.005)
+
+    lat = []
+    for _ in range(iters):
+        if cold:
+            flights.forget()
+        t0 = time.perf_counter()
+        await fn()
+        lat.append(time.perf_counter() - t0)
+    blocked = max(stalls, default=0.0)
+
+    async def user():
+        for _ in range(max(1, iters // users)):
+            if cold:
+                flights.forget()
+            await fn()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    took = time.perf_counter() - t0
+    probe.cancel()
+
+    return {
+        "p50_ms":     round(pct(lat, .50) * 1e3, 4),
+        "p99_ms":     round(pct(lat, .99) * 1e3, 4),
+        "blocked_ms": round(blocked * 1e3, 3),
+        "rps":        round(users * max(1, iters // users) / took, 1),
+    }
+
+
+async def run(args) -> dict:
+    from outbox import outbox
+    from sampler import sampler
+    from history import history
+    from live import live
+
+    bot = RecordingBot()
+    outbox.chat_rate   = (1e9, 1e9)      # measure handlers, not Telegram's limits
+    outbox._global     = type(outbox._global)(1e9, 1e9, time.monotonic())
+    outbox.concurrency = 1_000
+    outbox.max_depth   = 10_000_000
+    sender = asyncio.create_task(outbox.run(bot))
+
+    snap = sampler.snapshot()
+    for i in range(720):
+        history.record(snap._replace(taken=snap.taken - (720 - i) * config.SAMPLE_INTERVAL))
+    live.sessions.clear()
+
+    import commands
+    size    = os.path.getsize(commands.LOG_FILE)
+    results = {}
+    for name, fn in scenarios(size // 2).items():
+        results[name] = await measure(fn, args.iters, args.users, args.cold)
+        live.sessions.clear()
+        print(f"  {name:<20} p50 {results[name]['p50_ms']:8.3f} ms   p99 {results[name]['p99_ms']:8.3f} ms"
+              f"   stall {results[name]['blocked_ms']:7.2f} ms   {results[name]['rps']:>10,.0f} req/s")
+
+    while outbox.depth:
+        await asyncio.sleep(0.01)
+    sender.cancel()
+    print(f"  bot calls {bot.calls:,}, outbox {outbox.stats()}")
+    return results
+
+
+def compare(old: dict, new: dict):
+    print(f"\nvs {old['meta'].get('commit', '?')}:")
+    for name, r in new["results"].items():
+        o = old["results"].get(name)
+        if not o:
+            continue
+        d = lambda k: (r[k] - o[k]) / o[k] * 100 if o[k] else 0.0
+        print(f"  {name:<20} p50 {d('p50_ms'):+7.1f}%   p99 {d('p99_ms'):+7.1f}%   req/s {d('rps'):+7.1f}%")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--real",    action="store_true", help="sample this host instead of fakes")
+    ap.add_argument("--cold",    action="store_true", help="bypass the view render cache")
+    ap.add_argument("--iters",   type=int, default=200)
+    ap.add_argument("--users",   type=int, default=50)
+    ap.add_argument("--json")
+    ap.add_argument("--compare")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="benchhandlers")
+    userstore.store.path = os.path.join(tmp, "users.db")
+    log = os.path.join(tmp, "bot.log")
+    fake_log(log)
+    if not args.real:
+        mock_host(os.path.join(tmp, "proc"))
+    os.system = lambda cmd: 0                # never reboot the bench host
+
+    import commands
+    commands.LOG_FILE = log
+    userstore.store.load(seeds={ADMIN_ID: userstore.ROLE_ADMIN, USER_ID: userstore.ROLE_USER})
+    for uid in range(1000, 1200):
+        userstore.store.register(uid, f"user{uid}")
+    userstore.store.register(ADMIN_ID, "admin")
+    userstore.store.register(USER_ID, "user")
+
+    print(f"{'real host' if args.real else 'mocked host'}, {args.iters} iters, "
+          f"{args.users} users{', cold cache' if args.cold else ''}")
+    results = asyncio.run(run(args))
+    userstore.store.close()
+
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    out = {
+        "meta": {"commit": commit, "mode": "real" if args.real else "mock", "cold": args.cold,
+                 "iters": args.iters, "users": args.users, "python": platform.python_version(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(out, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Insert / range-query cost of the metrics history at increasing uptimes.
+
+    python bench/bench_history.py
+
+Costs should stay flat from 1 h to 90 days of simulated uptime, and the
+memory footprint is fixed at construction time.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import SAMPLE_INTERVAL
+from history import History
+
+UPTIMES = [("1h", 3600), ("1d", 86400), ("7d", 7 * 86400), ("30d", 30 * 86400), ("90d", 90 * 86400)]
+OPS     = 20000
+
+
+def main():
+    h = History()
+    t = 0.0
+    values = (12.5, 40.0, 71.0, 1.2e6, 3.4e6)
+    print(f"store size: {h.nbytes / 1024:.1f} KiB (fixed)\n")
+    print(f"{'uptime':>7} {'insert µs':>10} {'q 1h µs':>9} {'q 24h µs':>9} {'q 30d µs':>9}")
+
+    for label, uptime in UPTIMES:
+        # fast-forward to this uptime without timing
+        while t < uptime - OPS * SAMPLE_INTERVAL:
+            h.add(t, values)
+            t += SAMPLE_INTERVAL
+
+        start = time.perf_counter()
+        for _ in range(OPS):
+            h.add(t, values)
+            t += SAMPLE_INTERVAL
+        ins = (time.perf_counter() - start) / OPS * 1e6
+
+        q = []
+        for span in (3600, 86400, 30 * 86400):
+            start = time.perf_counter()
+            for _ in range(200):
+                h.query("cpu", span, now=t)
+            q.append((time.perf_counter() - start) / 200 * 1e6)
+
+        print(f"{label:>7} {ins:>10.2f} {q[0]:>9.1f} {q[1]:>9.1f} {q[2]:>9.1f}")
+    print(f"\nstore size after run: {h.nbytes / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
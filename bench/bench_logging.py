@@ -0,0 +1,101 @@
+"""Caller-side cost of a log call: FileHandler vs the queued pipeline.
+
+    python bench/bench_logging.py [records] [max_bytes]
+
+Logs `records` lines through a plain logging.FileHandler and through
+logpipe (Enqueue → batching writer), timing every call as a handler
+on the event loop would see it.  Also times audit.record(), then checks
+that every line reached disk, across size-triggered rotations (archives
+are decompressed and counted).
+"""
+import os
+import sys
+import glob
+import gzip
+import time
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from logpipe import LogWriter, Enqueue, Audit, RotatingFile, LOG_FORMAT
+
+
+def timed_calls(log, n: int) -> list:
+    out = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        log.info(f"{i} used /status")
+        out.append(time.perf_counter() - t0)
+    out.sort()
+    return out
+
+
+def report(name: str, calls: list, total: float):
+    pct = lambda q: calls[min(len(calls) - 1, int(len(calls) * q))] * 1e6
+    print(f"{name:<14} p50 {pct(.5):6.2f} µs  p99 {pct(.99):7.2f} µs  max {calls[-1] * 1e3:6.2f} ms"
+          f"  ({len(calls) / total:,.0f}/s)")
+
+
+def lines_on_disk(path: str) -> int:
+    n = sum(1 for _ in open(path, "rb")) if os.path.exists(path) else 0
+    for arc in glob.glob(path + ".*.gz"):
+        with gzip.open(arc, "rb") as f:
+            n += sum(1 for _ in f)
+    return n
+
+
+def main():
+    n         = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_bytes = int(sys.argv[2]) if len(sys.argv) > 2 else 2 * 1024 * 1024
+    tmp       = tempfile.mkdtemp(prefix="bench_logging_")
+
+    log = logging.getLogger("bench")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+    # ── synchronous FileHandler (the old main.py setup) ──
+    fh = logging.FileHandler(os.path.join(tmp, "plain.log"))
+    fh.setFormatter(logging.Formatter(LOG_FORMAT))
+    log.addHandler(fh)
+    t0 = time.perf_counter()
+    report("FileHandler", timed_calls(log, n), time.perf_counter() - t0)
+    log.removeHandler(fh)
+    fh.close()
+
+    # ── queued pipeline ──
+    path   = os.path.join(tmp, "bot.log")
+    writer = LogWriter(path)
+    writer.out = RotatingFile(path, max_bytes=max_bytes, every=0, backups=1000)
+    writer.start()
+    qh = Enqueue(writer.queue)
+    log.addHandler(qh)
+    t0 = time.perf_counter()
+    report("queued", timed_calls(log, n), time.perf_counter() - t0)
+    writer.stop(timeout=60)
+    print(f"{'':<14} {writer.written:,} records in {writer.batches:,} writes")
+
+    # ── audit trail ──
+    audit = Audit(os.path.join(tmp, "audit.jsonl"))
+    audit.start()
+    calls = []
+    t0    = time.perf_counter()
+    for i in range(n):
+        t = time.perf_counter()
+        audit.record(i % 50, "/status", (), 0.0031, "ok")
+        calls.append(time.perf_counter() - t)
+    total = time.perf_counter() - t0
+    calls.sort()
+    report("audit.record", calls, total)
+    audit.stop()
+
+    time.sleep(0.5)                      # let the last gzip threads finish
+    on_disk = lines_on_disk(path)
+    print(f"\nbot.log lines on disk: {on_disk:,} of {n:,}"
+          f"  ({len(glob.glob(path + '.*.gz'))} gzip archives at {max_bytes // 1024} KiB)")
+    print(f"audit lines on disk:   {lines_on_disk(audit.path):,} of {n:,}")
+    print(f"files in {tmp}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Per-call overhead of the instrumentation layer.
+
+    python bench/bench_metrics.py [calls]
+
+Times a no-op PTB-style handler bare and wrapped by metrics.instrument,
+plus Histogram.observe, a `with metrics.timer()` block and the Prometheus
+export.
+"""
+import os
+import sys
+import time
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from metrics import Histogram, metrics, instrument
+
+
+async def handler(update, context):
+    return None
+
+
+async def per_call(fn, update, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        await fn(update, None)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    n      = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    update = SimpleNamespace(effective_user=SimpleNamespace(id=1),
+                             callback_query=SimpleNamespace(data="system:io"))
+
+    bare   = asyncio.run(per_call(handler, update, n))
+    fixed  = asyncio.run(per_call(instrument(handler, "/status"), update, n))
+    button = asyncio.run(per_call(instrument(handler), update, n))
+    print(f"bare handler:        {bare * 1e6:6.2f} µs")
+    print(f"instrument(label):   {fixed * 1e6:6.2f} µs  (+{(fixed - bare) * 1e6:.2f})")
+    print(f"instrument(button):  {button * 1e6:6.2f} µs  (+{(button - bare) * 1e6:.2f})")
+
+    h, start = Histogram(), time.perf_counter()
+    for i in range(n):
+        h.observe(i * 1e-7)
+    print(f"Histogram.observe:   {(time.perf_counter() - start) / n * 1e6:6.2f} µs")
+
+    start = time.perf_counter()
+    for _ in range(n):
+        with metrics.timer("psutil", "bench"):
+            pass
+    print(f"with metrics.timer:  {(time.perf_counter() - start) / n * 1e6:6.2f} µs")
+
+    start = time.perf_counter()
+    text  = metrics.prometheus()
+    print(f"prometheus export:   {(time.perf_counter() - start) * 1e3:6.2f} ms  ({len(text):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
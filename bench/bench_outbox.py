@@ -0,0 +1,51 @@
+"""Outbound queue against a local fake Bot API with flood control.
+
+    python bench/bench_outbox.py [chats] [messages_per_chat] [edits]
+
+`chats` chats each get a burst of messages while one message is edited
+`edits` times; every 25th request is answered 429.  Reports wall time,
+outbox counters and what the server actually received.
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from telegram import Bot
+from outbox import Outbox
+from fakebotapi import FakeBotAPI, TOKEN
+
+
+async def run(chats: int, per_chat: int, edits: int):
+    server = FakeBotAPI(flood_every=25, retry_after=1)
+    await server.start()
+    async with Bot(TOKEN, base_url=server.base_url) as bot:
+        box  = Outbox(bot)
+        loop = asyncio.create_task(box.run())
+
+        t0   = time.perf_counter()
+        futs = [box.send_message(c, f"msg {i}") for i in range(per_chat) for c in range(1, chats + 1)]
+        for i in range(edits):
+            futs.append(box.edit_message_text(f"edit {i}", 1, 1))
+            await asyncio.sleep(0.001)
+        results = await asyncio.gather(*futs, return_exceptions=True)
+        took    = time.perf_counter() - t0
+        loop.cancel()
+
+    await server.stop()
+    errors = sum(isinstance(r, Exception) for r in results)
+    print(f"{chats} chats x {per_chat} msgs + {edits} edits of one message")
+    print(f"  wall        {took:.2f} s")
+    print(f"  outbox      {box.stats()}")
+    print(f"  server      sendMessage={server.count('sendMessage')} "
+          f"editMessageText={server.count('editMessageText')} 429s={server.floods}")
+    print(f"  errors      {errors}")
+    last = [p["text"] for m, p in server.calls if m == "editMessageText"][-1:]
+    print(f"  last edit   {last}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]] + [50, 5, 200][len(sys.argv) - 1:]
+    asyncio.run(run(*args[:3]))
@@ -0,0 +1,69 @@
+"""Pages stay under Telegram's 4096-unit limit with non-BMP text.
+
+    python bench/bench_pages.py
+
+Emoji outside the BMP are 2 UTF-16 units each, which is what Telegram
+counts.  Renders /log pages (tail, grep, since and forward paging) over
+a log of emoji-only lines longer than LINE_MAX, /list pages of users
+with 300-emoji names, and a single item too large for a page, and checks
+pages.size() of every page.  Exits non-zero on any page over the limit.
+"""
+import os
+import sys
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import userstore
+from pages import MAX_TEXT, size, clip, fill
+
+WIDE = "😀"              # U+1F600: 1 code point, 2 UTF-16 units
+
+
+def text_of(page) -> str:
+    return page[0] if isinstance(page, tuple) else page
+
+
+async def run() -> int:
+    tmp = tempfile.mkdtemp(prefix="bench_pages_")
+    log = os.path.join(tmp, "bot.log")
+    with open(log, "w") as f:
+        for i in range(300):
+            f.write(f"2026-10-18 10:{i // 60:02}:{i % 60:02} - INFO - " + WIDE * (200 + 7 * i) + "\n")
+    userstore.store.path = os.path.join(tmp, "users.db")
+    userstore.store.load()
+    for uid in range(1000, 1100):
+        userstore.store.register(uid, WIDE * 300)
+
+    import commands
+    commands.LOG_FILE = log
+    pages = {
+        "log tail":  await commands.log_page("t", None),
+        "log grep":  await commands.log_page("g", "INFO"),
+        "log since": await commands.log_page("s", 0.0),
+    }
+    for kind, arg in (("t", None), ("s", 0.0)):  # follow ⬅️ Older / ➡️ Newer a few pages
+        page = pages["log tail" if kind == "t" else "log since"]
+        for n in range(2, 7):
+            datas = [b.callback_data for row in page[1].inline_keyboard for b in row]
+            nxt   = [d for d in datas if d.startswith(f"log:{kind}:")]
+            if not nxt:
+                break
+            page = pages[f"log {kind} page {n}"] = await commands.log_page(kind, arg, int(nxt[0][6:], 36))
+    pages["list"] = commands.users_page()
+    pages["one huge item"] = fill([(1, WIDE * 5000)]).text
+    pages["clip"] = clip(WIDE * 5000, MAX_TEXT)
+    userstore.store.close()
+
+    bad = 0
+    for label, page in pages.items():
+        n  = size(text_of(page))
+        ok = n <= MAX_TEXT
+        bad += not ok
+        print(f"{label:<16} {len(text_of(page)):6} chars {n:6} units  {'ok' if ok else 'OVER LIMIT'}")
+    return bad
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(run()) else 0)
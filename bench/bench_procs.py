@@ -0,0 +1,79 @@
+"""Process sampler cost on a synthetic /proc with many processes.
+
+    python bench/bench_procs.py [n_procs ...]
+
+Builds a fake procfs (stat, statm, io, fd/ per pid) in a temp dir, points
+psutil.PROCFS_PATH at it and times ProcessSampler ticks and heap top-N:
+steady ticks while nobody looks at IO / fds (those are read on a slower
+cadence) and while `/system io` is open (read every tick).
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import psutil
+from procs import ProcessSampler, SORT_KEYS, top
+
+TICKS = 5
+
+
+def make_procfs(root: str, n: int):
+    with open(os.path.join(root, "stat"), "w") as f:
+        f.write("cpu  100 0 100 1000 0 0 0 0 0 0\nbtime 1700000000\n")
+    with open(os.path.join(root, "uptime"), "w") as f:
+        f.write("1000.00 900.00\n")
+    for pid in range(1, n + 1):
+        d = os.path.join(root, str(pid))
+        os.makedirs(os.path.join(d, "fd"))
+        fields = ["S", "1", str(pid), str(pid), "0", "-1", "4194304",
+                  "0", "0", "0", "0", str(pid % 500), str(pid % 300), "0", "0",
+                  "20", "0", "1", "0", str(1000 + pid), "1000000", str(pid % 4000)]
+        fields += ["0"] * 30
+        with open(os.path.join(d, "stat"), "w") as f:
+            f.write(f"{pid} (worker-{pid}) {' '.join(fields)}\n")
+        with open(os.path.join(d, "statm"), "w") as f:
+            f.write(f"2000 {pid % 4000} 100 10 0 500 0\n")
+        with open(os.path.join(d, "io"), "w") as f:
+            f.write(f"rchar: 0\nwchar: 0\nsyscr: 0\nsyscw: 0\n"
+                    f"read_bytes: {pid * 4096}\nwrite_bytes: {pid * 512}\ncancelled_write_bytes: 0\n")
+        for fd in range(pid % 8):
+            open(os.path.join(d, "fd", str(fd)), "w").close()
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 10_000]
+    for n in sizes:
+        root = tempfile.mkdtemp(prefix="fakeproc")
+        try:
+            make_procfs(root, n)
+            psutil.PROCFS_PATH = root
+            s = ProcessSampler()
+            times = []
+            for _ in range(TICKS):
+                start = time.perf_counter()
+                rows = s.sample(8 * 1024 ** 3)
+                times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            for k in SORT_KEYS:
+                top(rows, 5, k)
+            topn = (time.perf_counter() - start) / len(SORT_KEYS)
+            s.want()
+            wanted = []
+            for _ in range(TICKS):
+                start = time.perf_counter()
+                s.sample(8 * 1024 ** 3)
+                wanted.append(time.perf_counter() - start)
+            print(f"{n:>7,} procs  first tick {times[0] * 1e3:7.1f} ms  "
+                  f"steady tick {min(times[1:]) * 1e3:7.1f} ms ({min(times[1:]) / n * 1e6:.1f} µs/proc), "
+                  f"with IO / fds {min(wanted) * 1e3:7.1f} ms ({min(wanted) / n * 1e6:.1f} µs/proc)  "
+                  f"top-5 {topn * 1e3:.2f} ms  rows={len(rows)}")
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
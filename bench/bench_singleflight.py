@@ -0,0 +1,101 @@
+"""Collection cost of a burst of identical requests, with and without single-flight.
+
+    python bench/bench_singleflight.py [requesters ...]
+
+The incident case: everyone in the channel opens /status, /services and
+/storage at the same moment, every cache is cold.  For each burst size
+(default 1 → 500) the three views are rendered that many times
+concurrently, after dropping the probe cache and every shared result.
+`systemctl` is a stub script that takes 50 ms, so spawning it is real
+work.  Reported per burst: collector runs, `systemctl` processes, CPU
+time of the bot and its children, and wall time — once through
+singleflight.flights and once with a pass-through in its place (what
+the old render cache did for a burst: every miss collected on its own).
+"""
+import os
+import sys
+import time
+import asyncio
+import inspect
+import tempfile
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import views
+import probes
+import dirscan
+from views import VIEWS, Request, render
+from sampler import sampler
+from singleflight import flights
+
+importlib.import_module("commands")               # registers the views
+
+NAMES = ("status", "services", "storage")
+STUB  = "#!/bin/sh\nshift 2\nsleep 0.05\nfor u; do echo active; done\n"
+
+
+class NoFlight:
+    """flights.do without the sharing."""
+
+    async def do(self, key, fn, fresh=0.0):
+        result = fn()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+
+def count(counter: dict, key: str, fn):
+    def counted(*args, **kwargs):
+        counter[key] = counter.get(key, 0) + 1
+        return fn(*args, **kwargs)
+    return counted
+
+
+def cpu() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+async def burst(n: int) -> float:
+    probes._cache.clear()
+    flights.forget()
+    req = Request(1, (), {}, False)
+    t0  = time.perf_counter()
+    await asyncio.gather(*(render(name, req) for _ in range(n) for name in NAMES))
+    return time.perf_counter() - t0
+
+
+async def run(sizes: list):
+    stub = os.path.join(tempfile.mkdtemp(prefix="bench_singleflight_"), "systemctl")
+    with open(stub, "w") as f:
+        f.write(STUB)
+    os.chmod(stub, 0o755)
+    probes.SYSTEMCTL = stub
+
+    counter = {}
+    for name in NAMES:
+        v = VIEWS[name]
+        VIEWS[name] = v._replace(collect=count(counter, "collect", v.collect))
+    probes._is_active = count(counter, "systemctl", probes._is_active)
+    dirscan.mounts    = count(counter, "mounts", dirscan.mounts)
+    sampler.snapshot()
+    await burst(1)                                # warm imports and the thread pool
+
+    print(f"{'requesters':>10}  {'':14} {'collects':>8} {'systemctl':>9} {'mounts':>6}"
+          f" {'CPU ms':>8} {'wall ms':>8}")
+    for n in sizes:
+        for label, impl in (("single-flight", flights), ("no sharing", NoFlight())):
+            views.flights = probes.flights = impl
+            counter.clear()
+            c0   = cpu()
+            wall = await burst(n)
+            used = cpu() - c0
+            print(f"{n:>10}  {label:<14} {counter.get('collect', 0):>8} {counter.get('systemctl', 0):>9}"
+                  f" {counter.get('mounts', 0):>6} {used * 1e3:>8.1f} {wall * 1e3:>8.1f}")
+        views.flights = probes.flights = flights
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(run([int(a) for a in sys.argv[1:]] or [1, 5, 10, 50, 100, 500]))
@@ -0,0 +1,144 @@
+"""File transfer against the fake Bot API: throughput, peak RSS, loop lag.
+
+    python bench/bench_transfer.py [gigabytes]
+
+Writes three files of `gigabytes` each (default 2): log-like text (sent
+gzipped), random bytes named .zst (split as is), and random bytes pulled
+back through getFile (the upload path).  For each it reports wall time,
+MB/s of source data, how far RSS rose above the idle process, the worst
+event-loop stall, and whether every part the server received matches
+the SHA-256 in its caption.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import hashlib
+import tempfile
+import threading
+import psutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import config
+config.OUTBOX_RATE = config.OUTBOX_CHAT_RATE = (1e6, 1e6)    # measure the transfer, not flood limits
+
+from telegram import Bot
+from outbox import outbox
+import transfer
+from fakebotapi import FakeBotAPI, TOKEN
+
+MB = 1024 * 1024
+
+
+def make_log(path: str, size: int):
+    rnd    = random.Random(1)
+    blocks = []
+    for _ in range(16):
+        lines = []
+        while sum(map(len, lines)) < MB:
+            lines.append(f"2026-10-{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:"
+                         f"{rnd.randint(0, 59):02d},{rnd.randint(0, 999):03d} - INFO - {rnd.randint(1, 10**9)} "
+                         f"used /{rnd.choice(['status', 'system', 'log', 'storage', 'network'])} "
+                         f"in {rnd.random() * 50:.2f} ms\n")
+        blocks.append("".join(lines).encode())
+    with open(path, "wb") as f:
+        for i in range(size // MB):
+            f.write(blocks[i % 16])
+
+
+def make_random(path: str, size: int):
+    blocks = [os.urandom(MB) for _ in range(16)]
+    with open(path, "wb") as f:
+        for i in range(size // MB):
+            f.write(blocks[i % 16])
+
+
+def sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(MB):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Watch:
+    """Peak RSS (sampled every 10 ms on a thread) and worst event-loop lag."""
+
+    def __init__(self):
+        self.proc = psutil.Process()
+        self.base = self.peak = self.proc.memory_info().rss
+        self.lag  = 0.0
+        self.done = threading.Event()
+
+    def _sample(self):
+        while not self.done.wait(0.01):
+            self.peak = max(self.peak, self.proc.memory_info().rss)
+
+    async def _loop(self):
+        while not self.done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.01)
+            self.lag = max(self.lag, time.perf_counter() - t0 - 0.01)
+
+    def __enter__(self):
+        threading.Thread(target=self._sample, daemon=True).start()
+        self.task = asyncio.create_task(self._loop())
+        return self
+
+    def __exit__(self, *exc):
+        self.done.set()
+
+
+def report(name: str, size: int, secs: float, w: Watch, check: str):
+    print(f"{name:<16} {size / MB:8,.0f} MB {secs:7.1f} s {size / MB / secs:8.1f} MB/s"
+          f"   RSS +{(w.peak - w.base) / MB:6.1f} MB   max loop lag {w.lag * 1e3:6.1f} ms   {check}")
+
+
+def check_parts(server: FakeBotAPI) -> str:
+    sent = [p for m, p in server.calls if m == "sendDocument"]
+    bad  = [p for p in sent if p["caption"].rsplit(" ", 1)[-1] != p["document"]["sha256"]]
+    server.calls.clear()
+    return f"{len(sent)} parts, {'all checksums match' if not bad else f'{len(bad)} MISMATCHED'}"
+
+
+async def run(gigabytes: float):
+    size = int(gigabytes * 1024) * MB
+    tmp  = tempfile.mkdtemp(prefix="bench_transfer_")
+    log, rnd, up = (os.path.join(tmp, n) for n in ("bot.log", "random.zst", "upload.bin"))
+    print(f"writing {3 * size / MB:,.0f} MB of test files to {tmp} …")
+    make_log(log, size)
+    make_random(rnd, size)
+    make_random(up, size)
+    expect = sha256(up)
+
+    server = FakeBotAPI()
+    await server.start()
+    server.files["upload"] = up
+    async with Bot(TOKEN, base_url=server.base_url, base_file_url=server.file_url) as bot:
+        box = asyncio.create_task(outbox.run(bot))
+        print(f"\npart size {config.TRANSFER_PART_SIZE / MB:.0f} MB, gzip level {config.TRANSFER_GZIP_LEVEL}\n")
+
+        for name, path in (("/get log (gzip)", log), ("/get .zst", rnd)):
+            with Watch() as w:
+                t0  = time.perf_counter()
+                msg = await transfer.send_file(1, path)
+                secs = time.perf_counter() - t0
+            report(name, size, secs, w, check_parts(server))
+            print(f"{'':<16} {msg.splitlines()[0]}")
+
+        dest = os.path.join(tmp, "received.bin")
+        with Watch() as w:
+            t0        = time.perf_counter()
+            digest, n = await transfer.receive(bot, "upload", dest)
+            secs      = time.perf_counter() - t0
+        report("upload → disk", n, secs, w, "checksum " + ("matches" if digest == expect else "MISMATCH"))
+        box.cancel()
+    await server.stop()
+    for path in (log, rnd, up, dest):
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(float(sys.argv[1]) if len(sys.argv) > 1 else 2))
@@ -0,0 +1,131 @@
+"""Polling vs webhook: response latency, burst time and idle CPU.
+
+    python bench/bench_updates.py [requests] [burst] [idle_seconds]
+
+Starts the real bot (main.main) in a child process against the fake Bot
+API, once per UPDATE_MODE.  For each mode it measures `requests`
+sequential /ping round trips (update handed to the bot → its
+sendMessage arriving back), a burst of `burst` /ping updates sent at
+once, and the child's CPU time and API requests while idle.
+"""
+import os
+import sys
+import time
+import signal
+import socket
+import asyncio
+import tempfile
+import subprocess
+import psutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fakebotapi import FakeBotAPI, TOKEN
+
+USER = 123456789                    # seeded in auth.py
+
+
+def child(mode: str, api_port: int, hook_port: int, tmp: str):
+    """Runs in the child process: configure, then start the bot."""
+    import config
+    config.BOT_TOKEN        = TOKEN
+    config.BOT_API_URL      = f"http://127.0.0.1:{api_port}/bot"
+    config.UPDATE_MODE      = mode
+    config.WEBHOOK_LISTEN   = ("127.0.0.1", hook_port)
+    config.WEBHOOK_URL      = f"http://127.0.0.1:{hook_port}/{config.WEBHOOK_PATH}"
+    config.OUTBOX_RATE      = config.OUTBOX_CHAT_RATE = (1e6, 1e6)
+    config.ALERT_RULES      = []
+    config.USERS_DB         = os.path.join(tmp, "users.db")
+    config.LOG_FILE         = os.path.join(tmp, "bot.log")
+    config.AUDIT_FILE       = os.path.join(tmp, "audit.jsonl")
+    import main
+    main.main()
+
+
+def ping(update_id: int, chat_id: int) -> dict:
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "text": "/ping",
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": USER, "is_bot": False, "first_name": "Bench"},
+        "entities": [{"type": "bot_command", "offset": 0, "length": 5}],
+    }}
+
+
+async def run_mode(mode: str, requests: int, burst: int, idle: float) -> dict:
+    server = FakeBotAPI()
+    await server.start()
+    tmp     = tempfile.mkdtemp(prefix=f"bench_updates_{mode}_")
+    sock    = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    hook    = sock.getsockname()[1]
+    sock.close()
+
+    waiting = {}                    # {chat_id: Future}
+    def on_call(method, params):
+        fut = waiting.pop(int(params.get("chat_id", 0) or 0), None)
+        if method == "sendMessage" and fut is not None and not fut.done():
+            fut.set_result(time.perf_counter())
+    server.on_call = on_call
+
+    proc = subprocess.Popen([sys.executable, __file__, "--child", mode, str(server.port), str(hook), tmp],
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=open(os.path.join(tmp, "stderr.log"), "wb"))
+    ready = (lambda: server.webhook is not None) if mode == "webhook" else (lambda: server.polls > 0)
+    for _ in range(300):
+        if ready():
+            break
+        await asyncio.sleep(0.05)
+    else:
+        proc.kill()
+        raise SystemExit(f"{mode}: bot did not start (see {tmp}/stderr.log)")
+
+    loop, uid = asyncio.get_running_loop(), 0
+
+    async def round_trip(chat_id: int) -> float:
+        nonlocal uid
+        uid += 1
+        fut = waiting[chat_id] = loop.create_future()
+        t0  = time.perf_counter()
+        await server.deliver(ping(uid, chat_id))
+        return await asyncio.wait_for(fut, 10) - t0
+
+    for i in range(20):                                       # warm-up
+        await round_trip(1000 + i)
+    lat = sorted([await round_trip(2000 + i) for i in range(requests)])
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(round_trip(100_000 + i) for i in range(burst)))
+    burst_s = time.perf_counter() - t0
+
+    await asyncio.sleep(1)
+    p, api0 = psutil.Process(proc.pid), server._requests
+    cpu0    = sum(p.cpu_times()[:2])
+    await asyncio.sleep(idle)
+    cpu     = sum(p.cpu_times()[:2]) - cpu0
+    api     = server._requests - api0
+
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+    await server.stop()
+    return {"p50": lat[len(lat) // 2], "p99": lat[min(len(lat) - 1, int(len(lat) * .99))],
+            "burst": burst_s, "cpu": cpu / idle, "api": api / idle}
+
+
+async def run(requests: int, burst: int, idle: float):
+    results = {mode: await run_mode(mode, requests, burst, idle) for mode in ("polling", "webhook")}
+    print(f"{requests} sequential /ping, burst of {burst}, {idle:g} s idle\n")
+    print(f"{'mode':<9} {'p50':>8} {'p99':>8} {'burst':>9} {'idle CPU':>9} {'API req/s':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<9} {r['p50'] * 1e3:6.2f}ms {r['p99'] * 1e3:6.2f}ms {r['burst'] * 1e3:7.1f}ms"
+              f" {r['cpu'] * 100:8.2f}% {r['api']:10.2f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), sys.argv[5])
+    else:
+        args = [float(a) for a in sys.argv[1:]] + [300, 200, 10][len(sys.argv) - 1:]
+        asyncio.run(run(int(args[0]), int(args[1]), args[2]))
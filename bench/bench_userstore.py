@@ -0,0 +1,55 @@
+"""Cold-start load time of the user store.
+
+    python bench/bench_userstore.py [n_users]
+
+Fills a throw-away SQLite file with `n_users` (default 100k) registered
+users, then times UserStore.load(), lookups and paging.
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from userstore import UserStore, ROLE_USER
+
+
+def main():
+    n    = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    tmp  = tempfile.mkdtemp()
+    path = os.path.join(tmp, "users.db")
+
+    UserStore(path)._connect().close()
+    db = sqlite3.connect(path)
+    with db:
+        db.executemany("INSERT INTO users (id, name, role) VALUES (?, ?, ?)",
+                       ((1_000_000 + i, f"user{i}", ROLE_USER if i % 10 == 0 else 0) for i in range(n)))
+    db.close()
+    print(f"{n:,} users, db size {os.path.getsize(path) / 1e6:.1f} MB")
+
+    store = UserStore(path)
+    start = time.perf_counter()
+    store.load()
+    print(f"cold load:        {(time.perf_counter() - start) * 1e3:8.1f} ms")
+
+    start = time.perf_counter()
+    for i in range(n):
+        store.role(1_000_000 + i)
+    print(f"role lookup:      {(time.perf_counter() - start) / n * 1e9:8.0f} ns")
+
+    start = time.perf_counter()
+    for off in range(0, n, n // 100):
+        store.page(off, 20)
+    print(f"page of 20:       {(time.perf_counter() - start) / 100 * 1e6:8.1f} µs")
+
+    start = time.perf_counter()
+    for i in range(10_000):
+        store.register(5_000_000 + i, f"new{i}")
+    store.close()
+    print(f"10k registrations flushed in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
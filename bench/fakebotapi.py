@@ -0,0 +1,241 @@
+"""Minimal local stand-in for the Telegram Bot API, for benchmarks.
+
+    server = FakeBotAPI(flood_every=10)
+    await server.start()
+    bot = Bot(TOKEN, base_url=server.base_url, base_file_url=server.file_url)
+
+Every call is recorded in `server.calls` as (method, params) and passed to
+`server.on_call(method, params)` if set.  With
+`flood_every=N`, every Nth request is answered with a 429 carrying
+`retry_after`, like Telegram's flood control.  `latency` adds a delay per
+request.  Messages to chat ids in `server.blocked` are refused with 403,
+as for users who blocked the bot.  Uploaded files are consumed chunk by chunk and only their size
+and SHA-256 are kept.  Files put in `server.files` ({file_id: local
+path}) are served by getFile and streamed from the file URL.
+
+`await server.deliver(update)` hands an update to the bot: POSTed to the
+webhook registered with setWebhook (with its secret token header), or
+queued for getUpdates when none is set.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import httpx
+from urllib.parse import parse_qsl
+
+TOKEN = "123456:FAKE"
+
+
+class FakeBotAPI:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, flood_every: int = 0,
+                 retry_after: int = 1, latency: float = 0.0):
+        self.host        = host
+        self.port        = port
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.latency     = latency
+        self.calls       = []
+        self.on_call     = None
+        self.floods      = 0
+        self.updates     = asyncio.Queue()     # served to getUpdates
+        self.webhook     = None                # (url, secret_token) from setWebhook
+        self.polls       = 0                   # getUpdates requests answered
+        self.files       = {}                  # {file_id: local path} for getFile / downloads
+        self.blocked     = set()               # chat ids answered 403 Forbidden
+        self._http       = None
+        self._server     = None
+        self._msg_id     = 0
+        self._requests   = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    @property
+    def file_url(self) -> str:
+        return f"http://{self.host}:{self.port}/file/bot"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def deliver(self, update: dict):
+        if self.webhook is None:
+            await self.updates.put(update)
+            return
+        url, secret = self.webhook
+        if self._http is None:
+            self._http = httpx.AsyncClient(limits=httpx.Limits(max_connections=40))
+        headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+        r = await self._http.post(url, json=update, headers=headers)
+        r.raise_for_status()
+
+    def count(self, method: str) -> int:
+        return sum(1 for m, _ in self.calls if m == method)
+
+    # ── HTTP ──────────────────────────────────
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines   = head.decode("latin-1").split("\r\n")
+                verb, path, _ = lines[0].split(" ", 2)
+                headers = {k.lower(): v.strip() for k, v in
+                           (l.split(":", 1) for l in lines[1:] if ":" in l)}
+                if verb == "GET" and path.startswith("/file/"):
+                    await self._download(writer, path.rsplit("/", 1)[-1])
+                    continue
+                length  = int(headers.get("content-length", 0))
+                ctype   = headers.get("content-type", "")
+                if ctype.startswith("multipart/form-data"):
+                    params = await self._multipart(reader, length, ctype.split("boundary=")[1].strip('"'))
+                else:
+                    body   = await reader.readexactly(length) if length else b""
+                    params = self._parse(body, ctype)
+                status, payload = await self._handle(path.rsplit("/", 1)[-1], params)
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _download(self, writer, file_id: str):
+        local = self.files.get(file_id)
+        if local is None:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            return
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n"
+                     f"Content-Length: {os.path.getsize(local)}\r\n\r\n".encode())
+        with open(local, "rb") as f:
+            while chunk := f.read(1 << 20):
+                writer.write(chunk)
+                await writer.drain()
+
+    @staticmethod
+    def _parse(body: bytes, ctype: str) -> dict:
+        if not body:
+            return {}
+        if "json" in ctype:
+            return json.loads(body)
+        out = {}
+        for k, v in parse_qsl(body.decode()):
+            try:
+                out[k] = json.loads(v)
+            except ValueError:
+                out[k] = v
+        return out
+
+    async def _multipart(self, reader, length: int, boundary: str) -> dict:
+        """Stream a multipart body; file parts are hashed, never kept in memory."""
+        delim, params, left = b"--" + boundary.encode(), {}, length
+        buf = b""
+
+        async def more():
+            nonlocal buf, left
+            chunk = await reader.read(min(left, 1 << 16))
+            left -= len(chunk)
+            buf += chunk
+            return bool(chunk)
+
+        while delim + b"\r\n" not in buf and await more():
+            pass
+        buf = buf.split(delim + b"\r\n", 1)[1]
+        while True:
+            while b"\r\n\r\n" not in buf and await more():
+                pass
+            head, buf = buf.split(b"\r\n\r\n", 1)
+            name  = head.decode().split('name="', 1)[1].split('"', 1)[0]
+            is_file = b"filename=" in head
+            sha, size, value = hashlib.sha256(), 0, b""
+            end = b"\r\n" + delim
+            while True:
+                i = buf.find(end)
+                if i >= 0:
+                    part, buf = buf[:i], buf[i + len(end):]
+                    break
+                keep = len(end)
+                part, buf = buf[:-keep], buf[-keep:]
+                if is_file:
+                    sha.update(part); size += len(part)
+                else:
+                    value += part
+                if not await more():
+                    part, buf = buf, b""
+                    break
+            if is_file:
+                sha.update(part); size += len(part)
+                params[name] = {"size": size, "sha256": sha.hexdigest()}
+            else:
+                params[name] = (value + part).decode()
+            while len(buf) < 2 and await more():
+                pass
+            if buf.startswith(b"--"):
+                while await more():
+                    pass
+                return params
+            buf = buf[2:]
+
+    # ── Bot API methods ───────────────────────
+    async def _handle(self, method: str, params: dict):
+        self._requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method == "getUpdates":
+            self.polls += 1
+            try:
+                batch = [await asyncio.wait_for(self.updates.get(), float(params.get("timeout", 0)) or 0.01)]
+                while not self.updates.empty() and len(batch) < int(params.get("limit", 100)):
+                    batch.append(self.updates.get_nowait())
+                return 200, {"ok": True, "result": batch}
+            except asyncio.TimeoutError:
+                return 200, {"ok": True, "result": []}
+        if self.flood_every and self._requests % self.flood_every == 0:
+            self.floods += 1
+            return 429, {"ok": False, "error_code": 429,
+                         "description": f"Too Many Requests: retry after {self.retry_after}",
+                         "parameters": {"retry_after": self.retry_after}}
+
+        self.calls.append((method, params))
+        if method == "sendMessage" and self.blocked and int(params.get("chat_id", 0)) in self.blocked:
+            return 403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+        if self.on_call is not None:
+            self.on_call(method, params)
+        if method == "getMe":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Fake",
+                                                "username": "fake_bot"}}
+        if method == "setWebhook":
+            self.webhook = (params["url"], params.get("secret_token"))
+        elif method == "deleteWebhook":
+            self.webhook = None
+        if method == "getFile":
+            fid = params["file_id"]
+            return 200, {"ok": True, "result": {"file_id": fid, "file_unique_id": fid,
+                                                "file_size": os.path.getsize(self.files[fid]),
+                                                "file_path": fid}}
+        if method in ("setWebhook", "deleteWebhook", "answerCallbackQuery", "setMyCommands"):
+            return 200, {"ok": True, "result": True}
+        self._msg_id += 1
+        chat_id = int(params.get("chat_id", 0) or 0)
+        msg = {
+            "message_id": int(params.get("message_id", self._msg_id)),
+            "date":       int(time.time()),
+            "chat":       {"id": chat_id, "type": "private"},
+        }
+        if "text" in params:
+            msg["text"] = params["text"]
+        if "document" in params:
+            msg["document"] = {"file_id": f"f{self._msg_id}", "file_unique_id": f"u{self._msg_id}",
+                               "file_size": params["document"].get("size", 0)
+                               if isinstance(params["document"], dict) else 0}
+        return 200, {"ok": True, "result": msg}
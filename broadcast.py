@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import heapq
+import bisect
+import asyncio
+import logging
+from itertools import islice
+from telegram.error import Forbidden
+from userstore import store, ROLE_USER, ROLE_ADMIN
+from outbox import outbox
+from pages import escape
+from config import BROADCAST_STATE, BROADCAST_CONCURRENCY, BROADCAST_PROGRESS, BROADCAST_SAVE
+
+AUDIENCES = ("all", "users", "admins")
+RETRY_FULL = 1.0          # seconds before a send the outbox refused (queue full) is tried again
+
+
+class BroadcastError(Exception):
+    pass
+
+
+# ──────────────────────────────────────────────
+#  RECIPIENTS
+# ──────────────────────────────────────────────
+
+def recipients(audience: str, after: int = 0):
+    """Ids above `after`, ascending, each once.
+
+    "all" is every registered user plus role holders who never wrote to
+    the bot (ADMIN_USERS seeds); "users" everyone authorized; "admins"
+    the admins.  Registered users are read lazily from the store.
+    """
+    if audience == "all":
+        ids = heapq.merge((uid for uid, _, _ in store.iter_from(after)), _role_ids(ROLE_USER, after))
+    else:
+        ids = _role_ids(ROLE_ADMIN if audience == "admins" else ROLE_USER, after)
+    last = after
+    for uid in ids:
+        if uid > last:                   # merged duplicates, ids inserted while iterating
+            last = uid
+            yield uid
+
+
+def _role_ids(role: int, after: int):
+    ids = store.with_role(role)
+    return islice(ids, bisect.bisect_right(ids, after), None)
+
+
+def count(audience: str) -> int:
+    if audience == "all":
+        return store.count() + sum(1 for uid in store.with_role(ROLE_USER) if not store.is_registered(uid))
+    return len(store.with_role(ROLE_ADMIN if audience == "admins" else ROLE_USER))
+
+
+# ──────────────────────────────────────────────
+#  BROADCASTER
+# ──────────────────────────────────────────────
+
+class Broadcaster:
+    """Sends one text to an audience through the outbox, resumably.
+
+    Recipients are walked in id order and at most `concurrency` sends are
+    queued or in flight at once; the outbox paces them under Telegram's
+    limits.  `cursor` is the highest id below which every send finished,
+    and the state file is rewritten every BROADCAST_SAVE s, so a broadcast
+    cut short by a restart picks up from there (the few sends that finished
+    after the last save go out twice).  Progress is edited into the status
+    message of the admin who started it.  One broadcast runs at a time.
+    """
+
+    def __init__(self, path: str = BROADCAST_STATE, concurrency: int = BROADCAST_CONCURRENCY,
+                 progress: float = BROADCAST_PROGRESS, save: float = BROADCAST_SAVE, box=outbox):
+        self.path        = path
+        self.concurrency = concurrency
+        self.progress    = progress
+        self.save_every  = save
+        self.outbox      = box
+        self.state       = None       # dict written to `path`; the last broadcast's once it ended
+        self._task       = None
+        self._window     = {}         # {user_id: finished} sent but not yet behind the cursor, in id order
+        self._slots      = None
+        self._cancelled  = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, text: str, audience: str = "all", by: int = None, chat_id: int = None) -> dict:
+        if self.running:
+            raise BroadcastError("a broadcast is already running; cancel it first")
+        if audience not in AUDIENCES:
+            raise BroadcastError(f"audience must be one of: {', '.join(AUDIENCES)}")
+        if not text.strip():
+            raise BroadcastError("nothing to send")
+        if len(text) > 4096:
+            raise BroadcastError(f"the text is {len(text)} characters, Telegram allows 4096")
+        self.state = {
+            "text": text, "audience": audience, "by": by, "chat_id": chat_id, "message_id": None,
+            "started": time.time(), "total": count(audience), "cursor": 0,
+            "sent": 0, "blocked": 0, "failed": 0, "status": "running",
+        }
+        self._launch()
+        logging.info(f"Broadcast to {audience} ({self.state['total']} recipients) started by {by}")
+        return self.status()
+
+    def resume(self) -> bool:
+        """Continue a broadcast the state file says was running; call once at startup."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logging.error(f"Cannot resume broadcast from {self.path}: {e}")
+            return False
+        if state.get("status") != "running":
+            return False
+        self.state = state
+        self._launch()
+        logging.info(f"Broadcast to {state['audience']} resumed after id {state['cursor']}")
+        return True
+
+    def cancel(self) -> bool:
+        if not self.running:
+            return False
+        self._cancelled = True
+        return True
+
+    def status(self) -> dict:
+        if self.state is None:
+            return {"status": "idle"}
+        return {k: v for k, v in self.state.items() if k != "text"}
+
+    def _launch(self):
+        self._cancelled = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    # ── Sending ───────────────────────────────
+    async def _run(self):
+        st = self.state
+        self._window, self._slots = {}, asyncio.Semaphore(self.concurrency)
+        try:
+            if st["chat_id"] and not st["message_id"]:
+                try:
+                    msg = await self.outbox.send_message(st["chat_id"], progress_text(st), parse_mode="Markdown")
+                    st["message_id"] = msg.message_id
+                except Exception as e:
+                    logging.error(f"Broadcast status message failed: {e}")
+            self._save()
+
+            saved = edited = time.monotonic()
+            for uid in recipients(st["audience"], st["cursor"]):
+                await self._slots.acquire()
+                if self._cancelled:
+                    self._slots.release()
+                    break
+                self._window[uid] = False
+                self._submit(uid)
+                now = time.monotonic()
+                if now - saved >= self.save_every:
+                    saved = now
+                    self._save()
+                if now - edited >= self.progress:
+                    edited = now
+                    self._report()
+            for _ in range(self.concurrency):         # wait for the last sends
+                await self._slots.acquire()
+            st["status"] = "cancelled" if self._cancelled else "done"
+        except Exception as e:
+            st["status"] = "failed"
+            logging.error(f"Broadcast failed: {e}")
+        finally:
+            if st["status"] == "running":              # cancelled task: stays resumable
+                self._save()
+            else:
+                self._remove()
+                self._report()
+                logging.info(f"Broadcast to {st['audience']} {st['status']}: {st['sent']} sent, "
+                             f"{st['blocked']} blocked, {st['failed']} failed of {st['total']}")
+
+    def _submit(self, uid: int):
+        fut = self.outbox.send_message(uid, self.state["text"])
+        fut.add_done_callback(lambda f: self._sent(uid, f))
+
+    def _sent(self, uid: int, fut: asyncio.Future):
+        st  = self.state
+        exc = fut.exception()
+        if isinstance(exc, asyncio.QueueFull):
+            asyncio.get_running_loop().call_later(RETRY_FULL, self._submit, uid)
+            return
+        key = "sent" if exc is None else "blocked" if isinstance(exc, Forbidden) else "failed"
+        st[key] += 1
+        window = self._window
+        window[uid] = True
+        while window:
+            first = next(iter(window))
+            if not window[first]:
+                break
+            del window[first]
+            st["cursor"] = first
+        self._slots.release()
+
+    # ── Progress ──────────────────────────────
+    def _report(self):
+        st = self.state
+        if st["chat_id"] and st["message_id"]:
+            self.outbox.edit_message_text(progress_text(st), st["chat_id"], st["message_id"],
+                                          parse_mode="Markdown")
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.error(f"Cannot save broadcast state to {self.path}: {e}")
+
+    def _remove(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def progress_text(st: dict) -> str:
+    done  = st["sent"] + st["blocked"] + st["failed"]
+    total = max(st["total"], done)
+    pct   = done / total * 100 if total else 100.0
+    icon  = {"running": "📢", "done": "✅", "cancelled": "⏹"}.get(st["status"], "❌")
+    secs  = max(1e-9, time.time() - st["started"])
+    line  = f"{pct:.0f}%  ·  {done:,} / {total:,}"
+    if st["status"] == "running" and done:
+        line += f"  ·  {done / secs:.0f}/s, about {(total - done) / (done / secs) / 60:.0f} min left"
+    return (
+        f"{icon} *Broadcast to {st['audience']}*  —  {st['status']}\n"
+        f"━━━━━━━━━━━━━━━━━━━━\n"
+        f"`{line}`\n\n"
+        f"✉️ Delivered `{st['sent']:,}`\n"
+        f"🚫 Blocked the bot `{st['blocked']:,}`\n"
+        f"❌ Failed `{st['failed']:,}`\n\n"
+        f"{escape(st['text'][:200])}{'…' if len(st['text']) > 200 else ''}"
+    )
+
+
+broadcaster = Broadcaster()
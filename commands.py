@@ -1,14 +1,35 @@
-import psutil
 import os
+import re
+import time
+import asyncio
+import threading
 import logging
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from auth import is_authorized, is_admin
-
-LOG_FILE = "bot.log"
-
-users_db = {}  # {user_id: name}
+from auth import is_admin, allowed_path
+from userstore import store, ROLE_ADMIN
+from sampler import sampler, fmt_uptime
+from probes import probe_services
+from singleflight import flights
+from history import history
+from views import view, render, reply, back_keyboard, Request, PUBLIC, ADMIN
+from fleet import fleet
+from metrics import metrics
+from outbox import outbox
+from config import (LOG_FILE, VIEW_CACHE_TTL, FLEET_LISTEN, FLEET_TOP, FLEET_DISK_FULL, STORAGE_TOP, SCAN_TIMEOUT,
+                    TRANSFER_MAX, TRANSFER_WRITE_ROOTS, CGROUP_ROOT, DISKIO_TOP)
+import logreader
+import dirscan
+import transfer
+from broadcast import broadcaster, progress_text, BroadcastError, AUDIENCES
+from pages import BUDGET, escape, bold, code, clip, size, fill, token, untoken, nav_row
+
+LOG_PAGE = 20     # lines per page at most (fewer if they would pass 4096 chars)
+
+LIST_PAGE = 20
+
+SERVICES_PAGE = 30
 
 
 # ──────────────────────────────────────────────
@@ -20,6 +41,17 @@ def bar(percent: float, length: int = 12) -> str:
     filled = int(length * percent / 100)
     return "█" * filled + "░" * (length - filled)
 
+def spark(values: list, width: int = 24, top: float = None) -> str:
+    """Unicode sparkline; `values` are averaged down to `width` cells, NaN = gap."""
+    ticks = "▁▂▃▄▅▆▇█"
+    step  = max(1, -(-len(values) // width))
+    cells = []
+    for i in range(0, len(values), step):
+        chunk = [v for v in values[i:i + step] if v == v]
+        cells.append(sum(chunk) / len(chunk) if chunk else None)
+    top = top or max((c for c in cells if c is not None), default=0) or 1
+    return "".join(" " if c is None else ticks[min(7, int(8 * c / top))] for c in cells)
+
 def status_icon(percent: float) -> str:
     if percent < 60:   return "🟢"
     if percent < 85:   return "🟡"
@@ -32,6 +64,17 @@ def fmt_bytes(n: float) -> str:
     if n >= 1e3:  return f"{n/1e3:.1f} KB"
     return f"{n:.0f} B"
 
+def fmt_age(snap) -> str:
+    """Footer line telling how old the sampled data is."""
+    return f"🕒 _updated {snap.age:.0f}s ago_"
+
+def parse_duration(text: str) -> int:
+    """'90s' / '15m' / '6h' / '7d' → seconds."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if len(text) < 2 or text[-1] not in units or not text[:-1].isdigit():
+        raise ValueError(text)
+    return int(text[:-1]) * units[text[-1]]
+
 def main_menu_keyboard(user_id: int) -> InlineKeyboardMarkup:
     keyboard = [
         [
@@ -47,44 +90,61 @@ def main_menu_keyboard(user_id: int) -> InlineKeyboardMarkup:
             InlineKeyboardButton("🏓 Ping",     callback_data="ping"),
         ],
     ]
+    row = [InlineKeyboardButton("💿 Disk I/O", callback_data="diskio")]
+    if CGROUP_ROOT:
+        row.insert(0, InlineKeyboardButton("🐳 Containers", callback_data="containers"))
+    keyboard.append(row)
+    if FLEET_LISTEN:
+        keyboard.append([InlineKeyboardButton("🛰 Fleet", callback_data="fleet")])
     if is_admin(user_id):
         keyboard.append([
             InlineKeyboardButton("📜 Logs",    callback_data="log"),
             InlineKeyboardButton("👥 Users",   callback_data="list"),
         ])
+        keyboard.append([InlineKeyboardButton("📐 Metrics", callback_data="metrics")])
         keyboard.append([
             InlineKeyboardButton("🔄 Reboot",   callback_data="reboot"),
             InlineKeyboardButton("🛑 Shutdown", callback_data="shutdown"),
         ])
     return InlineKeyboardMarkup(keyboard)
 
-def back_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back to Menu", callback_data="menu")]])
+def live_back_keyboard(name: str) -> InlineKeyboardMarkup:
+    """Back button plus a 'Live' toggle for views that can auto-refresh."""
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("🔴 Live",          callback_data=f"live:{name}"),
+        InlineKeyboardButton("⬅️ Back to Menu", callback_data="menu"),
+    ]])
 
 
 # ──────────────────────────────────────────────
-#  START
+#  START / MENU
 # ──────────────────────────────────────────────
 
+@view("menu", level=PUBLIC, command=False)
+def menu_view(data, req: Request):
+    name = store.name(req.user_id, "User")
+    role = "👑 Admin" if is_admin(req.user_id) else "👤 User"
+    msg = (
+        f"🤖 *Server Monitor Bot*\n"
+        f"━━━━━━━━━━━━━━━━━━━━\n"
+        f"Hello, {bold(name)}!  {role}\n\n"
+        f"Choose an action from the menu below 👇"
+    )
+    return msg, main_menu_keyboard(req.user_id)
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
 
-    if user_id not in users_db:
-        await update.message.reply_text(
+    if not store.is_registered(user_id):
+        reply(
+            update,
             "👋 *Welcome!*\n\nPlease reply with your *name* to register.",
             parse_mode="Markdown"
         )
         return
 
-    name = users_db[user_id]
-    role = "👑 Admin" if is_admin(user_id) else "👤 User"
-    msg = (
-        f"🤖 *Server Monitor Bot*\n"
-        f"━━━━━━━━━━━━━━━━━━━━\n"
-        f"Hello, *{name}*!  {role}\n\n"
-        f"Choose an action from the menu below 👇"
-    )
-    await update.message.reply_text(msg, parse_mode="Markdown", reply_markup=main_menu_keyboard(user_id))
+    msg, markup = await render("menu", Request(user_id, (), context.user_data, False))
+    reply(update, msg, parse_mode="Markdown", reply_markup=markup)
 
 
 # ──────────────────────────────────────────────
@@ -95,11 +155,12 @@ async def save_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     text = update.message.text.strip()
 
-    if user_id not in users_db:
-        users_db[user_id] = text
-        await update.message.reply_text(
+    if not store.is_registered(user_id):
+        store.register(user_id, text)
+        reply(
+            update,
             f"✅ *Registered successfully!*\n\n"
-            f"👤 Name: *{text}*\n"
+            f"👤 Name: {bold(text)}\n"
             f"🪪 Your ID: `{user_id}`\n\n"
             f"Send /start to open the menu.",
             parse_mode="Markdown"
@@ -107,33 +168,158 @@ async def save_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 # ──────────────────────────────────────────────
-#  PING
+#  FILE TRANSFER
 # ──────────────────────────────────────────────
+# Not views: a transfer outlives the handler, so it runs as a task and
+# reports back when done.  Paths are checked by auth.allowed_path().
 
-async def ping(update: Update, context: ContextTypes.DEFAULT_TYPE):
+GET_USAGE = "Usage: `/get <path>`"
+
+_transfers = asyncio.Semaphore(TRANSFER_MAX)
+
+async def _transfer(chat_id: int, what: str, job):
+    async with _transfers:
+        try:
+            msg = await job
+        except Exception as e:
+            logging.error(f"Transfer of {what} failed: {e}")
+            msg = f"❌ Transfer of {bold(what)} failed: {escape(e)}"
+    outbox.send_message(chat_id, msg, parse_mode="Markdown")
+
+def _start_transfer(update: Update, context: ContextTypes.DEFAULT_TYPE, what: str, job) -> bool:
+    if _transfers.locked():
+        job.close()
+        reply(update, f"⏳ {TRANSFER_MAX} transfers are already running, try again shortly.")
+        return False
+    context.application.create_task(_transfer(update.effective_chat.id, what, job), update=update)
+    return True
+
+async def get_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    logging.info(f"{user_id} used /ping")
-    await update.message.reply_text("🏓 *Pong!* Bot is alive.", parse_mode="Markdown")
+    if not is_admin(user_id):
+        reply(update, f"❌ Admin only  |  ID: `{user_id}`", parse_mode="Markdown")
+        return "denied"
+    if not context.args:
+        reply(update, GET_USAGE, parse_mode="Markdown")
+        return "usage"
+    try:
+        path = allowed_path(user_id, " ".join(context.args))
+    except PermissionError as e:
+        reply(update, f"❌ {escape(e)}", parse_mode="Markdown")
+        return "denied"
+    if not os.path.isfile(path):
+        reply(update, f"❌ Not a file: {escape(path)}", parse_mode="Markdown")
+        return "missing"
+    name = os.path.basename(path)
+    if not _start_transfer(update, context, name, transfer.send_file(update.effective_chat.id, path)):
+        return "busy"
+    reply(update, f"📤 Sending {bold(name)} ({fmt_bytes(os.path.getsize(path))})…", parse_mode="Markdown")
+
+async def receive_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """A document sent to the bot is saved to the path in its caption
+    (a directory, or a file name; default: the first upload root).
+    An existing file is only replaced when the caption ends in `--replace`."""
+    user_id, doc = update.effective_user.id, update.message.document
+    if not is_admin(user_id):
+        reply(update, f"❌ Admin only  |  ID: `{user_id}`", parse_mode="Markdown")
+        return "denied"
+    words   = (update.message.caption or "").split()
+    replace = words[-1:] == ["--replace"]
+    target  = " ".join(w for w in words if w != "--replace") or TRANSFER_WRITE_ROOTS[0] + "/"
+    name    = os.path.basename(doc.file_name or doc.file_unique_id)
+    if target.endswith("/") or os.path.isdir(target):
+        target = os.path.join(target, name)
+    try:
+        dest = allowed_path(user_id, target, write=True)
+    except PermissionError as e:
+        reply(update, f"❌ {escape(e)}", parse_mode="Markdown")
+        return "denied"
+    if os.path.exists(dest) and not replace:
+        reply(update, f"❌ {escape(dest)} exists; add `--replace` to the caption to overwrite it.",
+              parse_mode="Markdown")
+        return "exists"
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+    async def save():
+        digest, n = await transfer.receive(context.bot, doc.file_id, dest)
+        return f"✅ Saved {escape(dest)} ({fmt_bytes(n)})\nsha256 `{digest}`"
+
+    if not _start_transfer(update, context, name, save()):
+        return "busy"
+    reply(update, f"📥 Saving {bold(name)} ({fmt_bytes(doc.file_size or 0)}) to {escape(dest)}…",
+          parse_mode="Markdown")
 
 
 # ──────────────────────────────────────────────
-#  STATUS
+#  BROADCAST
 # ──────────────────────────────────────────────
+# Not a view either: the broadcast runs in broadcast.py and edits its own
+# status message.  The text is everything after the audience, as typed.
 
-async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+BROADCAST_USAGE = (
+    "Usage: `/broadcast <all|users|admins> <text>`\n"
+    "`/broadcast` shows progress, `/broadcast cancel` stops it."
+)
+
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    if not is_authorized(user_id):
-        await update.message.reply_text(f"❌ No access  |  ID: `{user_id}`", parse_mode="Markdown")
-        return
+    if not is_admin(user_id):
+        reply(update, f"❌ Admin only  |  ID: `{user_id}`", parse_mode="Markdown")
+        return "denied"
+    parts = (update.message.text or "").split(None, 2)
+    if len(parts) == 1:
+        if broadcaster.state is None:
+            reply(update, BROADCAST_USAGE, parse_mode="Markdown")
+            return "usage"
+        reply(update, progress_text(broadcaster.state), parse_mode="Markdown")
+        return "status"
+    if parts[1] == "cancel":
+        ok = broadcaster.cancel()
+        reply(update, "⏹ Stopping the broadcast…" if ok else "No broadcast is running.")
+        return "cancel"
+    if len(parts) < 3 or parts[1] not in AUDIENCES:
+        reply(update, BROADCAST_USAGE, parse_mode="Markdown")
+        return "usage"
+    try:
+        broadcaster.start(parts[2], parts[1], by=user_id, chat_id=update.effective_chat.id)
+    except BroadcastError as e:
+        reply(update, f"❌ {escape(e)}", parse_mode="Markdown")
+        return "busy"
 
-    cpu    = psutil.cpu_percent(interval=0.5)
-    cores  = psutil.cpu_count()
-    ram    = psutil.virtual_memory()
-    disk   = psutil.disk_usage("/")
-    uptime = os.popen("uptime -p").read().strip()
 
-    msg = (
-        f"📊 *Server Status*\n"
+# ──────────────────────────────────────────────
+#  PING
+# ──────────────────────────────────────────────
+
+@view("ping", level=PUBLIC)
+def ping_view(data, req: Request):
+    return "🏓 *Pong!* Bot is alive."
+
+
+# ──────────────────────────────────────────────
+#  STATUS
+# ──────────────────────────────────────────────
+
+def status_collect(req: Request):
+    """This host's snapshot, or with `/status <host>` a fleet agent's."""
+    return fleet.host(req.args[0]) if req.args else sampler.snapshot()
+
+@view("status", collect=status_collect, ttl=VIEW_CACHE_TTL)
+def status_view(snap, req: Request):
+    if snap is None:
+        return f"❓ Unknown host `{code(req.args[0])}`. See /fleet for connected hosts."
+    cpu    = snap.cpu
+    cores  = snap.cores
+    ram    = snap.ram
+    disk   = snap.disk
+    uptime = snap.uptime
+
+    title = "📊 *Server Status*"
+    if req.args:
+        title = f"📊 *Status of* `{code(snap.host)}`" + ("" if fleet.up(snap) else "  🔴 _down_")
+
+    text = (
+        f"{title}\n"
         f"━━━━━━━━━━━━━━━━━━━━\n"
         f"{status_icon(cpu)}  *CPU*  —  `{cpu:.1f}%`  ({cores} cores)\n"
         f"`{bar(cpu)}`\n\n"
@@ -141,340 +327,565 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"`{bar(ram.percent)}`  `{fmt_bytes(ram.used)} / {fmt_bytes(ram.total)}`\n\n"
         f"{status_icon(disk.percent)}  *Disk*  —  `{disk.percent:.1f}%`\n"
         f"`{bar(disk.percent)}`  `{fmt_bytes(disk.used)} / {fmt_bytes(disk.total)}`\n\n"
-        f"⏱ *Uptime:* {uptime}"
+        f"⏱ *Uptime:* {uptime}\n"
+        f"{fmt_age(snap)}"
+    )
+    return text, (back_keyboard() if req.args else live_back_keyboard("status"))
+
+
+# ──────────────────────────────────────────────
+#  FLEET
+# ──────────────────────────────────────────────
+
+FLEET_VIEWS = {
+    "cpu":  ("🔥 *Top hosts by CPU*",                  lambda h: h.cpu),
+    "ram":  ("🧠 *Top hosts by RAM*",                  lambda h: h.ram.percent),
+    "disk": (f"💾 *Hosts with disk > {FLEET_DISK_FULL}%*", lambda h: h.disk.percent),
+}
+
+def fleet_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("CPU",  callback_data="fleet:cpu"),
+            InlineKeyboardButton("RAM",  callback_data="fleet:ram"),
+            InlineKeyboardButton("Disk", callback_data="fleet:disk"),
+        ],
+        [InlineKeyboardButton("⬅️ Back to Menu", callback_data="menu")],
+    ])
+
+@view("fleet", ttl=VIEW_CACHE_TTL)
+def fleet_view(data, req: Request):
+    key = req.args[0].lower() if req.args else "cpu"
+    if key not in FLEET_VIEWS:
+        return f"Usage: `/fleet [{'|'.join(FLEET_VIEWS)}]`"
+    title, metric = FLEET_VIEWS[key]
+    if key == "disk":
+        rows = fleet.over(metric, FLEET_DISK_FULL)
+    else:
+        rows = fleet.top(metric, FLEET_TOP)
+
+    msg = (
+        f"🛰 *Fleet*  ({len(fleet.live())}/{len(fleet.hosts)} hosts up)\n"
+        f"━━━━━━━━━━━━━━━━━━━━\n"
+        f"{title}\n"
     )
-    logging.info(f"{user_id} used /status")
-    await update.message.reply_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
+    for i, h in enumerate(rows, 1):
+        msg += f"{status_icon(metric(h))} `{i}.` `{code(h.host)}`  `{metric(h):.1f}%`\n"
+    if not rows:
+        msg += "   _none_\n"
+
+    down = sorted(h.host for h in fleet.hosts.values() if not fleet.up(h))
+    if down:
+        msg += "\n⚠️ *Down:* " + ", ".join(f"`{code(d)}`" for d in down[:FLEET_TOP])
+        msg += f" and {len(down) - FLEET_TOP} more\n" if len(down) > FLEET_TOP else "\n"
+    return msg + "\nDetails: `/status <host>`", fleet_keyboard()
 
 
 # ──────────────────────────────────────────────
 #  SYSTEM
 # ──────────────────────────────────────────────
 
-async def system(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_authorized(user_id):
-        await update.message.reply_text("❌ No access", parse_mode="Markdown")
-        return
+SYSTEM_TITLES = {
+    "cpu": "🔥 *Top CPU Processes*",
+    "mem": "🧠 *Top Memory Processes*",
+    "io":  "💽 *Top IO Processes*",
+    "fds": "📂 *Top Processes by Open Files*",
+}
 
-    total_ram = psutil.virtual_memory().total
-    processes = sorted(
-        psutil.process_iter(['name', 'cpu_percent', 'memory_percent', 'memory_info']),
-        key=lambda p: p.info['cpu_percent'],
-        reverse=True
-    )[:5]
-
-    msg = "🔥 *Top CPU Processes*\n━━━━━━━━━━━━━━━━━━━━\n"
-    for i, p in enumerate(processes, 1):
-        cpu_p  = p.info['cpu_percent']
-        ram_p  = p.info['memory_percent'] or 0
-        ram_mb = fmt_bytes(p.info['memory_info'].rss) if p.info['memory_info'] else "?"
+def system_keyboard(key: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("CPU",  callback_data="system:cpu"),
+            InlineKeyboardButton("RAM",  callback_data="system:mem"),
+            InlineKeyboardButton("IO",   callback_data="system:io"),
+            InlineKeyboardButton("FDs",  callback_data="system:fds"),
+        ],
+        [
+            InlineKeyboardButton("🔴 Live",          callback_data=f"live:system:{key}"),
+            InlineKeyboardButton("⬅️ Back to Menu", callback_data="menu"),
+        ],
+    ])
+
+def system_collect(req: Request):
+    if req.args and req.args[0].lower() in ("io", "fds"):
+        sampler.procs.want()              # per-process IO / fds are only read on demand
+    return sampler.snapshot()
+
+@view("system", collect=system_collect, ttl=VIEW_CACHE_TTL)
+def system_view(snap, req: Request):
+    key = req.args[0].lower() if req.args else "cpu"
+    if key not in SYSTEM_TITLES:
+        return f"Usage: `/system [{'|'.join(SYSTEM_TITLES)}]`"
+
+    msg = f"{SYSTEM_TITLES[key]}  ({snap.nprocs:,} running)\n━━━━━━━━━━━━━━━━━━━━\n"
+    for i, p in enumerate(snap.top[key], 1):
         msg += (
-            f"`{i}.` *{p.info['name'][:20]}*\n"
-            f"   CPU: `{cpu_p:.1f}%`  "
-            f"RAM: `{ram_p:.1f}%` (`{ram_mb}`)\n"
+            f"`{i}.` {bold(clip(p.name, 20))}  `{p.pid}`\n"
+            f"   CPU: `{p.cpu:.1f}%`  "
+            f"RAM: `{p.mem:.1f}%` (`{fmt_bytes(p.rss)}`)\n"
         )
+        if key == "io":
+            msg += f"   IO: `{fmt_bytes(p.io)}/s`\n" if p.io is not None else "   IO: `?`\n"
+        elif key == "fds":
+            msg += f"   FDs: `{p.fds if p.fds is not None else '?'}`\n"
+    return msg + fmt_age(snap), system_keyboard(key)
+
+
+# ──────────────────────────────────────────────
+#  CONTAINERS
+# ──────────────────────────────────────────────
+
+CONTAINER_TITLES = {
+    "cpu":  "🔥 *Top cgroups by CPU*",
+    "mem":  "🧠 *Top cgroups by memory*",
+    "io":   "💽 *Top cgroups by IO*",
+    "pids": "🧵 *Top cgroups by PIDs*",
+}
 
-    logging.info(f"{user_id} used /system")
-    await update.message.reply_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
+def containers_keyboard(key: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("CPU",  callback_data="containers:cpu"),
+            InlineKeyboardButton("RAM",  callback_data="containers:mem"),
+            InlineKeyboardButton("IO",   callback_data="containers:io"),
+            InlineKeyboardButton("PIDs", callback_data="containers:pids"),
+        ],
+        [
+            InlineKeyboardButton("🔴 Live",          callback_data=f"live:containers:{key}"),
+            InlineKeyboardButton("⬅️ Back to Menu", callback_data="menu"),
+        ],
+    ])
+
+@view("containers", collect=lambda req: sampler.snapshot(), ttl=VIEW_CACHE_TTL)
+def containers_view(snap, req: Request):
+    key = req.args[0].lower() if req.args else "cpu"
+    if key not in CONTAINER_TITLES:
+        return f"Usage: `/containers [{'|'.join(CONTAINER_TITLES)}]`"
+    if snap.groups is None:
+        return (f"🐳 No cgroup v2 hierarchy at {escape(CGROUP_ROOT or 'CGROUP_ROOT')}.\n"
+                f"/containers needs the unified hierarchy (the default since systemd 247)."), back_keyboard()
+
+    msg = f"{CONTAINER_TITLES[key]}  ({snap.ngroup:,} groups)\n━━━━━━━━━━━━━━━━━━━━\n"
+    for i, g in enumerate(snap.groups[key], 1):
+        msg += f"`{i}.` {bold(clip(g.name, 32))}\n   CPU: `{g.cpu:.1f}%`"
+        if g.throttled >= 1:
+            msg += f" (throttled `{g.throttled:.0f}%`)"
+        if g.mem is not None:
+            msg += f"  RAM: `{fmt_bytes(g.mem)}`"
+            if g.limit:
+                pct  = g.mem / g.limit * 100
+                msg += f" / `{fmt_bytes(g.limit)}`\n   {status_icon(pct)} `{bar(pct)}` `{pct:.0f}%`"
+        msg += "\n   "
+        msg += f"IO: `{fmt_bytes(g.io)}/s`  " if g.io is not None else ""
+        msg += f"PIDs: `{g.pids}`\n" if g.pids is not None else "\n"
+    if not snap.groups[key]:
+        msg += "   _no cgroups_\n"
+    return msg + fmt_age(snap), containers_keyboard(key)
 
 
 # ──────────────────────────────────────────────
 #  NETWORK
 # ──────────────────────────────────────────────
 
-async def network(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_authorized(user_id):
-        await update.message.reply_text("❌ No access")
-        return
+NET_MAX_NICS = 6
 
-    net   = psutil.net_io_counters()
-    conns = len(psutil.net_connections())
+@view("network", collect=lambda req: sampler.snapshot(), ttl=VIEW_CACHE_TTL)
+def network_view(snap, req: Request):
+    net   = snap.net
+    conns = snap.conns
 
     msg = (
         f"🌐 *Network*\n"
         f"━━━━━━━━━━━━━━━━━━━━\n"
         f"📤 *Sent:*  `{fmt_bytes(net.bytes_sent)}`  ({net.packets_sent:,} packets)\n"
-        f"📥 *Recv:*  `{fmt_bytes(net.bytes_recv)}`  ({net.packets_recv:,} packets)\n"
-        f"🔗 *Active connections:* `{conns}`"
+        f"📥 *Recv:*  `{fmt_bytes(net.bytes_recv)}`  ({net.packets_recv:,} packets)\n\n"
     )
-    logging.info(f"{user_id} used /network")
-    await update.message.reply_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
+    for nic in snap.nics[:NET_MAX_NICS]:
+        msg += (
+            f"🔌 {bold(nic.name)}\n"
+            f"   ⬇️ `{fmt_bytes(nic.rx)}/s` ({nic.rx_pkts:,.0f} pkt/s)  "
+            f"⬆️ `{fmt_bytes(nic.tx)}/s` ({nic.tx_pkts:,.0f} pkt/s)\n"
+        )
+        if nic.errors or nic.drops:
+            msg += f"   ⚠️ errors `{nic.errors:.1f}/s`  drops `{nic.drops:.1f}/s`\n"
+
+    tcp = sum(conns.tcp.values())
+    msg += f"\n🔗 *Connections:* `{conns.total:,}`  (TCP `{tcp:,}` / UDP `{conns.udp:,}`)\n"
+    if conns.tcp:
+        msg += "   " + "  ·  ".join(f"{st} `{n:,}`" for st, n in conns.tcp.items()) + "\n"
+    return msg + fmt_age(snap), live_back_keyboard("network")
 
 
 # ──────────────────────────────────────────────
 #  STORAGE
 # ──────────────────────────────────────────────
 
-async def storage(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_authorized(user_id):
-        await update.message.reply_text("❌ No access")
-        return
-
-    disk = psutil.disk_usage("/")
-
+STORAGE_USAGE = "Usage:\n`/storage`\n`/storage top [path]`\n`/storage cancel`"
+
+_scans = {}   # {path: threading.Event} scans in progress, set by `/storage cancel`
+
+def short_path(path: str, width: int = 48) -> str:
+    path = path.replace("`", "'")
+    return path if len(path) <= width else "…" + path[-(width - 1):]
+
+async def storage_collect(req: Request):
+    args = req.args
+    if not args:
+        return "mounts", await asyncio.to_thread(dirscan.mounts)
+    if args[0] not in ("top", "cancel"):
+        return "usage", None
+    if not is_admin(req.user_id):
+        return "denied", None
+    if args[0] == "cancel":
+        for ev in _scans.values():
+            ev.set()
+        return "cancel", list(_scans)
+
+    path = os.path.abspath(" ".join(args[1:]) or "/")
+    if not os.path.isdir(path):
+        return "missing", path
+    if path in _scans:
+        return "busy", path
+    cancel = _scans[path] = threading.Event()
+    try:
+        return "top", await asyncio.wait_for(
+            asyncio.to_thread(dirscan.scanner.scan, path, STORAGE_TOP, cancel), SCAN_TIMEOUT)
+    except asyncio.TimeoutError:
+        return "timeout", path
+    except dirscan.Cancelled:
+        return "cancelled", path
+    except OSError:
+        return "unreadable", path
+    finally:
+        cancel.set()                     # stops the worker threads on timeout too
+        _scans.pop(path, None)
+
+@view("storage", collect=storage_collect, ttl=VIEW_CACHE_TTL)
+def storage_view(data, req: Request):
+    kind, value = data
+    if kind == "top":
+        return storage_top(value)
+    if kind != "mounts":
+        return {
+            "usage":      STORAGE_USAGE,
+            "denied":     "❌ Admin only",
+            "cancel":     f"⏹ Cancelled {len(value)} scan(s)." if value else "No scan is running.",
+            "missing":    f"❌ `{short_path(str(value))}` is not a directory.",
+            "busy":       f"⌛ `{short_path(str(value))}` is already being scanned.",
+            "timeout":    f"⌛ Scan of `{short_path(str(value))}` took over {SCAN_TIMEOUT}s and was stopped.\n"
+                          f"What was read so far is cached; run it again to continue.",
+            "cancelled":  f"⏹ Scan of `{short_path(str(value))}` cancelled.",
+            "unreadable": f"❌ Cannot read `{short_path(str(value))}` (permission denied or removed).",
+        }[kind]
+
+    msg = "💾 *Storage*\n━━━━━━━━━━━━━━━━━━━━\n"
+    for m in value:
+        msg += (
+            f"{status_icon(m.percent)} `{short_path(m.mountpoint, 24)}`  _{m.fstype}_\n"
+            f"`{bar(m.percent)}`  `{m.percent:.1f}%`  `{fmt_bytes(m.used)} / {fmt_bytes(m.total)}`\n"
+        )
+        if m.inodes:
+            msg += f"   inodes `{m.ipercent:.1f}%`  ({m.inodes_used:,} / {m.inodes:,})\n"
+        msg += "\n"
+    if not value:
+        msg += "No mounted filesystems found.\n"
+    return msg + "Largest directories: `/storage top [path]`", live_back_keyboard("storage")
+
+def storage_top(u) -> str:
     msg = (
-        f"💾 *Storage*\n"
+        f"📂 *Disk usage of* `{short_path(u.root)}`  —  `{fmt_bytes(u.total)}`\n"
         f"━━━━━━━━━━━━━━━━━━━━\n"
-        f"{status_icon(disk.percent)} `{bar(disk.percent)}`  `{disk.percent:.1f}%`\n"
-        f"`{fmt_bytes(disk.used)} / {fmt_bytes(disk.total)}`\n\n"
-        f"📦 *Total:* `{fmt_bytes(disk.total)}`\n"
-        f"🔴 *Used:*  `{fmt_bytes(disk.used)}`\n"
-        f"🟢 *Free:*  `{fmt_bytes(disk.free)}`"
+        f"*Largest subdirectories*\n"
     )
-    logging.info(f"{user_id} used /storage")
-    await update.message.reply_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
+    for path, nbytes in u.children:
+        msg += f"`{fmt_bytes(nbytes):>9}`  `{short_path(path)}`\n"
+    if not u.children:
+        msg += "   _none_\n"
+    msg += "\n*Most file bytes directly inside*\n"
+    for path, nbytes in u.heaviest:
+        msg += f"`{fmt_bytes(nbytes):>9}`  `{short_path(path)}`\n"
+    msg += f"\n_{u.dirs:,} dirs, {u.rescanned:,} re-listed, {u.took:.2f}s_"
+    if u.truncated:
+        msg += f"\n⚠️ Stopped after {u.dirs:,} directories; totals are partial."
+    return msg
+
+
+# ──────────────────────────────────────────────
+#  DISK I/O
+# ──────────────────────────────────────────────
+
+@view("diskio", collect=lambda req: sampler.snapshot(), ttl=VIEW_CACHE_TTL)
+def diskio_view(snap, req: Request):
+    msg = "💿 *Disk I/O*\n━━━━━━━━━━━━━━━━━━━━\n"
+    for d in snap.disks[:DISKIO_TOP]:
+        parts  = f"  ({d.parts} partition{'s' if d.parts != 1 else ''})" if d.parts else ""
+        await_ = f"{d.await_:.1f} ms" if d.await_ is not None else "—"
+        msg += (
+            f"{status_icon(d.util)}  {bold(d.name)}{parts}\n"
+            f"`{bar(d.util)}`  util `{d.util:.0f}%`  await `{await_}`\n"
+            f"   📖 `{fmt_bytes(d.read)}/s`  `{d.riops:.0f} IOPS`\n"
+            f"   ✍️ `{fmt_bytes(d.write)}/s`  `{d.wiops:.0f} IOPS`\n\n"
+        )
+    if not snap.disks:
+        msg += "_No block devices with statistics yet._\n\n"
+    elif len(snap.disks) > DISKIO_TOP:
+        msg += f"_…and {len(snap.disks) - DISKIO_TOP} quieter devices_\n\n"
+    return msg + fmt_age(snap), live_back_keyboard("diskio")
 
 
 # ──────────────────────────────────────────────
 #  SERVICES
 # ──────────────────────────────────────────────
 
-async def services(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_authorized(user_id):
-        await update.message.reply_text("❌ No access")
-        return
+@view("services", collect=lambda req: probe_services(), ttl=VIEW_CACHE_TTL, fresh=VIEW_CACHE_TTL)
+def services_view(states, req: Request):
+    try:
+        start = untoken(req.args[0]) if req.args else 0
+    except ValueError:
+        start = 0
+    items = ((i, f"{'✅' if st == 'active' else '❌'}  `{code(s):<10}` — {escape(st)}\n")
+             for i, (s, st) in enumerate(states[start:], start))
+    page  = fill(items, "🛠 *Services Status*\n━━━━━━━━━━━━━━━━━━━━\n", max_items=SERVICES_PAGE)
+    kb    = live_back_keyboard("services")
+    if len(states) > SERVICES_PAGE:
+        prev = token(max(0, start - SERVICES_PAGE)) if start else None
+        nav  = nav_row("services", prev, token(page.last + 1) if page.more else None)
+        kb   = InlineKeyboardMarkup([nav] + list(kb.inline_keyboard))
+    return page.text, kb
 
-    svcs = ["ssh", "nginx", "docker"]
-    msg  = "🛠 *Services Status*\n━━━━━━━━━━━━━━━━━━━━\n"
-    for s in svcs:
-        st   = os.popen(f"systemctl is-active {s}").read().strip()
-        icon = "✅" if st == "active" else "❌"
-        msg += f"{icon}  `{s:<10}` — {st}\n"
 
-    logging.info(f"{user_id} used /services")
-    await update.message.reply_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
+# ──────────────────────────────────────────────
+#  HISTORY
+# ──────────────────────────────────────────────
+
+HISTORY_LABELS = {
+    "cpu":  "CPU",
+    "ram":  "RAM",
+    "disk": "Disk",
+    "tx":   "Net sent",
+    "rx":   "Net recv",
+}
+
+@view("history")
+def history_view(data, req: Request):
+    args   = req.args
+    metric = args[0].lower() if args else "cpu"
+    span   = args[1].lower() if len(args) > 1 else "1h"
+    try:
+        if metric not in HISTORY_LABELS:
+            raise ValueError(metric)
+        seconds = parse_duration(span)
+    except ValueError:
+        return f"Usage: `/history <{'|'.join(HISTORY_LABELS)}> <range>`\ne.g. `/history cpu 6h`"
+
+    step, values = history.query(metric, seconds)
+    seen = [v for v in values if v == v]
+    if not seen:
+        return "📭 No history recorded yet."
+
+    pct = metric in ("cpu", "ram", "disk")
+    fmt = (lambda v: f"{v:.1f}%") if pct else (lambda v: f"{fmt_bytes(v)}/s")
+    return (
+        f"📈 *{HISTORY_LABELS[metric]}*  —  last {span}  (`{step:g}s` buckets)\n"
+        f"━━━━━━━━━━━━━━━━━━━━\n"
+        f"`{spark(values, top=100 if pct else None)}`\n\n"
+        f"⬇️ *Min:* `{fmt(min(seen))}`\n"
+        f"〰 *Avg:* `{fmt(sum(seen) / len(seen))}`\n"
+        f"⬆️ *Max:* `{fmt(max(seen))}`"
+    )
 
 
 # ──────────────────────────────────────────────
 #  REBOOT / SHUTDOWN
 # ──────────────────────────────────────────────
 
-async def reboot(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_admin(user_id):
-        await update.message.reply_text(f"❌ Admin only  |  ID: `{user_id}`", parse_mode="Markdown")
-        return
-    await update.message.reply_text("🔄 *Rebooting server…*", parse_mode="Markdown")
-    os.system("sudo reboot")
+@view("reboot", level=ADMIN)
+def reboot_view(data, req: Request):
+    # Give Telegram a moment to deliver the reply before the host goes down.
+    asyncio.get_running_loop().call_later(1, os.system, "sudo reboot")
+    return "🔄 *Rebooting server…*", None
 
 
-async def shutdown(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_admin(user_id):
-        await update.message.reply_text(f"❌ Admin only  |  ID: `{user_id}`", parse_mode="Markdown")
-        return
-    await update.message.reply_text("🛑 *Shutting down server…*", parse_mode="Markdown")
-    os.system("sudo shutdown now")
+@view("shutdown", level=ADMIN)
+def shutdown_view(data, req: Request):
+    asyncio.get_running_loop().call_later(1, os.system, "sudo shutdown now")
+    return "🛑 *Shutting down server…*", None
 
 
 # ──────────────────────────────────────────────
 #  LOG
 # ──────────────────────────────────────────────
 
-async def get_logs(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_admin(user_id):
-        await update.message.reply_text(f"❌ Admin only  |  ID: `{user_id}`", parse_mode="Markdown")
-        return
+LOG_USAGE = "Usage:\n`/log`\n`/log grep <regex>`\n`/log since <15m|HH:MM|YYYY-MM-DD HH:MM>`"
 
+def parse_since(text: str) -> float:
+    """'15m' / '2h' ago, 'HH:MM' today, or 'YYYY-MM-DD HH:MM' → epoch seconds."""
+    try:
+        return datetime.now().timestamp() - parse_duration(text)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%H:%M"):
+        try:
+            t = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if fmt == "%H:%M":
+            t = datetime.combine(datetime.now().date(), t.time())
+        return t.timestamp()
+    raise ValueError(text)
+
+def log_keyboard(kind: str, cursor) -> InlineKeyboardMarkup:
+    rows = []
+    if cursor:
+        label = "➡️ Newer" if kind == "s" else "⬅️ Older"
+        rows.append([InlineKeyboardButton(label, callback_data=f"log:{kind}:{token(cursor)}")])
+    rows.append([InlineKeyboardButton("⬅️ Back to Menu", callback_data="menu")])
+    return InlineKeyboardMarkup(rows)
+
+async def log_page(kind: str, arg, cursor=None):
+    """One page of the log: kind 't' = tail, 'g' = grep `arg`, 's' = since time `arg`.
+
+    File access runs in a worker thread; paging is driven by byte-offset
+    cursors, so scrolling back never rescans the file.  The reader stops
+    at LOG_PAGE lines or when the page would pass Telegram's limit.
+    """
+    if kind == "g":
+        title = f"Log lines matching `{code(arg)}`"
+    elif kind == "s" and cursor is None:
+        title = f"Log since {datetime.fromtimestamp(arg):%Y-%m-%d %H:%M}"
+    elif kind == "s":
+        title = "Log (continued)"
+    else:
+        title = "Log" if cursor else "Latest log lines"
+    head   = f"📜 *{title}*\n━━━━━━━━━━━━━━━━━━━━\n```\n"
+    budget = BUDGET - size(head) - len("```")
+    if kind == "g":
+        read, args = logreader.grep, (LOG_FILE, arg, LOG_PAGE, cursor, budget)
+    elif kind == "s" and cursor is None:
+        read, args = logreader.since, (LOG_FILE, arg, LOG_PAGE, budget)
+    elif kind == "s":
+        read, args = logreader.forward, (LOG_FILE, cursor, LOG_PAGE, budget)
+    else:
+        read, args = logreader.tail, (LOG_FILE, LOG_PAGE, cursor, budget)
+    with metrics.timer("io", f"log {read.__name__}"):
+        lines, cursor = await asyncio.to_thread(read, *args)
+    content = "".join(code(clip(l, logreader.LINE_MAX)) + "\n" for l in lines) or "No matching lines.\n"
+    page    = fill([(0, content)], head, "```")          # cuts a page that still overflows
+    return page.text, log_keyboard(kind, cursor)
+
+@view("log", level=ADMIN)
+async def log_view(data, req: Request):
+    args, cursor = req.args, None
+    kind, arg = "t", None
     try:
-        with open(LOG_FILE, "r") as f:
-            lines = f.readlines()[-20:]
-        if not lines:
-            await update.message.reply_text("📭 No logs yet.")
-            return
-        content = "".join(lines)
-        msg = f"📜 *Last 20 log lines*\n━━━━━━━━━━━━━━━━━━━━\n```\n{content}```"
-        await update.message.reply_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
-        logging.info(f"Admin {user_id} requested /log")
+        if req.button and args:                       # log:<kind>:<cursor>
+            kind, cursor = args[0], untoken(args[1])
+            arg = req.user_data.get("log_grep") if kind == "g" else None
+            if kind == "g" and arg is None:
+                return "⌛ Search expired, run `/log grep` again."
+        elif len(args) > 1 and args[0] == "grep":
+            kind, arg = "g", " ".join(args[1:])
+            re.compile(arg)
+            req.user_data["log_grep"] = arg
+        elif len(args) > 1 and args[0] == "since":
+            kind, arg = "s", parse_since(" ".join(args[1:]))
+        elif args:
+            raise ValueError(args[0])
+    except (ValueError, IndexError, re.error):
+        return LOG_USAGE
+
+    try:
+        if kind == "t" and cursor is None and os.path.getsize(LOG_FILE) == 0:
+            return "📭 No logs yet."
+        return await log_page(kind, arg, cursor)
     except FileNotFoundError:
-        await update.message.reply_text(f"❌ Log file `{LOG_FILE}` not found.", parse_mode="Markdown")
-    except Exception as e:
-        await update.message.reply_text(f"❌ Error: {e}")
+        return f"❌ Log file `{LOG_FILE}` not found."
 
 
 # ──────────────────────────────────────────────
 #  LIST USERS
 # ──────────────────────────────────────────────
 
-async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if not is_admin(user_id):
-        await update.message.reply_text(f"❌ Admin only  |  ID: `{user_id}`", parse_mode="Markdown")
-        return
-
-    if not users_db:
-        await update.message.reply_text("📭 No users registered yet.")
-        return
-
-    msg = "👥 *Registered Users*\n━━━━━━━━━━━━━━━━━━━━\n"
-    for uid, name in users_db.items():
-        role = "👑" if is_admin(uid) else "👤"
-        msg += f"{role} *{name}*\n   ID: `{uid}`\n"
-
-    await update.message.reply_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
+def users_page(after: int = None, before: int = None):
+    """One page of registered users sorted by id, keyset-paged.
+
+    Users are pulled lazily from the store (ids after `after`, or before
+    `before` for ⬅️ Prev) until LIST_PAGE or the message limit is reached,
+    so the cost of a page does not depend on how many users exist.
+    """
+    back  = before is not None
+    items = ((uid, f"{'👑' if role >= ROLE_ADMIN else '👤'} {bold(name)}\n   ID: `{uid}`\n")
+             for uid, name, role in store.iter_from(before if back else after, reverse=back))
+    page  = fill(items, max_items=LIST_PAGE, reverse=back)
+    if page.first is None:
+        return users_page() if back or after is not None else "📭 No users registered yet."
+
+    lo, hi = sorted((page.first, page.last))
+    total  = store.count()
+    first  = store.position(lo)
+    last   = store.position(hi)
+    msg    = f"👥 *Registered Users*  ({first + 1}–{last + 1} of {total})\n━━━━━━━━━━━━━━━━━━━━\n"
+    nav    = nav_row("list", f"p:{token(lo)}" if first > 0 else None,
+                     f"n:{token(hi)}" if last < total - 1 else None)
+    rows   = [nav] if nav else []
+    rows.append([InlineKeyboardButton("⬅️ Back to Menu", callback_data="menu")])
+    return msg + page.text, InlineKeyboardMarkup(rows)
+
+@view("list", level=ADMIN)
+def list_view(data, req: Request):
+    if not store.count():
+        return "📭 No users registered yet."
+    try:
+        if req.button and len(req.args) == 2:          # list:<n|p>:<user id token>
+            uid = untoken(req.args[1])
+            return users_page(before=uid) if req.args[0] == "p" else users_page(after=uid)
+    except ValueError:
+        pass
+    return users_page()
 
 
 # ──────────────────────────────────────────────
-#  CALLBACK HANDLER (inline buttons)
+#  METRICS
 # ──────────────────────────────────────────────
 
-async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query    = update.callback_query
-    user_id  = query.from_user.id
-    data     = query.data
-    await query.answer()
-
-    # Proxy to the right function using a fake Update-like object
-    # We reuse existing functions but reply via edit_message_text
-
-    async def reply(text, **kwargs):
-        await query.edit_message_text(text, **kwargs)
-
-    # Swap the reply method temporarily via context
-    context.user_data["_edit"] = query
+METRICS_ROWS = 10
 
-    if data == "menu":
-        name = users_db.get(user_id, "User")
-        role = "👑 Admin" if is_admin(user_id) else "👤 User"
-        msg  = (
-            f"🤖 *Server Monitor Bot*\n"
-            f"━━━━━━━━━━━━━━━━━━━━\n"
-            f"Hello, *{name}*!  {role}\n\n"
-            f"Choose an action from the menu below 👇"
-        )
-        await query.edit_message_text(msg, parse_mode="Markdown", reply_markup=main_menu_keyboard(user_id))
-        return
-
-    if data == "ping":
-        await query.edit_message_text("🏓 *Pong!* Bot is alive.", parse_mode="Markdown", reply_markup=back_keyboard())
-        return
+def fmt_secs(s: float) -> str:
+    if s >= 1:     return f"{s:.1f}s"
+    if s >= 1e-3:  return f"{s * 1e3:.1f}ms"
+    return f"{s * 1e6:.0f}µs"
 
-    if data == "status":
-        if not is_authorized(user_id):
-            await query.edit_message_text("❌ No access")
-            return
-        cpu    = psutil.cpu_percent(interval=0.5)
-        cores  = psutil.cpu_count()
-        ram    = psutil.virtual_memory()
-        disk   = psutil.disk_usage("/")
-        uptime = os.popen("uptime -p").read().strip()
-        msg = (
-            f"📊 *Server Status*\n"
-            f"━━━━━━━━━━━━━━━━━━━━\n"
-            f"{status_icon(cpu)}  *CPU*  —  `{cpu:.1f}%`  ({cores} cores)\n"
-            f"`{bar(cpu)}`\n\n"
-            f"{status_icon(ram.percent)}  *RAM*  —  `{ram.percent:.1f}%`\n"
-            f"`{bar(ram.percent)}`  `{fmt_bytes(ram.used)} / {fmt_bytes(ram.total)}`\n\n"
-            f"{status_icon(disk.percent)}  *Disk*  —  `{disk.percent:.1f}%`\n"
-            f"`{bar(disk.percent)}`  `{fmt_bytes(disk.used)} / {fmt_bytes(disk.total)}`\n\n"
-            f"⏱ *Uptime:* {uptime}"
-        )
-        await query.edit_message_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
-
-    elif data == "system":
-        if not is_authorized(user_id):
-            await query.edit_message_text("❌ No access")
-            return
-        processes = sorted(
-            psutil.process_iter(['name', 'cpu_percent', 'memory_percent', 'memory_info']),
-            key=lambda p: p.info['cpu_percent'], reverse=True
-        )[:5]
-        msg = "🔥 *Top CPU Processes*\n━━━━━━━━━━━━━━━━━━━━\n"
-        for i, p in enumerate(processes, 1):
-            cpu_p  = p.info['cpu_percent']
-            ram_p  = p.info['memory_percent'] or 0
-            ram_mb = fmt_bytes(p.info['memory_info'].rss) if p.info['memory_info'] else "?"
-            msg += (
-                f"`{i}.` *{p.info['name'][:20]}*\n"
-                f"   CPU: `{cpu_p:.1f}%`  "
-                f"RAM: `{ram_p:.1f}%` (`{ram_mb}`)\n"
-            )
-        await query.edit_message_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
-
-    elif data == "network":
-        if not is_authorized(user_id):
-            await query.edit_message_text("❌ No access")
-            return
-        net   = psutil.net_io_counters()
-        conns = len(psutil.net_connections())
-        msg = (
-            f"🌐 *Network*\n"
-            f"━━━━━━━━━━━━━━━━━━━━\n"
-            f"📤 *Sent:*  `{fmt_bytes(net.bytes_sent)}`  ({net.packets_sent:,} packets)\n"
-            f"📥 *Recv:*  `{fmt_bytes(net.bytes_recv)}`  ({net.packets_recv:,} packets)\n"
-            f"🔗 *Active connections:* `{conns}`"
-        )
-        await query.edit_message_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
-
-    elif data == "storage":
-        if not is_authorized(user_id):
-            await query.edit_message_text("❌ No access")
-            return
-        disk = psutil.disk_usage("/")
-        msg = (
-            f"💾 *Storage*\n"
-            f"━━━━━━━━━━━━━━━━━━━━\n"
-            f"{status_icon(disk.percent)} `{bar(disk.percent)}`  `{disk.percent:.1f}%`\n"
-            f"`{fmt_bytes(disk.used)} / {fmt_bytes(disk.total)}`\n\n"
-            f"📦 *Total:* `{fmt_bytes(disk.total)}`\n"
-            f"🔴 *Used:*  `{fmt_bytes(disk.used)}`\n"
-            f"🟢 *Free:*  `{fmt_bytes(disk.free)}`"
-        )
-        await query.edit_message_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
-
-    elif data == "services":
-        if not is_authorized(user_id):
-            await query.edit_message_text("❌ No access")
-            return
-        svcs = ["ssh", "nginx", "docker"]
-        msg  = "🛠 *Services Status*\n━━━━━━━━━━━━━━━━━━━━\n"
-        for s in svcs:
-            st   = os.popen(f"systemctl is-active {s}").read().strip()
-            icon = "✅" if st == "active" else "❌"
-            msg += f"{icon}  `{s:<10}` — {st}\n"
-        await query.edit_message_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
-
-    elif data == "log":
-        if not is_admin(user_id):
-            await query.edit_message_text("❌ Admin only")
-            return
-        try:
-            with open(LOG_FILE, "r") as f:
-                lines = f.readlines()[-20:]
-            content = "".join(lines) if lines else "No logs yet."
-            msg = f"📜 *Last 20 log lines*\n━━━━━━━━━━━━━━━━━━━━\n```\n{content}```"
-            await query.edit_message_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
-        except Exception as e:
-            await query.edit_message_text(f"❌ Error: {e}")
-
-    elif data == "list":
-        if not is_admin(user_id):
-            await query.edit_message_text("❌ Admin only")
-            return
-        if not users_db:
-            await query.edit_message_text("📭 No users registered yet.", reply_markup=back_keyboard())
-            return
-        msg = "👥 *Registered Users*\n━━━━━━━━━━━━━━━━━━━━\n"
-        for uid, name in users_db.items():
-            role = "👑" if is_admin(uid) else "👤"
-            msg += f"{role} *{name}*\n   ID: `{uid}`\n"
-        await query.edit_message_text(msg, parse_mode="Markdown", reply_markup=back_keyboard())
-
-    elif data == "reboot":
-        if not is_admin(user_id):
-            await query.edit_message_text("❌ Admin only")
-            return
-        await query.edit_message_text("🔄 *Rebooting server…*", parse_mode="Markdown")
-        os.system("sudo reboot")
-
-    elif data == "shutdown":
-        if not is_admin(user_id):
-            await query.edit_message_text("❌ Admin only")
-            return
-        await query.edit_message_text("🛑 *Shutting down server…*", parse_mode="Markdown")
-        os.system("sudo shutdown now")
\ No newline at end of file
+@view("metrics", level=ADMIN)
+def metrics_view(data, req: Request):
+    msg = (
+        f"📐 *Bot Metrics*  ({fmt_uptime(time.time() - metrics.started)})\n"
+        f"━━━━━━━━━━━━━━━━━━━━\n"
+        f"*Handlers*  calls · p50 · p99 · errors\n"
+    )
+    for label, h in metrics.family("handler")[:METRICS_ROWS]:
+        msg += (f"`{label[:14]:<14}` {h.count:,} · {fmt_secs(h.quantile(.5))} · "
+                f"{fmt_secs(h.quantile(.99))} · {metrics.errors[label]}\n")
+
+    lag = metrics.hist("loop_lag", "loop")
+    msg += (f"\n*Event loop lag*  p50 `{fmt_secs(lag.quantile(.5))}`  "
+            f"p99 `{fmt_secs(lag.quantile(.99))}`  max `{fmt_secs(lag.max)}`\n")
+
+    msg += "\n*Blocking calls*  calls · p50 · p99 · max\n"
+    for family in ("psutil", "subprocess", "io"):
+        for label, h in metrics.family(family):
+            msg += (f"`{label[:14]:<14}` {h.count:,} · {fmt_secs(h.quantile(.5))} · "
+                    f"{fmt_secs(h.quantile(.99))} · {fmt_secs(h.max)}\n")
+
+    o = outbox.stats()
+    msg += (f"\n📮 *Outbox*  queued `{o['depth']}` · sent `{o['sent']:,}` · coalesced `{o['coalesced']:,}`\n"
+            f"   retried `{o['retried']:,}` · dropped `{o['dropped']:,}` · failed `{o['failed']:,}`\n")
+
+    f = flights.stats()
+    msg += (f"\n🛫 *Single-flight*  runs `{f['runs']:,}` · shared `{f['shared']:,}` · "
+            f"reused `{f['reused']:,}` · in flight `{f['in_flight']}`\n")
+
+    if metrics.users:
+        msg += "\n👥 *Busiest users* (last minute)\n"
+        for uid, n in metrics.users.most_common(5):
+            msg += f"`{uid}`  {n} req/min\n"
+    return msg
@@ -1,2 +1,150 @@
 BOT_TOKEN = "your bot token"
 #api key here
+
+
+# ─── Metrics sampler ──────────────────────────────────────────────────
+SAMPLE_INTERVAL      = 5          # seconds between background metric samples
+PROC_TOP             = 5          # processes listed by /system
+PROC_DETAIL_INTERVAL = 60         # seconds between per-process IO / fd reads while nobody looks at them
+PROC_DETAIL_DEMAND   = 120        # read them every sample for this long after /system io|fds was shown
+CONN_INTERVAL        = 30         # seconds between /proc/net connection counts
+VIEW_CACHE_TTL       = 2          # seconds a rendered view is reused by repeated presses
+
+# ─── Service probes ───────────────────────────────────────────────────
+SERVICES        = ["ssh", "nginx", "docker"]   # systemd units shown by /services
+SYSTEMCTL       = "systemctl"                  # path to systemctl (a stub works too)
+PROBE_TIMEOUT   = 2.0        # seconds per batched systemctl call
+PROBE_CACHE_TTL = 5          # seconds a unit state is reused
+PROBE_BATCH     = 64         # units per systemctl call
+
+
+# ─── Metrics history ──────────────────────────────────────────────────
+# (bucket seconds, kept seconds): raw for 1 h, 1-minute for 24 h, 10-minute for 30 days
+HISTORY_TIERS = [
+    (SAMPLE_INTERVAL, 3600),
+    (60,              86400),
+    (600,             30 * 86400),
+]
+
+
+# ─── User store ───────────────────────────────────────────────────────
+USERS_DB              = "users.db"   # SQLite file (WAL mode)
+USERS_FLUSH_INTERVAL  = 0.5          # seconds writes are batched before commit
+USERS_RELOAD_INTERVAL = 2            # seconds between checks for changes made by other processes
+
+
+
+# ─── Alerts ───────────────────────────────────────────────────────────
+# name:   unique per rule (default: the metric)
+# metric: cpu / ram / disk (percent), service:<unit>, process:<name>
+# above:  fire threshold (default 85, where status_icon() turns red)
+# for:    seconds the condition must hold;  repeat: re-notify interval
+ALERT_RULES = [
+    {"name": "CPU high",  "metric": "cpu",  "above": 90, "for": 120},
+    {"name": "RAM high",  "metric": "ram",  "for": 60},
+    {"name": "Disk full", "metric": "disk", "above": 95, "repeat": 3600},
+    {"name": "SSH down",  "metric": "service:ssh"},
+]
+ALERT_INTERVAL   = SAMPLE_INTERVAL   # seconds between rule evaluations
+ALERT_HYSTERESIS = 5                 # points below `above` before an alert resolves
+ALERT_RATE_LIMIT = (10, 600)         # max alert messages per chat per window (s)
+
+
+# ─── Live dashboards ──────────────────────────────────────────────────
+LIVE_INTERVAL = SAMPLE_INTERVAL   # seconds between refreshes (one shared tick)
+LIVE_DURATION = 300               # seconds a live message keeps updating
+LIVE_MAX      = 20                # concurrent live messages
+
+
+# ─── Outbound queue ───────────────────────────────────────────────────
+# Telegram allows about 30 messages/s overall and 1/s per chat (short bursts ok)
+OUTBOX_RATE        = (30, 30)   # global (tokens per second, burst)
+OUTBOX_CHAT_RATE   = (1, 3)     # per chat (tokens per second, burst)
+OUTBOX_MAX_DEPTH   = 1000       # queued requests before new sends are dropped
+OUTBOX_RETRIES     = 5          # network-error retries per request
+OUTBOX_CONCURRENCY = 8          # requests in flight at once
+BOT_API_URL        = None       # e.g. "http://127.0.0.1:8081/bot" for a local / fake Bot API server
+
+# ─── Fleet ────────────────────────────────────────────────────────────
+# Central bot: set FLEET_LISTEN to accept agents.  Agents (`python main.py
+# --agent`) need no BOT_TOKEN, only FLEET_SERVER and the shared FLEET_TOKEN.
+# The link is unencrypted TCP: use a private network or a TLS tunnel.
+FLEET_LISTEN    = None                    # e.g. ("0.0.0.0", 7070)
+FLEET_SERVER    = ("127.0.0.1", 7070)     # where agents connect to
+FLEET_TOKEN     = "change me"             # shared secret sent by agents, at most 255 bytes
+FLEET_KEYFRAME  = 60                      # full frame every N frames, deltas in between
+FLEET_STALE     = 3 * SAMPLE_INTERVAL     # seconds without a frame before a host is down
+FLEET_TOP       = 10                      # hosts listed by /fleet
+FLEET_DISK_FULL = 90                      # /fleet disk lists hosts above this %
+
+# ─── Metrics ──────────────────────────────────────────────────────────
+METRICS_LISTEN = None     # e.g. ("127.0.0.1", 9464) to serve Prometheus text at /metrics
+
+# ─── Storage ──────────────────────────────────────────────────────────
+STORAGE_TOP    = 10         # directories listed by /storage top
+SCAN_WORKERS   = 8          # threads listing directories in parallel
+SCAN_CACHE_TTL = 600        # seconds a directory listing is trusted while its mtime is unchanged
+SCAN_CACHE_MAX = 200_000    # directory listings kept across scans (oldest dropped first)
+SCAN_MAX_DIRS  = 500_000    # stop (and say so) after this many directories
+SCAN_TIMEOUT   = 60         # seconds before a /storage top scan is cancelled
+
+# ─── Logging ──────────────────────────────────────────────────────────
+# Handlers only enqueue records; a writer thread batches them to disk.
+LOG_FILE           = "bot.log"
+LOG_MAX_BYTES      = 10 * 1024 * 1024   # rotate when the active file reaches this size
+LOG_ROTATE_EVERY   = 86400              # … and at every multiple of this many seconds (UTC); 0 = size only
+LOG_BACKUPS        = 7                  # gzip archives kept per file
+LOG_BATCH          = 512                # records per write
+LOG_FLUSH_INTERVAL = 0.5                # seconds a record may wait before its batch is written (errors: none)
+AUDIT_FILE         = "audit.jsonl"      # one JSON line per command / button press; None = off
+
+
+# ─── Updates ──────────────────────────────────────────────────────────
+# "polling": long-poll getUpdates (works anywhere, no inbound port).
+# "webhook": Telegram POSTs each update to an embedded HTTP server; needs a
+# public HTTPS URL (a reverse proxy in front, or WEBHOOK_CERT/KEY here).
+UPDATE_MODE             = "polling"
+WEBHOOK_LISTEN          = ("0.0.0.0", 8443)   # bind address of the embedded server
+WEBHOOK_PATH            = "telegram"          # URL path it answers on
+WEBHOOK_URL             = None                # public URL, e.g. "https://bot.example.com/telegram"
+WEBHOOK_SECRET          = None                # X-Telegram-Bot-Api-Secret-Token; None = random per start
+WEBHOOK_CERT            = None                # PEM certificate / key for TLS without a proxy
+WEBHOOK_KEY             = None
+WEBHOOK_MAX_CONNECTIONS = 40                  # parallel connections Telegram may open
+CONCURRENT_UPDATES      = 16                  # updates handled at once (both modes)
+
+
+# ─── Control socket ───────────────────────────────────────────────────
+# Local admin API served by the bot; `python terminal.py` is its client.
+CONTROL_SOCKET = "control.sock"    # Unix socket path (created 0600); None = off
+
+
+# ─── File transfer ────────────────────────────────────────────────────
+# /get <path> sends a file; a document sent to the bot is saved (admins only,
+# and only under these roots — symlinks are resolved before checking).
+TRANSFER_READ_ROOTS   = ["/var/log"]             # e.g. add "/etc/nginx"
+TRANSFER_WRITE_ROOTS  = ["uploads"]              # first entry = default destination
+TRANSFER_PART_SIZE    = 49 * 1024 * 1024         # Bot API uploads are capped at 50 MB per file
+TRANSFER_COMPRESS_MIN = 1024 * 1024              # gzip files larger than this (unless already compressed)
+TRANSFER_GZIP_LEVEL   = 1                        # ~3x faster than 6 for ~20% larger logs; spares the CPU
+TRANSFER_TIMEOUT      = 600                      # seconds allowed per part upload / download
+TRANSFER_MAX          = 2                        # transfers running at once
+TRANSFER_TMP          = None                     # directory for compressed parts (None = system temp)
+
+
+# ─── Containers (cgroup v2) ───────────────────────────────────────────
+CGROUP_ROOT   = "/sys/fs/cgroup"    # unified hierarchy mount; None = /containers off
+CGROUP_RESCAN = 30                  # seconds between walks of the tree (new containers show up after this)
+CGROUP_TOP    = 10                  # groups listed by /containers
+
+
+# ─── Disk I/O ─────────────────────────────────────────────────────────
+DISKIO_IGNORE = r"^(loop|ram|zram|fd|sr)\d"   # /proc/diskstats devices left out of /diskio (regex)
+DISKIO_TOP    = 8                             # devices listed by /diskio
+
+
+# ─── Broadcast ────────────────────────────────────────────────────────
+BROADCAST_STATE       = "broadcast.json"   # progress of the running broadcast, resumed after a restart
+BROADCAST_CONCURRENCY = 20                 # sends queued or in flight at once (the outbox paces them)
+BROADCAST_PROGRESS    = 5                  # seconds between edits of the status message
+BROADCAST_SAVE        = 1                  # seconds between writes of the state file
\ No newline at end of file
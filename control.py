@@ -0,0 +1,167 @@
+import os
+import json
+import stat
+import asyncio
+import logging
+from userstore import store, ROLE_NONE, ROLE_USER, ROLE_ADMIN
+from broadcast import broadcaster, BroadcastError
+from config import CONTROL_SOCKET
+
+ROLE_NAMES = {ROLE_USER: "user", ROLE_ADMIN: "admin"}
+MAX_REQUEST = 16 * 1024 * 1024     # bytes per request line (~1M ids)
+BULK        = 1000                 # above this many ids, apply in a worker thread
+
+
+# ──────────────────────────────────────────────
+#  COMMANDS
+# ──────────────────────────────────────────────
+# Each takes the request dict and returns the reply dict ("ok" is added).
+# Ids come as a JSON list; a single call changes any number of them and
+# the store commits them in one transaction.
+
+class ControlError(Exception):
+    pass
+
+
+def _ids(req: dict) -> list:
+    ids = req.get("ids")
+    if not isinstance(ids, list) or not ids:
+        raise ControlError("'ids' must be a non-empty list of user ids")
+    if not all(isinstance(i, int) and not isinstance(i, bool) and i > 0 for i in ids):
+        raise ControlError("user ids must be positive integers")
+    return list(dict.fromkeys(ids))
+
+
+def _grant(ids: list, role: int) -> dict:
+    """Give `role` to every id below it; ids already there are left alone."""
+    changed = [u for u in ids if store.role(u) != role and not (role == ROLE_USER and store.role(u) > role)]
+    store.set_roles(changed, role)
+    return {"changed": len(changed), "unchanged": len(ids) - len(changed), "ids": changed}
+
+
+def cmd_add(req: dict) -> dict:
+    return _grant(_ids(req), ROLE_USER)
+
+def cmd_addadmin(req: dict) -> dict:
+    return _grant(_ids(req), ROLE_ADMIN)
+
+def cmd_remove(req: dict) -> dict:
+    ids     = _ids(req)
+    removed = [u for u in ids if store.role(u) != ROLE_NONE]
+    missing = [u for u in ids if store.role(u) == ROLE_NONE]
+    store.set_roles(removed, ROLE_NONE)
+    return {"changed": len(removed), "missing": missing, "ids": removed}
+
+def cmd_import(req: dict) -> dict:
+    """Bulk grant: {"ids": [...], "role": "user" | "admin", "replace": false}.
+
+    With replace=true, holders of that role not in `ids` lose it (the list
+    becomes the whole set), still as a single store update per role.
+    """
+    ids  = _ids(req)
+    role = {"user": ROLE_USER, "admin": ROLE_ADMIN}.get(req.get("role", "user"))
+    if role is None:
+        raise ControlError("'role' must be 'user' or 'admin'")
+    out = _grant(ids, role)
+    if req.get("replace"):
+        keep    = set(ids)
+        revoked = [u for u, r in store.roles().items() if r == role and u not in keep]
+        store.set_roles(revoked, ROLE_USER if role == ROLE_ADMIN else ROLE_NONE)
+        out["revoked"] = len(revoked)
+    return out
+
+def cmd_list(req: dict) -> dict:
+    users = [{"id": uid, "role": ROLE_NAMES.get(r, "none"), "name": store.name(uid)}
+             for uid, r in sorted(store.roles().items())]
+    return {"users": users}
+
+def cmd_stats(req: dict) -> dict:
+    roles = list(store.roles().values())
+    return {"registered": store.count(), "users": roles.count(ROLE_USER), "admins": roles.count(ROLE_ADMIN)}
+
+def cmd_broadcast(req: dict) -> dict:
+    """{"text": "...", "audience": "all" | "users" | "admins"} starts one,
+    {"cancel": true} stops it, {} reports progress (see broadcast.py)."""
+    if req.get("cancel"):
+        return {"cancelled": broadcaster.cancel(), **broadcaster.status()}
+    if "text" in req:
+        if not isinstance(req["text"], str):
+            raise ControlError("'text' must be a string")
+        try:
+            return broadcaster.start(req["text"], req.get("audience", "all"), by="control")
+        except BroadcastError as e:
+            raise ControlError(str(e))
+    return broadcaster.status()
+
+
+COMMANDS = {
+    "add":      cmd_add,
+    "addadmin": cmd_addadmin,
+    "remove":   cmd_remove,
+    "import":   cmd_import,
+    "list":     cmd_list,
+    "stats":    cmd_stats,
+    "broadcast": cmd_broadcast,
+}
+
+
+async def execute(req: dict) -> dict:
+    fn = COMMANDS.get(req.get("cmd")) if isinstance(req, dict) else None
+    if fn is None:
+        return {"ok": False, "error": f"unknown command, expected one of: {', '.join(COMMANDS)}"}
+    try:
+        big = isinstance(req.get("ids"), list) and len(req["ids"]) > BULK
+        out = await asyncio.to_thread(fn, req) if big else fn(req)
+    except ControlError as e:
+        return {"ok": False, "error": str(e)}
+    if out.get("changed") or out.get("revoked"):
+        logging.info(f"Control: {req['cmd']} changed {out.get('changed', 0)} ids"
+                     + (f", revoked {out['revoked']}" if out.get("revoked") else ""))
+    return {"ok": True, **out}
+
+
+# ──────────────────────────────────────────────
+#  UNIX SOCKET SERVER
+# ──────────────────────────────────────────────
+# One JSON object per line in each direction; a connection may send any
+# number of requests.  The socket is created 0600: whoever can open it is
+# as trusted as the bot's own user.
+
+async def _client(reader, writer):
+    try:
+        while line := await reader.readline():
+            try:
+                reply = await execute(json.loads(line))
+            except ValueError as e:
+                reply = {"ok": False, "error": f"bad JSON: {e}"}
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+    except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+        logging.error(f"Control connection dropped: {e}")
+    finally:
+        writer.close()
+
+
+async def serve_control(path: str = CONTROL_SOCKET):
+    """Listen on the Unix socket `path`, replacing a stale one.
+
+    Only a socket nobody answers on is removed; anything else at `path`
+    (a file, a directory, a misconfigured CONTROL_SOCKET) is left alone.
+    """
+    if os.path.lexists(path):
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            logging.error(f"Control socket {path} exists and is not a socket; not listening")
+            return
+        try:
+            _, w = await asyncio.open_unix_connection(path)
+            w.close()
+            logging.error(f"Control socket {path} is in use by another process; not listening")
+            return
+        except OSError:
+            os.unlink(path)
+    old = os.umask(0o177)
+    try:
+        await asyncio.start_unix_server(_client, path, limit=MAX_REQUEST)
+    finally:
+        os.umask(old)
+    logging.info(f"Control socket on {path}")
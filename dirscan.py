@@ -0,0 +1,184 @@
+import os
+import time
+import heapq
+import threading
+from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+import psutil
+from config import SCAN_WORKERS, SCAN_CACHE_TTL, SCAN_CACHE_MAX, SCAN_MAX_DIRS
+
+# Pseudo / image filesystems that psutil.disk_partitions() can still report.
+SKIP_FSTYPES = {"squashfs", "overlay", "tmpfs", "devtmpfs", "iso9660", "nsfs", "ramfs"}
+
+
+# ──────────────────────────────────────────────
+#  MOUNTS
+# ──────────────────────────────────────────────
+
+class Mount(NamedTuple):
+    device:      str
+    mountpoint:  str
+    fstype:      str
+    total:       int
+    used:        int
+    free:        int
+    percent:     float
+    inodes:      int      # 0 = filesystem has no fixed inode table (btrfs, zfs…)
+    inodes_used: int
+
+    @property
+    def ipercent(self) -> float:
+        return self.inodes_used / self.inodes * 100 if self.inodes else 0.0
+
+
+def mounts() -> list:
+    """Usage and inode counts of every real mounted filesystem, one per device.
+
+    Blocking (statvfs on a stuck network mount can hang): call from a thread.
+    """
+    seen, out = set(), []
+    for p in psutil.disk_partitions(all=False):
+        if p.fstype in SKIP_FSTYPES or p.device in seen:
+            continue
+        try:
+            u  = psutil.disk_usage(p.mountpoint)
+            st = os.statvfs(p.mountpoint)
+        except OSError:
+            continue
+        seen.add(p.device)
+        out.append(Mount(p.device, p.mountpoint, p.fstype, u.total, u.used, u.free, u.percent,
+                         st.f_files, st.f_files - st.f_ffree))
+    out.sort(key=lambda m: m.mountpoint)
+    return out
+
+
+# ──────────────────────────────────────────────
+#  DIRECTORY SIZES
+# ──────────────────────────────────────────────
+
+class Cancelled(Exception):
+    pass
+
+
+class DirUsage(NamedTuple):
+    root:      str
+    total:     int        # bytes on disk under root (st_blocks, like du -x)
+    children:  list       # [(path, bytes)] immediate subdirectories, largest first
+    heaviest:  list       # [(path, bytes)] directories holding the most file bytes themselves
+    dirs:      int
+    rescanned: int        # directories listed again (new mtime or expired)
+    truncated: bool       # stopped at SCAN_MAX_DIRS
+    took:      float
+
+
+class DirScanner:
+    """Parallel `du` for one filesystem, with a per-directory cache.
+
+    Directories are listed level by level on a thread pool.  For each
+    directory the cache keeps (mtime, bytes of its own files, subdirs);
+    when the directory's mtime is unchanged its listing is reused, so a
+    repeat scan costs one stat() per directory and only re-lists the ones
+    where entries were added, removed or renamed.  A file growing in place
+    does not change its directory's mtime, so entries also expire after
+    SCAN_CACHE_TTL seconds, and after each scan expired entries are dropped
+    and the cache is trimmed to SCAN_CACHE_MAX, oldest listings first.
+    """
+
+    def __init__(self, workers: int = SCAN_WORKERS, ttl: float = SCAN_CACHE_TTL,
+                 max_dirs: int = SCAN_MAX_DIRS, max_cache: int = SCAN_CACHE_MAX):
+        self.ttl       = ttl
+        self.max_dirs  = max_dirs
+        self.max_cache = max_cache
+        self._pool    = ThreadPoolExecutor(workers, thread_name_prefix="dirscan")
+        self._cache   = {}           # {path: (mtime_ns, own bytes, subdirs, listed at)}
+
+    def _dir(self, path: str, dev: int, now: float, cancel):
+        """(own bytes, subdirs, relisted) for one directory, or None to skip it."""
+        if cancel is not None and cancel.is_set():
+            return None
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None
+        if st.st_dev != dev:         # another mount: not ours to count
+            return None
+        hit = self._cache.get(path)
+        if hit and hit[0] == st.st_mtime_ns and now - hit[3] < self.ttl:
+            return hit[1], hit[2], False
+
+        own, subs = st.st_blocks * 512, []
+        try:
+            with os.scandir(path) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            subs.append(e.path)
+                        else:
+                            # A hard-linked file is shared between its links,
+                            # so the tree total counts it once.
+                            fs   = e.stat(follow_symlinks=False)
+                            own += fs.st_blocks * 512 // max(1, fs.st_nlink)
+                    except OSError:
+                        pass
+        except OSError:
+            return None
+        subs = tuple(subs)
+        self._cache[path] = (st.st_mtime_ns, own, subs, now)
+        return own, subs, True
+
+    def scan(self, root: str, n: int = 10, cancel: threading.Event = None) -> DirUsage:
+        """Walk `root`; raises Cancelled as soon as `cancel` is set, OSError
+        when `root` itself cannot be listed."""
+        t0, now = time.perf_counter(), time.monotonic()
+        root  = os.path.abspath(root)
+        dev   = os.stat(root).st_dev
+        own, kids, order = {}, {}, []
+        level, relisted, truncated = [root], 0, False
+
+        while level:
+            results = self._pool.map(lambda p: self._dir(p, dev, now, cancel), level)
+            nxt = []
+            for path, res in zip(level, results):
+                if res is None:
+                    continue
+                own[path], kids[path], fresh = res
+                relisted += fresh
+                order.append(path)
+                nxt.extend(res[1])
+            if cancel is not None and cancel.is_set():
+                raise Cancelled(root)
+            if len(order) + len(nxt) > self.max_dirs:
+                nxt, truncated = nxt[:max(0, self.max_dirs - len(order))], True
+            level = nxt
+
+        self._expire(time.monotonic())
+        if root not in kids:                     # unreadable, or gone since the stat
+            raise OSError(f"cannot list {root}")
+
+        total = {}
+        for path in reversed(order):             # children before parents
+            total[path] = own[path] + sum(total.get(c, 0) for c in kids[path])
+
+        prefix = root.rstrip("/") + "/"
+        if not truncated:                        # forget deleted directories
+            for path in [p for p in list(self._cache) if p.startswith(prefix) and p not in total]:
+                self._cache.pop(path, None)
+
+        children = sorted(((c, total[c]) for c in kids[root] if c in total), key=lambda r: r[1], reverse=True)
+        heaviest = heapq.nlargest(n, own.items(), key=lambda r: r[1])
+        return DirUsage(root, total[root], children[:n], heaviest, len(order), relisted,
+                        truncated, time.perf_counter() - t0)
+
+    def _expire(self, now: float):
+        """Drop listings past the TTL (they would be listed again anyway), then
+        the oldest ones beyond max_cache."""
+        cache = self._cache
+        for path in [p for p, e in list(cache.items()) if now - e[3] >= self.ttl]:
+            cache.pop(path, None)
+        over = len(cache) - self.max_cache
+        if over > 0:
+            for path, _ in heapq.nsmallest(over, list(cache.items()), key=lambda r: r[1][3]):
+                cache.pop(path, None)
+
+
+scanner = DirScanner()
@@ -0,0 +1,148 @@
+import os
+import re
+import time
+from typing import NamedTuple
+from config import DISKIO_IGNORE
+
+PROC_DISKSTATS = "/proc/diskstats"
+SYS_BLOCK      = "/sys/class/block"
+SECTOR         = 512          # /proc/diskstats counts 512-byte sectors whatever the device uses
+
+# sda1 → sda, nvme0n1p2 → nvme0n1, mmcblk0p1 → mmcblk0 (used when sysfs has no answer)
+_PART = re.compile(r"^(.*?\d)p\d+$|^(\D+)\d+$")
+
+
+class DiskRate(NamedTuple):
+    name:   str
+    read:   float        # bytes/s
+    write:  float
+    riops:  float        # reads completed per second
+    wiops:  float
+    await_: float        # ms per completed IO, queueing included (None = no IO this tick)
+    util:   float        # % of the tick the device had IO in flight
+    parts:  int          # partitions rolled into this device
+
+
+# ──────────────────────────────────────────────
+#  DEVICE TREE
+# ──────────────────────────────────────────────
+
+class Devices:
+    """Which /proc/diskstats names are partitions, of what, and what to call them.
+
+    Answers come from sysfs once per name and are kept; /proc/diskstats
+    lists the same devices tick after tick.
+    """
+
+    def __init__(self, sys_block: str = SYS_BLOCK, ignore: str = DISKIO_IGNORE):
+        self.sys_block = sys_block
+        self.ignore    = re.compile(ignore) if ignore else None
+        self._parent   = {}      # {name: parent disk name, or None for a whole disk}
+        self._label    = {}      # {name: display name}
+        self._skip     = {}      # {name: matches `ignore`}
+
+    def parent(self, name: str, names) -> str:
+        if name not in self._parent:
+            self._parent[name] = self._find_parent(name, names)
+        return self._parent[name]
+
+    def _find_parent(self, name: str, names) -> str:
+        path = os.path.join(self.sys_block, name)
+        if os.path.exists(path):
+            if not os.path.exists(os.path.join(path, "partition")):
+                return None
+            return os.path.basename(os.path.dirname(os.path.realpath(path)))
+        m = _PART.match(name)
+        base = m and (m.group(1) or m.group(2))
+        return base if base in names else None
+
+    def label(self, name: str) -> str:
+        """dm-3 → its device-mapper name (e.g. vg0-root), anything else as is."""
+        if name not in self._label:
+            try:
+                with open(os.path.join(self.sys_block, name, "dm", "name")) as f:
+                    self._label[name] = f.read().strip() or name
+            except OSError:
+                self._label[name] = name
+        return self._label[name]
+
+    def skip(self, name: str) -> bool:
+        hit = self._skip.get(name)
+        if hit is None:
+            hit = self._skip[name] = bool(self.ignore and self.ignore.match(name))
+        return hit
+
+
+# ──────────────────────────────────────────────
+#  RATES
+# ──────────────────────────────────────────────
+
+def read_diskstats(path: str = PROC_DISKSTATS, skip=None) -> dict:
+    """{name: (reads, sectors read, writes, sectors written, ms reading + writing, ms busy)}.
+
+    Lines whose name `skip(name)` rejects are not converted at all (hosts
+    with snaps list dozens of loop devices).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    out = {}
+    for line in data.splitlines():
+        v = line.split()
+        if len(v) < 14:
+            continue
+        name = v[2].decode()
+        if skip is None or not skip(name):
+            out[name] = (int(v[3]), int(v[5]), int(v[7]), int(v[9]), int(v[6]) + int(v[10]), int(v[12]))
+    return out
+
+
+class DiskSampler:
+    """Per-disk rates from the difference between two /proc/diskstats reads.
+
+    A whole-disk line already includes its partitions' IO, so partitions
+    are folded into their disk (counted, never added); a partition whose
+    disk is not listed stands on its own.  Devices matching DISKIO_IGNORE
+    (loop, ram, …) are left out.
+    """
+
+    def __init__(self, path: str = PROC_DISKSTATS, devices: Devices = None):
+        self.path    = path
+        self.devices = devices or Devices()
+        self._prev   = None    # (monotonic time, {name: counters})
+
+    def sample(self) -> tuple:
+        now  = time.monotonic()
+        try:
+            cur = read_diskstats(self.path, self.devices.skip)
+        except OSError:
+            return ()
+        prev = self._prev
+        self._prev = (now, cur)
+        if prev is None or now <= prev[0]:
+            return ()
+
+        dt, parts, disks = now - prev[0], {}, []
+        for name in cur:
+            parent = self.devices.parent(name, cur)
+            if parent in cur:
+                parts[parent] = parts.get(parent, 0) + 1
+            else:
+                disks.append(name)
+
+        rates = []
+        for name in disks:
+            c, p = cur[name], prev[1].get(name)
+            if p is None:
+                continue
+            reads, rsec, writes, wsec, ms_io, busy = (max(0, a - b) for a, b in zip(c, p))
+            ios = reads + writes
+            rates.append(DiskRate(
+                self.devices.label(name),
+                rsec * SECTOR / dt, wsec * SECTOR / dt,
+                reads / dt, writes / dt,
+                ms_io / ios if ios else None,
+                min(100.0, busy / (dt * 1000) * 100),
+                parts.get(name, 0),
+            ))
+        rates.sort(key=lambda r: (r.util, r.read + r.write), reverse=True)
+        return tuple(rates)
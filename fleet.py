@@ -0,0 +1,296 @@
+import hmac
+import time
+import heapq
+import socket
+import struct
+import asyncio
+import logging
+from typing import Callable, NamedTuple
+from config import FLEET_SERVER, FLEET_TOKEN, FLEET_KEYFRAME, FLEET_STALE, SAMPLE_INTERVAL
+from sampler import sampler, fmt_uptime
+
+VERSION   = 1
+MAX_FRAME = 1024
+MAX_TOKEN = 255                   # HELLO carries the token length in one byte
+
+HELLO, KEY, DELTA = 1, 2, 3
+HEADER = struct.Struct("<BH")     # frame type, payload length
+MASK   = struct.Struct("<H")      # DELTA: bit i set = field i follows
+
+# Wire fields, in order.  Timestamps are not sent: the server stamps a
+# frame when it arrives, so agent clock skew does not matter.
+FIELDS = (
+    ("cpu",        "f"), ("cores",     "H"),
+    ("ram_total",  "Q"), ("ram_used",  "Q"), ("ram_pct",  "f"),
+    ("disk_total", "Q"), ("disk_used", "Q"), ("disk_pct", "f"),
+    ("boot",       "I"), ("tx",        "Q"), ("rx",       "Q"),
+    ("nprocs",     "I"), ("conns",     "I"),
+)
+PACKERS = tuple(struct.Struct("<" + fmt) for _, fmt in FIELDS)
+
+
+class Usage(NamedTuple):
+    total:   int
+    used:    int
+    percent: float
+
+
+class HostStat(NamedTuple):
+    """Latest state of one agent; quacks like sampler.Snapshot for the status view."""
+    host:   str
+    taken:  float         # time.time() the last frame arrived
+    online: bool          # connection still open
+    cpu:    float
+    cores:  int
+    ram:    Usage
+    disk:   Usage
+    boot:   float
+    tx:     int           # bytes sent since boot
+    rx:     int
+    nprocs: int
+    conns:  int
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.taken)
+
+    @property
+    def uptime(self) -> str:
+        return fmt_uptime(self.taken - self.boot)
+
+    @classmethod
+    def from_values(cls, host: str, taken: float, v: tuple) -> "HostStat":
+        return cls(host, taken, True, v[0], v[1], Usage(*v[2:5]), Usage(*v[5:8]), *v[8:])
+
+
+def values_from(snap) -> tuple:
+    """Wire values (FIELDS order) from a sampler.Snapshot."""
+    return (
+        snap.cpu, snap.cores,
+        snap.ram.total, snap.ram.used, snap.ram.percent,
+        snap.disk.total, snap.disk.used, snap.disk.percent,
+        int(snap.boot), snap.net.bytes_sent, snap.net.bytes_recv,
+        snap.nprocs, snap.conns.total,
+    )
+
+
+# ──────────────────────────────────────────────
+#  WIRE FORMAT
+# ──────────────────────────────────────────────
+
+def check_token(tok: bytes):
+    if len(tok) > MAX_TOKEN:
+        raise ValueError(f"FLEET_TOKEN is {len(tok)} bytes; the fleet protocol allows at most {MAX_TOKEN}")
+
+
+def hello_frame(token: str, host: str) -> bytes:
+    tok, name = token.encode(), host.encode()
+    check_token(tok)
+    body = bytes([VERSION, len(tok)]) + tok + name
+    if len(body) > MAX_FRAME:
+        raise ValueError(f"Fleet hello is {len(body)} bytes, over {MAX_FRAME}: shorten FLEET_TOKEN or the host name")
+    return HEADER.pack(HELLO, len(body)) + body
+
+
+class Encoder:
+    """Snapshots → frames: a full KEY frame every `keyframe` frames, else a
+    DELTA carrying only the fields whose packed bytes changed."""
+
+    def __init__(self, keyframe: int = FLEET_KEYFRAME):
+        self.keyframe = keyframe
+        self._prev    = None
+        self._n       = 0
+
+    def encode(self, values: tuple) -> bytes:
+        packed = [p.pack(v) for p, v in zip(PACKERS, values)]
+        if self._prev is None or self._n % self.keyframe == 0:
+            kind, body = KEY, b"".join(packed)
+        else:
+            mask, parts = 0, []
+            for i, (cur, old) in enumerate(zip(packed, self._prev)):
+                if cur != old:
+                    mask |= 1 << i
+                    parts.append(cur)
+            kind, body = DELTA, MASK.pack(mask) + b"".join(parts)
+        self._prev = packed
+        self._n   += 1
+        return HEADER.pack(kind, len(body)) + body
+
+
+class Decoder:
+    """Frames → value tuples; keeps the last values to apply deltas to."""
+
+    def __init__(self):
+        self.values = None
+
+    def apply(self, kind: int, body: bytes) -> tuple:
+        if kind == KEY:
+            values, want = [None] * len(PACKERS), (1 << len(PACKERS)) - 1
+            off = 0
+        elif kind == DELTA:
+            if self.values is None:
+                raise ValueError("delta before keyframe")
+            values, want = list(self.values), MASK.unpack_from(body)[0]
+            off = MASK.size
+        else:
+            raise ValueError(f"unexpected frame type {kind}")
+        for i, p in enumerate(PACKERS):
+            if want >> i & 1:
+                values[i] = p.unpack_from(body, off)[0]
+                off += p.size
+        if off != len(body):
+            raise ValueError("bad frame length")
+        self.values = tuple(values)
+        return self.values
+
+
+async def read_frame(reader) -> tuple:
+    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"frame too large ({length} bytes)")
+    return kind, await reader.readexactly(length)
+
+
+# ──────────────────────────────────────────────
+#  CENTRAL SERVER
+# ──────────────────────────────────────────────
+
+class FleetServer:
+    """Accepts agent connections on the bot's event loop and keeps the latest
+    HostStat per host.  One coroutine per agent, O(1) work per frame."""
+
+    def __init__(self, token: str = FLEET_TOKEN, stale: float = FLEET_STALE, clock: Callable = time.time):
+        self.token    = token.encode()
+        self.stale    = stale
+        self.clock    = clock
+        self.hosts    = {}           # {host: HostStat}
+        self._writers = {}           # {host: writer of the current connection}
+        self._server  = None
+        self.frames   = 0
+        check_token(self.token)
+        self.bytes    = 0
+        self.rejected = 0
+
+    async def start(self, host: str, port: int):
+        self._server = await asyncio.start_server(self._client, host, port)
+        logging.info(f"Fleet server listening on {host}:{self.port}")
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        for w in list(self._writers.values()):
+            w.close()
+        await self._server.wait_closed()
+
+    def _hello(self, kind: int, body: bytes) -> str:
+        if kind != HELLO or len(body) < 2 or body[0] != VERSION:
+            raise ValueError("bad hello")
+        tok  = body[2:2 + body[1]]
+        host = body[2 + body[1]:].decode(errors="replace")
+        if not hmac.compare_digest(tok, self.token) or not host:
+            raise ValueError("bad token")
+        return host
+
+    async def _client(self, reader, writer):
+        peer, host = writer.get_extra_info("peername"), None
+        try:
+            host = self._hello(*await asyncio.wait_for(read_frame(reader), 10))
+            old = self._writers.get(host)
+            if old is not None:
+                old.close()              # agent reconnected; drop the stale socket
+            self._writers[host] = writer
+            logging.info(f"Fleet agent {host} connected from {peer[0]}")
+
+            decoder = Decoder()
+            while True:
+                kind, body = await read_frame(reader)
+                values = decoder.apply(kind, body)
+                self.hosts[host] = HostStat.from_values(host, self.clock(), values)
+                self.frames += 1
+                self.bytes  += HEADER.size + len(body)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        except (ValueError, struct.error) as e:
+            self.rejected += 1
+            logging.warning(f"Fleet agent {host or peer} dropped: {e}")
+        finally:
+            writer.close()
+            if host and self._writers.get(host) is writer:
+                del self._writers[host]
+                if host in self.hosts:
+                    self.hosts[host] = self.hosts[host]._replace(online=False)
+                logging.info(f"Fleet agent {host} disconnected")
+
+    # ── Queries ───────────────────────────────
+    def host(self, name: str):
+        return self.hosts.get(name)
+
+    def up(self, h: HostStat) -> bool:
+        return h.online and self.clock() - h.taken < self.stale
+
+    def live(self) -> list:
+        return [h for h in self.hosts.values() if self.up(h)]
+
+    def top(self, key: Callable, n: int = 10) -> list:
+        return heapq.nlargest(n, self.live(), key=key)
+
+    def over(self, key: Callable, limit: float) -> list:
+        return sorted((h for h in self.live() if key(h) > limit), key=key, reverse=True)
+
+
+fleet = FleetServer()
+
+
+# ──────────────────────────────────────────────
+#  AGENT
+# ──────────────────────────────────────────────
+
+class Agent:
+    """Streams this host's sampler snapshots to the central bot, reconnecting
+    with backoff.  `collect()` returns wire values; injectable for benches."""
+
+    def __init__(self, server: tuple = FLEET_SERVER, token: str = FLEET_TOKEN, host: str = None,
+                 collect: Callable = None, interval: float = SAMPLE_INTERVAL, keyframe: int = FLEET_KEYFRAME):
+        self.server   = server
+        self.token    = token
+        self.host     = host or socket.gethostname()
+        self.collect  = collect or (lambda: values_from(sampler.snapshot()))
+        self.interval = interval
+        self.keyframe = keyframe
+        self.sent     = 0
+        self.bytes    = 0
+        self._hello   = hello_frame(self.token, self.host)   # a bad token fails here, not on every reconnect
+
+    async def run(self):
+        backoff = 1
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_connection(*self.server)
+                writer.write(self._hello)
+                encoder, backoff = Encoder(self.keyframe), 1
+                while True:
+                    frame = encoder.encode(self.collect())
+                    writer.write(frame)
+                    await writer.drain()
+                    self.sent  += 1
+                    self.bytes += len(frame)
+                    await asyncio.sleep(self.interval)
+            except OSError as e:
+                logging.warning(f"Fleet agent: {self.server[0]}:{self.server[1]} unreachable ({e}), "
+                                f"retrying in {backoff}s")
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(backoff)
+            backoff = min(60, backoff * 2)
+
+
+def run_agent():
+    """Headless mode (`python main.py --agent`): sample and stream, no Telegram."""
+    sampler.start()
+    logging.info(f"Fleet agent streaming to {FLEET_SERVER[0]}:{FLEET_SERVER[1]}")
+    asyncio.run(Agent().run())
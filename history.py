@@ -0,0 +1,98 @@
+import math
+import time
+from array import array
+from config import HISTORY_TIERS
+
+METRICS = ("cpu", "ram", "disk", "tx", "rx")   # tx / rx are bytes per second
+
+
+# ──────────────────────────────────────────────
+#  RING BUFFER TIER
+# ──────────────────────────────────────────────
+
+class Tier:
+    """Fixed-size, time-indexed ring of averaged buckets.
+
+    Bucket `b` (= t // step) lives in slot `b % size`; `stamp[slot]` holds `b`
+    so stale slots from a previous lap are recognised.  Inserts and lookups
+    are O(1) no matter how long the bot has been running.
+    """
+
+    def __init__(self, step: float, span: float, nmetrics: int):
+        self.step  = step
+        self.size  = int(span // step)
+        self.stamp = array('q', [-1]) * self.size
+        self.data  = [array('f', [math.nan]) * self.size for _ in range(nmetrics)]
+        self._cur  = -1                          # bucket being accumulated
+        self._n    = 0
+        self._sum  = array('d', [0.0]) * nmetrics
+
+    def add(self, t: float, values):
+        b = int(t // self.step)
+        if b != self._cur:
+            self._cur, self._n = b, 0
+            for i in range(len(self._sum)):
+                self._sum[i] = 0.0
+        self._n += 1
+        slot = b % self.size
+        self.stamp[slot] = b
+        for i, v in enumerate(values):
+            self._sum[i] += v
+            self.data[i][slot] = self._sum[i] / self._n
+
+    def range(self, idx: int, start: float, end: float) -> list:
+        """Bucket means for metric `idx` between `start` and `end` (NaN = no data)."""
+        col, out = self.data[idx], []
+        for b in range(int(start // self.step), int(end // self.step) + 1):
+            slot = b % self.size
+            out.append(col[slot] if self.stamp[slot] == b else math.nan)
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return (self.stamp.itemsize * self.size
+                + sum(c.itemsize * self.size for c in self.data))
+
+
+# ──────────────────────────────────────────────
+#  HISTORY STORE
+# ──────────────────────────────────────────────
+
+class History:
+    """Raw samples plus automatic rollups (see config.HISTORY_TIERS)."""
+
+    def __init__(self, tiers=HISTORY_TIERS, metrics=METRICS):
+        self.metrics = metrics
+        self.tiers   = [Tier(step, span, len(metrics)) for step, span in tiers]
+        self._prev   = None                      # (time, bytes_sent, bytes_recv)
+
+    def add(self, t: float, values):
+        for tier in self.tiers:
+            tier.add(t, values)
+
+    def query(self, metric: str, seconds: float, now: float = None):
+        """Return (step, values) for the last `seconds`, from the finest tier covering it."""
+        idx  = self.metrics.index(metric)
+        now  = time.time() if now is None else now
+        tier = next((t for t in self.tiers if t.step * t.size >= seconds), self.tiers[-1])
+        seconds = min(seconds, tier.step * tier.size)
+        return tier.step, tier.range(idx, now - seconds, now)
+
+    def record(self, snap):
+        """Sampler listener: append one snapshot."""
+        net = snap.net
+        tx = rx = 0.0
+        if self._prev:
+            dt = snap.taken - self._prev[0]
+            if dt > 0:
+                tx = max(0, net.bytes_sent - self._prev[1]) / dt
+                rx = max(0, net.bytes_recv - self._prev[2]) / dt
+        self._prev = (snap.taken, net.bytes_sent, net.bytes_recv)
+        self.add(snap.taken, (snap.cpu, snap.ram.percent, snap.disk.percent, tx, rx))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.nbytes for t in self.tiers)
+
+
+history = History()
@@ -0,0 +1,149 @@
+import time
+import asyncio
+import logging
+from typing import NamedTuple
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+from views import VIEWS, Request, allowed, denied, render, edit, back_keyboard
+from outbox import outbox
+from config import LIVE_INTERVAL, LIVE_DURATION, LIVE_MAX
+
+LIVE_VIEWS = ("status", "system", "containers", "network", "storage", "diskio", "services")
+
+
+class Session(NamedTuple):
+    view:    str
+    args:    tuple        # the view's arguments, e.g. ("mem",) for a live /system mem
+    user_id: int
+    expires: float
+    body:    str          # last text sent, without the age footer
+
+
+def live_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([[InlineKeyboardButton("⏹ Stop live", callback_data="live:stop")]])
+
+
+def _body(text: str) -> str:
+    """Text minus the '🕒 updated Ns ago' footer, which changes on every render."""
+    return text.rsplit("\n🕒", 1)[0]
+
+
+# ──────────────────────────────────────────────
+#  LIVE DASHBOARDS
+# ──────────────────────────────────────────────
+
+class LiveManager:
+    """Messages that are re-rendered in place every LIVE_INTERVAL seconds.
+
+    One tick serves every session: each (view, args) pair is rendered once
+    per tick (through the shared view cache), an edit is skipped when the text
+    did not change, and the edits go out through the outbox, which paces them.
+    Access is checked again on every tick; a session whose user lost it is
+    dropped.  A page that fails to render leaves its messages as they are
+    for that tick.
+    """
+
+    def __init__(self):
+        self.sessions = {}               # {(chat_id, message_id): Session}
+        self.edits    = 0
+        self.skipped  = 0
+
+    def start(self, chat_id: int, message_id: int, view: str, args: tuple, user_id: int, body: str) -> bool:
+        key = (chat_id, message_id)
+        if key not in self.sessions and len(self.sessions) >= LIVE_MAX:
+            return False
+        self.sessions[key] = Session(view, args, user_id, time.monotonic() + LIVE_DURATION, body)
+        return True
+
+    def stop(self, chat_id: int, message_id: int):
+        return self.sessions.pop((chat_id, message_id), None)
+
+    async def tick(self):
+        now      = time.monotonic()
+        rendered = {}
+        pending  = {}                    # {key: outbox future}
+        for key, s in list(self.sessions.items()):
+            v = VIEWS[s.view]
+            if not allowed(v, s.user_id):    # role revoked since the session started
+                self.sessions.pop(key, None)
+                logging.info(f"Live {s.view} for {s.user_id} stopped: no access")
+                pending[key] = outbox.edit_message_text(denied(v, s.user_id), key[0], key[1],
+                                                        parse_mode="Markdown", reply_markup=back_keyboard())
+                continue
+            page = (s.view, s.args)
+            if page not in rendered:
+                try:
+                    rendered[page] = (await render(s.view, Request(s.user_id, s.args, {}, True)))[0]
+                except Exception as e:
+                    logging.error(f"Live render of {s.view} {s.args} failed: {e}")
+                    rendered[page] = None
+            text    = rendered[page]
+            expired = now >= s.expires
+            if text is None:                 # keep the message as it is; try again next tick
+                if expired:
+                    self.sessions.pop(key, None)
+                continue
+            if expired:
+                self.sessions.pop(key, None)
+            elif _body(text) == s.body:
+                self.skipped += 1
+                continue
+            elif key in self.sessions:       # not stopped while we were awaiting
+                self.sessions[key] = s._replace(body=_body(text))
+            else:
+                continue
+
+            markup = back_keyboard() if expired else live_keyboard()
+            if not expired:
+                text = "🔴 _Live_\n" + text
+            pending[key] = outbox.edit_message_text(text, key[0], key[1],
+                                                    parse_mode="Markdown", reply_markup=markup)
+
+        results = await asyncio.gather(*pending.values(), return_exceptions=True)
+        for key, res in zip(pending, results):
+            if not isinstance(res, Exception):
+                self.edits += 1
+            elif not (isinstance(res, BadRequest) and "not modified" in str(res)):
+                logging.error(f"Live edit {key} failed: {res}")
+                self.sessions.pop(key, None)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(LIVE_INTERVAL)
+            if not self.sessions:
+                continue
+            try:
+                await self.tick()
+            except Exception as e:
+                logging.error(f"Live tick failed: {e}")
+
+
+live = LiveManager()
+
+
+async def live_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Callback for `live:<view>[:<arg>…]` (start) and `live:stop`."""
+    query   = update.callback_query
+    user_id = query.from_user.id
+    chat_id = query.message.chat_id
+    msg_id  = query.message.message_id
+    name, *args = query.data.split(":")[1:]
+
+    if name == "stop":
+        await query.answer()
+        s = live.stop(chat_id, msg_id)
+        if s:
+            text, markup = await render(s.view, Request(user_id, s.args, context.user_data, True))
+            edit(query, text, parse_mode="Markdown", reply_markup=markup)
+        return
+
+    if name not in LIVE_VIEWS or not allowed(VIEWS[name], user_id):
+        await query.answer("❌ No access")
+        return
+    text, _ = await render(name, Request(user_id, tuple(args), context.user_data, True))
+    if not live.start(chat_id, msg_id, name, tuple(args), user_id, _body(text)):
+        await query.answer(f"Too many live views ({LIVE_MAX}), try again later.", show_alert=True)
+        return
+    await query.answer(f"Live for {LIVE_DURATION // 60} min")
+    edit(query, "🔴 _Live_\n" + text, parse_mode="Markdown", reply_markup=live_keyboard())
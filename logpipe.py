@@ -0,0 +1,239 @@
+import os
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import logging
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler
+from config import (LOG_FILE, LOG_MAX_BYTES, LOG_ROTATE_EVERY, LOG_BACKUPS,
+                    LOG_BATCH, LOG_FLUSH_INTERVAL, AUDIT_FILE)
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"   # logreader.parse_ts relies on this
+
+
+# ──────────────────────────────────────────────
+#  ROTATING FILE
+# ──────────────────────────────────────────────
+
+class RotatingFile:
+    """Append-only file rotated by size and at fixed UTC periods.
+
+    The active file is renamed to `<path>.<stamp>` (cheap, and readers
+    holding it open keep working), then gzipped off the writer thread.
+    Only the newest `backups` archives are kept.
+    """
+
+    def __init__(self, path: str, max_bytes: int = LOG_MAX_BYTES, every: float = LOG_ROTATE_EVERY,
+                 backups: int = LOG_BACKUPS):
+        self.path      = path
+        self.max_bytes = max_bytes
+        self.every     = every
+        self.backups   = backups
+        self._f        = None
+
+    def _period(self, t: float) -> int:
+        return int(t // self.every) if self.every else 0
+
+    def _open(self):
+        self._f    = open(self.path, "ab")
+        st         = os.fstat(self._f.fileno())
+        self.size  = st.st_size
+        self.since = self._period(st.st_mtime if st.st_size else time.time())
+
+    def write(self, data: bytes):
+        if self._f is None:
+            self._open()
+        if self.size and (self.size >= self.max_bytes or self._period(time.time()) != self.since):
+            self.rotate()
+        self._f.write(data)
+        self._f.flush()
+        self.size += len(data)
+
+    def rotate(self):
+        self._f.close()
+        old = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(self.path, old)
+        self._open()
+        threading.Thread(target=self._compress, args=(old,), name="log-gzip", daemon=True).start()
+
+    def _compress(self, old: str):
+        try:
+            with open(old, "rb") as src, gzip.open(old + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            os.replace(old + ".gz.tmp", old + ".gz")
+            os.remove(old)
+            for stale in sorted(glob.glob(glob.escape(self.path) + ".*.gz"))[:-self.backups or None]:
+                os.remove(stale)
+        except OSError as e:
+            logging.error(f"Compressing {old} failed: {e}")
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+# ──────────────────────────────────────────────
+#  BATCHING WRITER
+# ──────────────────────────────────────────────
+
+class BatchWriter(threading.Thread):
+    """Drains a queue on its own thread: one write() per batch of items.
+
+    Producers only do `queue.put()`; the writer waits for the first item,
+    gathers more for up to `interval` seconds (or `batch` items), formats
+    them all and hands the bytes to the file in one call.
+    """
+
+    def __init__(self, name: str, out: RotatingFile, fmt, batch: int = LOG_BATCH,
+                 interval: float = LOG_FLUSH_INTERVAL, urgent=lambda item: False):
+        super().__init__(name=name, daemon=True)
+        self.queue    = queue.SimpleQueue()
+        self.out      = out
+        self.fmt      = fmt              # item -> str (one line, no newline)
+        self.batch    = batch
+        self.interval = interval
+        self.urgent   = urgent           # item -> True to write without waiting
+        self.written  = 0
+        self.batches  = 0
+        self._done    = object()
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def run(self):
+        done = False
+        while not done:
+            item = self.queue.get()
+            items, deadline = [], time.monotonic() + self.interval
+            while True:
+                if item is self._done:
+                    done = True
+                    break
+                items.append(item)
+                if len(items) >= self.batch or self.urgent(item):
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if items:
+                self._write(items)
+        self.out.close()
+
+    def _write(self, items: list):
+        lines = []
+        for item in items:
+            try:
+                lines.append(self.fmt(item))
+            except Exception as e:          # one bad record must not lose the batch
+                lines.append(f"<unformattable {type(item).__name__}: {e}>")
+        try:
+            self.out.write(("\n".join(lines) + "\n").encode(errors="replace"))
+        except OSError as e:
+            print(f"{self.name}: write failed, {len(items)} records lost: {e}", flush=True)
+            return
+        self.written += len(items)
+        self.batches += 1
+
+    def stop(self, timeout: float = 5):
+        """Write what is queued and close the file."""
+        if self.is_alive():
+            self.queue.put(self._done)
+            self.join(timeout)
+
+
+# ──────────────────────────────────────────────
+#  LOGGING
+# ──────────────────────────────────────────────
+
+class LogWriter(BatchWriter):
+    """bot.log writer; also feeds the console handler from its own thread."""
+
+    def __init__(self, path: str = LOG_FILE, console: logging.Handler = None):
+        super().__init__("log-writer", RotatingFile(path), self._format,
+                         urgent=lambda r: r.levelno >= logging.ERROR)
+        self.console    = console
+        self._formatter = logging.Formatter(LOG_FORMAT)
+
+    def _format(self, record: logging.LogRecord) -> str:
+        if self.console is not None and record.levelno >= self.console.level:
+            self.console.handle(record)
+        return self._formatter.format(record)
+
+
+class Enqueue(QueueHandler):
+    """QueueHandler that hands the record over as is.
+
+    The stdlib version formats and copies every record on the caller's
+    thread; here that all happens on the writer.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(path: str = LOG_FILE) -> LogWriter:
+    """Root logger → QueueHandler → LogWriter thread.
+
+    A log call on the event loop costs one record creation and a queue
+    put; formatting, file writes and rotation all happen on the writer.
+    """
+    console = logging.StreamHandler()
+    console.setLevel(logging.ERROR)
+    console.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+
+    writer = LogWriter(path, console)
+    writer.start()
+    atexit.register(writer.stop)
+
+    logging.basicConfig(level=logging.INFO, handlers=[Enqueue(writer.queue)])
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("telegram").setLevel(logging.WARNING)
+    return writer
+
+
+# ──────────────────────────────────────────────
+#  AUDIT TRAIL
+# ──────────────────────────────────────────────
+
+class Audit:
+    """One JSON line per command / button press, written in batches.
+
+    record() builds a tuple and enqueues it; JSON encoding happens on the
+    writer thread.  Lines look like
+    {"ts": 1700000000.123, "user": 42, "view": "/status", "args": [], "ms": 3.1, "outcome": "ok"}
+    """
+
+    def __init__(self, path: str = AUDIT_FILE):
+        self.path    = path
+        self._writer = None
+
+    def start(self):
+        if self.path and self._writer is None:
+            self._writer = BatchWriter("audit-writer", RotatingFile(self.path), self._format)
+            self._writer.start()
+            atexit.register(self._writer.stop)
+
+    def record(self, user_id: int, view: str, args, seconds: float, outcome: str):
+        if self._writer is not None:
+            self._writer.put((time.time(), user_id, view, args, seconds, outcome))
+
+    @staticmethod
+    def _format(item) -> str:
+        ts, user_id, view, args, seconds, outcome = item
+        return json.dumps({"ts": round(ts, 3), "user": user_id, "view": view, "args": list(args or ()),
+                           "ms": round(seconds * 1e3, 2), "outcome": outcome}, ensure_ascii=False)
+
+    def stop(self):
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+
+
+audit = Audit()
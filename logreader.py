@@ -0,0 +1,197 @@
+import os
+import re
+import bisect
+import threading
+from array import array
+from datetime import datetime
+from pages import size, clip
+
+BLOCK      = 64 * 1024           # bytes read per backwards seek
+INDEX_STEP = 1024 * 1024         # one index entry per MiB of log
+SCAN_LIMIT = 64 * 1024 * 1024    # max bytes a single grep page may scan
+LINE_MAX   = 512                 # longer lines are shown cut (and counted as this long)
+TS_FORMAT  = "%Y-%m-%d %H:%M:%S"  # matches main.py's "%(asctime)s" (without ,ms)
+
+
+def parse_ts(line: bytes):
+    """Timestamp of a `bot.log` line, or None for continuation lines."""
+    try:
+        return datetime.strptime(line[:19].decode(), TS_FORMAT).timestamp()
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# ──────────────────────────────────────────────
+#  REVERSE READER
+# ──────────────────────────────────────────────
+
+def _lines_backward(f, end: int):
+    """Yield (offset, line) from byte `end` back to the start of the file."""
+    pos, rest = end, b""
+    while pos > 0:
+        step = min(BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        chunk = f.read(step) + rest
+        parts = chunk.split(b"\n")
+        rest  = parts[0]                 # may continue in the previous block
+        stop  = pos + len(chunk)
+        for line in reversed(parts[1:]):
+            start = stop - len(line)
+            if line:
+                yield start, line
+            stop = start - 1
+    if rest:
+        yield 0, rest
+
+
+def _cost(line: bytes) -> int:
+    """The line's length on screen as rendered (clipped to LINE_MAX UTF-16 units), plus the newline."""
+    return size(clip(line.decode(errors="replace"), LINE_MAX)) + 1
+
+
+def tail(path: str, n: int = 20, before: int = None, budget: int = None):
+    """Last `n` lines ending before byte offset `before` (default: EOF).
+
+    Returns (lines, cursor); pass `cursor` back as `before` for the previous
+    page.  cursor == 0 means the start of the file was reached.  With
+    `budget`, stops early once the lines would not fit in that many
+    characters (at least one line is always returned).
+    """
+    with open(path, "rb") as f:
+        end = os.fstat(f.fileno()).st_size if before is None else before
+        out, cursor, room = [], 0, budget
+        for off, line in _lines_backward(f, end):
+            if budget is not None:
+                room -= _cost(line)
+                if room < 0 and out:
+                    break
+            out.append(line)
+            cursor = off
+            if len(out) == n:
+                break
+        else:
+            cursor = 0
+    return [l.decode(errors="replace") for l in reversed(out)], cursor
+
+
+def grep(path: str, pattern: str, n: int = 20, before: int = None, budget: int = None):
+    """Last `n` lines matching `pattern` (case-insensitive regex) before `before`.
+
+    Scans at most SCAN_LIMIT bytes per call, so a page with few matches
+    still returns promptly with a cursor to continue from.
+    """
+    rx = re.compile(pattern.encode(), re.IGNORECASE)
+    with open(path, "rb") as f:
+        end = os.fstat(f.fileno()).st_size if before is None else before
+        out, cursor, room = [], 0, budget
+        for off, line in _lines_backward(f, end):
+            if rx.search(line):
+                if budget is not None:
+                    room -= _cost(line)
+                    if room < 0 and out:
+                        break
+                out.append(line)
+            cursor = off
+            if len(out) == n:
+                break
+            if end - off > SCAN_LIMIT:
+                break
+        else:
+            cursor = 0
+    return [l.decode(errors="replace") for l in reversed(out)], cursor
+
+
+def forward(path: str, start: int, n: int = 20, budget: int = None):
+    """`n` lines starting at byte offset `start`; cursor is the offset after them (None at EOF)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        out, room = [], budget
+        for _ in range(n):
+            off, line = f.tell(), f.readline()
+            if not line:
+                return [l.decode(errors="replace") for l in out], None
+            if budget is not None:
+                room -= _cost(line.rstrip(b"\n"))
+                if room < 0 and out:
+                    f.seek(off)
+                    break
+            out.append(line.rstrip(b"\n"))
+        cursor = f.tell()
+        at_eof = cursor >= os.fstat(f.fileno()).st_size
+    return [l.decode(errors="replace") for l in out], None if at_eof else cursor
+
+
+# ──────────────────────────────────────────────
+#  SPARSE TIMESTAMP INDEX
+# ──────────────────────────────────────────────
+
+class LogIndex:
+    """Timestamp → byte offset, one entry every INDEX_STEP bytes.
+
+    `update()` only seeks to the new step boundaries since the last call, so
+    keeping the index current costs a couple of small reads per MiB of log.
+    It resets itself when the file is rotated or truncated.  `/log since`
+    runs in worker threads, so updates and lookups hold the index's lock.
+    """
+
+    def __init__(self, path: str, step: int = INDEX_STEP):
+        self.path  = path
+        self.step  = step
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, inode):
+        self.inode   = inode
+        self.times   = array('d')
+        self.offsets = array('q')
+        self.mark    = 0                 # next boundary to index
+
+    def update(self):
+        st = os.stat(self.path)
+        if st.st_ino != self.inode or st.st_size < self.mark - self.step:
+            self._reset(st.st_ino)
+        with open(self.path, "rb") as f:
+            while self.mark < st.st_size:
+                f.seek(self.mark)
+                if self.mark:
+                    f.readline()         # skip the partial line
+                for _ in range(32):      # skip traceback / continuation lines
+                    off, line = f.tell(), f.readline()
+                    if not line:
+                        return
+                    ts = parse_ts(line)
+                    if ts is not None:
+                        if not self.times or ts >= self.times[-1]:
+                            self.times.append(ts)
+                            self.offsets.append(off)
+                        break
+                self.mark += self.step
+
+    def seek_time(self, ts: float) -> int:
+        """Offset of the first line logged at or after `ts`."""
+        with self._lock:
+            self.update()
+            i     = bisect.bisect_right(self.times, ts) - 1
+            start = self.offsets[i] if i >= 0 else 0
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            while True:
+                off, line = f.tell(), f.readline()
+                if not line:
+                    return off
+                lt = parse_ts(line)
+                if lt is not None and lt >= ts:
+                    return off
+
+
+_indexes      = {}
+_indexes_lock = threading.Lock()
+
+def since(path: str, ts: float, n: int = 20, budget: int = None):
+    """First `n` lines logged at or after `ts`; cursor continues forward."""
+    with _indexes_lock:
+        idx = _indexes.get(path)
+        if idx is None:
+            idx = _indexes[path] = LogIndex(path)
+    return forward(path, idx.seek_time(ts), n, budget)
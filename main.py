@@ -1,56 +1,117 @@
-import logging
-import threading
+import sys
+import secrets
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, CallbackQueryHandler, filters
-from config import BOT_TOKEN
-from commands import (
-    start, ping, status, system, network, storage, services,
-    reboot, shutdown, get_logs, list_users, save_contact, button_handler
-)
-from terminal import terminal_listener
+from config import (BOT_TOKEN, BOT_API_URL, FLEET_LISTEN, METRICS_LISTEN, CONTROL_SOCKET, UPDATE_MODE, CONCURRENT_UPDATES,
+                    WEBHOOK_LISTEN, WEBHOOK_PATH, WEBHOOK_URL, WEBHOOK_SECRET, WEBHOOK_CERT, WEBHOOK_KEY,
+                    WEBHOOK_MAX_CONNECTIONS)
+from commands import start, save_contact, get_command, receive_document, broadcast_command
+from views import VIEWS, command_handler, button_handler
+from control import serve_control
+from sampler import sampler
+from history import history
+from userstore import store
+from auth import seed_roles
+from alerts import run_alerts
+from live import live, live_button
+from outbox import outbox
+from singleflight import flights
+from broadcast import broadcaster
+from fleet import fleet, run_agent
+from metrics import instrument, watch_loop, serve_prometheus
+from logpipe import setup_logging, audit
 
-# ─── Logging ──────────────────────────────────────────────────────────
-file_handler = logging.FileHandler("bot.log")
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+setup_logging()
 
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.ERROR)
-console_handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
 
-logging.basicConfig(level=logging.INFO, handlers=[file_handler, console_handler])
-logging.getLogger("httpx").setLevel(logging.WARNING)
-logging.getLogger("telegram").setLevel(logging.WARNING)
+def gauges() -> dict:
+    """Point-in-time values exported next to the histograms."""
+    g = {f"outbox_{k}": v for k, v in outbox.stats().items()}
+    g.update({f"flight_{k}": v for k, v in flights.stats().items()})
+    g["live_sessions"]  = len(live.sessions)
+    g["fleet_hosts_up"] = len(fleet.live())
+    return g
+
+
+async def on_startup(app):
+    # ── Background Tasks ──────────────────────────────────────────────
+    app.create_task(outbox.run(app.bot))
+    app.create_task(run_alerts())
+    app.create_task(live.run())
+    app.create_task(watch_loop())
+    if METRICS_LISTEN:
+        await serve_prometheus(*METRICS_LISTEN, gauges)
+    if FLEET_LISTEN:
+        await fleet.start(*FLEET_LISTEN)
+    if CONTROL_SOCKET:
+        await serve_control(CONTROL_SOCKET)
+    broadcaster.resume()
 
 
 def main():
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    store.load(seeds=seed_roles())
+    audit.start()
+    builder = (ApplicationBuilder().token(BOT_TOKEN).post_init(on_startup)
+               .concurrent_updates(CONCURRENT_UPDATES))
+    if BOT_API_URL:
+        builder = builder.base_url(BOT_API_URL)
+    app = builder.build()
 
     # ── Command Handlers ──────────────────────────────────────────────
-    app.add_handler(CommandHandler("start",    start))
-    app.add_handler(CommandHandler("ping",     ping))
-    app.add_handler(CommandHandler("status",   status))
-    app.add_handler(CommandHandler("system",   system))
-    app.add_handler(CommandHandler("network",  network))
-    app.add_handler(CommandHandler("storage",  storage))
-    app.add_handler(CommandHandler("services", services))
-
-    # Admin commands
-    app.add_handler(CommandHandler("reboot",   reboot))
-    app.add_handler(CommandHandler("shutdown", shutdown))
-    app.add_handler(CommandHandler("log",      get_logs))
-    app.add_handler(CommandHandler("list",     list_users))
+    # Every view in the registry (commands.py) is also a /command;
+    # permission checks come from the view's declared level.  Every
+    # callback is wrapped by metrics.instrument (latency, errors, hits,
+    # audit line).
+    app.add_handler(CommandHandler("start",    instrument(start, "/start")))
+    app.add_handler(CommandHandler("get",      instrument(get_command, "/get")))
+    app.add_handler(CommandHandler("broadcast", instrument(broadcast_command, "/broadcast")))
+    for name, v in VIEWS.items():
+        if v.command:
+            app.add_handler(CommandHandler(name, instrument(command_handler(name), f"/{name}")))
 
     # ── Inline Button Handler ─────────────────────────────────────────
-    app.add_handler(CallbackQueryHandler(button_handler))
+    app.add_handler(CallbackQueryHandler(instrument(live_button), pattern="^live:"))
+    app.add_handler(CallbackQueryHandler(instrument(button_handler)))
 
     # ── Text → Register name ──────────────────────────────────────────
-    app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), save_contact))
+    app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), instrument(save_contact, "register")))
+
+    # ── Document → Upload (admins) ────────────────────────────────────
+    app.add_handler(MessageHandler(filters.Document.ALL, instrument(receive_document, "upload")))
+
+    # ── Background Sampler ────────────────────────────────────────────
+    sampler.subscribe(history.record)
+    sampler.start()
+
+    # ── Updates ───────────────────────────────────────────────────────
+    if UPDATE_MODE == "webhook":
+        serve_webhook(app)
+    else:
+        app.run_polling()
+
 
-    # ── Terminal Panel ────────────────────────────────────────────────
-    threading.Thread(target=terminal_listener, daemon=True).start()
+def serve_webhook(app):
+    """Register WEBHOOK_URL with Telegram and serve it (blocks).
 
-    app.run_polling()
+    Requests without the secret token header are rejected by PTB's
+    server before any handler runs.
+    """
+    if not WEBHOOK_URL:
+        sys.exit('UPDATE_MODE = "webhook" needs WEBHOOK_URL (the public https:// address)')
+    host, port = WEBHOOK_LISTEN
+    app.run_webhook(
+        listen=host,
+        port=port,
+        url_path=WEBHOOK_PATH,
+        webhook_url=WEBHOOK_URL,
+        secret_token=WEBHOOK_SECRET or secrets.token_urlsafe(32),
+        cert=WEBHOOK_CERT,
+        key=WEBHOOK_KEY,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+    )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--agent" in sys.argv:
+        run_agent()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,238 @@
+import time
+import asyncio
+import inspect
+import logging
+import threading
+from bisect import bisect_left
+from collections import Counter
+from functools import wraps
+from logpipe import audit
+
+# Upper bounds (seconds) shared by every histogram, Prometheus style.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FAMILIES = {
+    "handler":    "Handler latency by command / button",
+    "loop_lag":   "Event-loop wake-up delay",
+    "psutil":     "Time in psutil and /proc reads",
+    "subprocess": "Time in child processes",
+    "io":         "Time in blocking file reads (worker threads)",
+}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and two adds.
+
+    Each histogram is fed from a single thread (the event loop or the
+    sampler thread), so no lock is taken.
+    """
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)      # last slot = +Inf
+        self.sum    = 0.0
+        self.count  = 0
+        self.max    = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum   += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class Timer:
+    """`with metrics.timer("psutil", "collect"): …`"""
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+
+
+# ──────────────────────────────────────────────
+#  REGISTRY
+# ──────────────────────────────────────────────
+
+class Metrics:
+    def __init__(self):
+        self.hists   = {}            # {(family, label): Histogram}; threads add to it under _lock
+        self._lock   = threading.Lock()
+        self.errors  = Counter()     # {handler label: count}
+        self.started = time.time()
+        self._minute = 0
+        self._users  = Counter()     # requests per user, current minute
+        self.users   = Counter()     # … and the previous full minute
+
+    def hist(self, family: str, label: str) -> Histogram:
+        h = self.hists.get((family, label))
+        if h is None:
+            with self._lock:
+                h = self.hists.setdefault((family, label), Histogram())
+        return h
+
+    def _rows(self, family: str) -> list:
+        """[(label, Histogram), …] of one family, from a copy taken under the lock."""
+        with self._lock:
+            items = list(self.hists.items())
+        return [(label, h) for (f, label), h in items if f == family]
+
+    def timer(self, family: str, label: str) -> Timer:
+        return Timer(self.hist(family, label))
+
+    def hit(self, user_id: int):
+        minute = int(time.monotonic() // 60)
+        if minute != self._minute:
+            self.users   = self._users if minute == self._minute + 1 else Counter()
+            self._users  = Counter()
+            self._minute = minute
+        self._users[user_id] += 1
+
+    def family(self, family: str) -> list:
+        """[(label, Histogram), …] of one family, busiest first."""
+        rows = [(label, h) for label, h in self._rows(family) if h.count]
+        return sorted(rows, key=lambda r: r[1].count, reverse=True)
+
+    def timed(self, family: str, label: str):
+        """Decorator recording the call time of a sync or async function."""
+        def deco(fn):
+            h = self.hist(family, label)
+            if inspect.iscoroutinefunction(fn):
+                @wraps(fn)
+                async def wrapper(*args, **kwargs):
+                    t0 = time.perf_counter()
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        h.observe(time.perf_counter() - t0)
+            else:
+                @wraps(fn)
+                def wrapper(*args, **kwargs):
+                    t0 = time.perf_counter()
+                    try:
+                        return fn(*args, **kwargs)
+                    finally:
+                        h.observe(time.perf_counter() - t0)
+            return wrapper
+        return deco
+
+    # ── Prometheus text format ────────────────
+    def prometheus(self, gauges: dict = None) -> str:
+        out = []
+        for family, help_ in FAMILIES.items():
+            rows = self._rows(family)
+            if not rows:
+                continue
+            name = f"bot_{family}_seconds"
+            key  = "handler" if family == "handler" else "call"
+            out += [f"# HELP {name} {help_}", f"# TYPE {name} histogram"]
+            for label, h in rows:
+                lbl, cum = label.replace('"', '\\"'), 0
+                for bound, n in zip(BUCKETS + ("+Inf",), h.counts):
+                    cum += n
+                    out.append(f'{name}_bucket{{{key}="{lbl}",le="{bound}"}} {cum}')
+                out.append(f'{name}_sum{{{key}="{lbl}"}} {h.sum:.6f}')
+                out.append(f'{name}_count{{{key}="{lbl}"}} {h.count}')
+        out += ["# HELP bot_handler_errors_total Handler exceptions", "# TYPE bot_handler_errors_total counter"]
+        for label, n in self.errors.items():
+            out.append(f'bot_handler_errors_total{{handler="{label}"}} {n}')
+        for name, value in (gauges or {}).items():
+            out += [f"# TYPE bot_{name} gauge", f"bot_{name} {value}"]
+        return "\n".join(out) + "\n"
+
+
+metrics = Metrics()
+
+
+# ──────────────────────────────────────────────
+#  HANDLER MIDDLEWARE
+# ──────────────────────────────────────────────
+
+def instrument(handler, label=None):
+    """Wrap a PTB callback: latency histogram, error count, per-user hits
+    and one audit line.
+
+    `label` names the histogram; None = the view name of a button press.
+    A handler may return an outcome string ("denied", "error", …) for the
+    audit trail; anything else counts as "ok".
+    """
+    fixed = metrics.hist("handler", label) if label else None
+
+    @wraps(handler)
+    async def wrapper(update, context):
+        t0, outcome = time.perf_counter(), "error"
+        if fixed is None:
+            name, *args = update.callback_query.data.split(":")
+            name = f"btn:{name}"
+        else:
+            args = getattr(context, "args", None)
+        try:
+            result  = await handler(update, context)
+            outcome = result if isinstance(result, str) else "ok"
+            return result
+        except Exception:
+            metrics.errors[label or name] += 1
+            raise
+        finally:
+            dt = time.perf_counter() - t0
+            (fixed or metrics.hist("handler", name)).observe(dt)
+            if update.effective_user:
+                metrics.hit(update.effective_user.id)
+                audit.record(update.effective_user.id, label or name, args, dt, outcome)
+    return wrapper
+
+
+# ──────────────────────────────────────────────
+#  EVENT-LOOP LAG
+# ──────────────────────────────────────────────
+
+async def watch_loop(period: float = 0.25):
+    """Sleep `period` forever; any extra delay is time the loop was blocked."""
+    h = metrics.hist("loop_lag", "loop")
+    while True:
+        t0 = time.perf_counter()
+        await asyncio.sleep(period)
+        h.observe(max(0.0, time.perf_counter() - t0 - period))
+
+
+# ──────────────────────────────────────────────
+#  PROMETHEUS ENDPOINT
+# ──────────────────────────────────────────────
+
+async def serve_prometheus(host: str, port: int, gauges=lambda: {}):
+    """Plain-text /metrics on host:port (keep it on localhost)."""
+    async def client(reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            if request.split(b" ", 2)[1].split(b"?")[0] == b"/metrics":
+                body, status = metrics.prometheus(gauges()).encode(), "200 OK"
+            else:
+                body, status = b"not found\n", "404 Not Found"
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    await asyncio.start_server(client, host, port)
+    logging.info(f"Prometheus metrics on http://{host}:{port}/metrics")
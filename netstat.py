@@ -0,0 +1,110 @@
+import re
+import time
+from collections import Counter
+from typing import NamedTuple
+import psutil
+
+PROC_NET = "/proc/net"
+CHUNK    = 1024 * 1024
+
+TCP_STATES = {
+    b"01": "ESTABLISHED", b"02": "SYN_SENT",   b"03": "SYN_RECV",
+    b"04": "FIN_WAIT1",   b"05": "FIN_WAIT2",  b"06": "TIME_WAIT",
+    b"07": "CLOSE",       b"08": "CLOSE_WAIT", b"09": "LAST_ACK",
+    b"0A": "LISTEN",      b"0B": "CLOSING",
+}
+
+# "  sl  local_address rem_address   st …" → capture the st column
+_ROW = re.compile(rb"^\s*\d+: \S+ \S+ ([0-9A-F]{2}) ", re.M)
+
+
+class NicRate(NamedTuple):
+    name:    str
+    rx:      float       # bytes/s
+    tx:      float
+    rx_pkts: float       # packets/s
+    tx_pkts: float
+    errors:  float       # errin + errout per second
+    drops:   float       # dropin + dropout per second
+
+
+class ConnSummary(NamedTuple):
+    tcp:   dict          # {state name: count}
+    udp:   int
+    taken: float
+
+    @property
+    def total(self) -> int:
+        return sum(self.tcp.values()) + self.udp
+
+
+# ──────────────────────────────────────────────
+#  PER-INTERFACE RATES
+# ──────────────────────────────────────────────
+
+class NicSampler:
+    """Rates from the difference between two psutil.net_io_counters(pernic=True) calls."""
+
+    def __init__(self):
+        self._prev = None    # (monotonic time, {nic: counters})
+
+    def sample(self) -> tuple:
+        now  = time.monotonic()
+        cur  = psutil.net_io_counters(pernic=True)
+        prev = self._prev
+        self._prev = (now, cur)
+        if prev is None or now <= prev[0]:
+            return ()
+
+        dt, rates = now - prev[0], []
+        for nic, c in cur.items():
+            p = prev[1].get(nic)
+            if p is None:
+                continue
+            d = lambda a, b: max(0, a - b) / dt
+            rates.append(NicRate(
+                nic,
+                d(c.bytes_recv, p.bytes_recv), d(c.bytes_sent, p.bytes_sent),
+                d(c.packets_recv, p.packets_recv), d(c.packets_sent, p.packets_sent),
+                d(c.errin + c.errout, p.errin + p.errout),
+                d(c.dropin + c.dropout, p.dropin + p.dropout),
+            ))
+        rates.sort(key=lambda r: r.rx + r.tx, reverse=True)
+        return tuple(rates)
+
+
+# ──────────────────────────────────────────────
+#  CONNECTION SUMMARY
+# ──────────────────────────────────────────────
+
+def _count_states(path: str, counts: Counter):
+    """Stream a /proc/net/{tcp,udp}[6] table in chunks, counting rows per state.
+
+    No per-socket objects are built; memory use is bounded by CHUNK.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return
+    with f:
+        f.readline()                     # header
+        rest = b""
+        while True:
+            chunk = f.read(CHUNK)
+            if not chunk:
+                break
+            chunk = rest + chunk
+            cut   = chunk.rfind(b"\n") + 1
+            rest  = chunk[cut:]
+            counts.update(_ROW.findall(chunk, 0, cut))
+
+
+def conn_summary(root: str = PROC_NET) -> ConnSummary:
+    tcp = Counter()
+    _count_states(f"{root}/tcp",  tcp)
+    _count_states(f"{root}/tcp6", tcp)
+    udp = Counter()
+    _count_states(f"{root}/udp",  udp)
+    _count_states(f"{root}/udp6", udp)
+    states = {TCP_STATES.get(st, st.decode()): n for st, n in tcp.most_common()}
+    return ConnSummary(states, sum(udp.values()), time.time())
@@ -0,0 +1,280 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Callable
+from telegram.error import RetryAfter, BadRequest, Forbidden, NetworkError
+from config import OUTBOX_RATE, OUTBOX_CHAT_RATE, OUTBOX_MAX_DEPTH, OUTBOX_RETRIES, OUTBOX_CONCURRENCY
+
+BACKOFF_MAX = 30          # seconds, cap for network-error backoff
+SWEEP       = 10          # seconds between drops of refilled per-chat buckets
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`."""
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate   = rate
+        self.burst  = burst
+        self.tokens = burst
+        self.stamp  = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 = now)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp  = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        return self.tokens + (now - self.stamp) * self.rate >= self.burst
+
+
+class Job:
+    __slots__ = ("chat_id", "method", "kwargs", "key", "futures", "attempts")
+
+    def __init__(self, chat_id: int, method: str, kwargs: dict, key, future):
+        self.chat_id  = chat_id
+        self.method   = method
+        self.kwargs   = kwargs
+        self.key      = key               # (chat_id, message_id) for edits, else None
+        self.futures  = [future]          # every caller this job answers
+        self.attempts = 0
+
+
+def _retrieve(fut: asyncio.Future):
+    """Done-callback: fire-and-forget callers never read failures; the outbox logs them."""
+    if not fut.cancelled():
+        fut.exception()
+
+
+# ──────────────────────────────────────────────
+#  OUTBOUND QUEUE
+# ──────────────────────────────────────────────
+
+class Outbox:
+    """Every outgoing Bot API call goes through here.
+
+    Sends are queued per chat and released under a global token bucket and
+    a per-chat one, round-robin across chats, one request in flight per
+    chat so order is kept.  A queued edit of a message that is edited again
+    before it went out is replaced by the newer one.  RetryAfter pauses the
+    chat for the time Telegram asks; network errors back off exponentially
+    up to OUTBOX_RETRIES times.
+
+    `send_message` / `edit_message_text` return a future with the Bot API
+    result; awaiting it is optional.
+    """
+
+    def __init__(self, bot=None, rate: tuple = OUTBOX_RATE, chat_rate: tuple = OUTBOX_CHAT_RATE,
+                 max_depth: int = OUTBOX_MAX_DEPTH, retries: int = OUTBOX_RETRIES,
+                 concurrency: int = OUTBOX_CONCURRENCY, clock: Callable = time.monotonic):
+        self.bot         = bot
+        self.chat_rate   = chat_rate
+        self.max_depth   = max_depth
+        self.retries     = retries
+        self.concurrency = concurrency
+        self.clock       = clock
+        self._global     = TokenBucket(*rate, clock())
+        self._buckets    = {}             # {chat_id: TokenBucket}
+        self._chats      = {}             # {chat_id: deque of Job}
+        self._ready      = deque()        # chat ids with queued jobs, round-robin
+        self._edits      = {}             # {(chat_id, message_id): queued Job}
+        self._blocked    = {}             # {chat_id: time before which nothing is sent}
+        self._busy       = set()          # chats with a request in flight
+        self._tasks      = set()
+        self._wake       = asyncio.Event()
+        self._swept      = clock()
+        self.depth       = 0
+        self.sent        = 0
+        self.coalesced   = 0
+        self.retried     = 0
+        self.dropped     = 0
+        self.failed      = 0
+
+    # ── Submitting ────────────────────────────
+    def send_message(self, chat_id: int, text: str, **kwargs) -> asyncio.Future:
+        return self._submit(chat_id, "send_message", dict(chat_id=chat_id, text=text, **kwargs))
+
+    def edit_message_text(self, text: str, chat_id: int, message_id: int, **kwargs) -> asyncio.Future:
+        return self._submit(chat_id, "edit_message_text",
+                            dict(text=text, chat_id=chat_id, message_id=message_id, **kwargs),
+                            key=(chat_id, message_id))
+
+    def call(self, chat_id: int, method: str, **kwargs) -> asyncio.Future:
+        """Any other Bot API method taking `chat_id`, rate limited against it."""
+        return self._submit(chat_id, method, dict(chat_id=chat_id, **kwargs))
+
+    def _submit(self, chat_id: int, method: str, kwargs: dict, key=None) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(_retrieve)
+
+        queued = self._edits.get(key) if key else None
+        if queued is not None:
+            queued.kwargs = kwargs
+            queued.futures.append(fut)
+            self.coalesced += 1
+            return fut
+        if self.depth >= self.max_depth:
+            self.dropped += 1
+            logging.warning(f"Outbox full ({self.depth}), dropped {method} to {chat_id}")
+            fut.set_exception(asyncio.QueueFull("outbox full"))
+            return fut
+
+        job = Job(chat_id, method, kwargs, key, fut)
+        self._enqueue(job)
+        self.depth += 1
+        return fut
+
+    def _enqueue(self, job: Job, front: bool = False):
+        q = self._chats.get(job.chat_id)
+        if q is None:
+            q = self._chats[job.chat_id] = deque()
+            self._ready.append(job.chat_id)
+        q.appendleft(job) if front else q.append(job)
+        if job.key:
+            self._edits[job.key] = job
+        self._wake.set()
+
+    # ── Scheduling ────────────────────────────
+    def _bucket(self, chat_id: int, now: float) -> TokenBucket:
+        b = self._buckets.get(chat_id)
+        if b is None:
+            b = self._buckets[chat_id] = TokenBucket(*self.chat_rate, now)
+        return b
+
+    def _pick(self, now: float):
+        """Return (job, None) to send now, or (None, seconds to wait | None = until woken)."""
+        if len(self._busy) >= self.concurrency or not self._ready:
+            return None, None
+        wait = self._global.delay(now)
+        if wait:
+            return None, wait
+
+        soonest = None
+        for _ in range(len(self._ready)):
+            chat_id = self._ready[0]
+            self._ready.rotate(-1)
+            if chat_id in self._busy:
+                continue
+            wait = max(self._bucket(chat_id, now).delay(now), self._blocked.get(chat_id, 0) - now)
+            if wait <= 0:
+                return self._pop(chat_id, now), None
+            soonest = wait if soonest is None else min(soonest, wait)
+        return None, soonest
+
+    def _pop(self, chat_id: int, now: float) -> Job:
+        q   = self._chats[chat_id]
+        job = q.popleft()
+        if not q:
+            del self._chats[chat_id]
+            self._ready.remove(chat_id)
+        if job.key and self._edits.get(job.key) is job:
+            del self._edits[job.key]
+        self._blocked.pop(chat_id, None)
+        self._global.take()
+        self._buckets[chat_id].take()
+        self._busy.add(chat_id)
+        self.depth -= 1
+        return job
+
+    async def run(self, bot=None):
+        """Scheduler loop; start once on the bot's event loop."""
+        self.bot = bot or self.bot
+        while True:
+            self._wake.clear()
+            now = self.clock()
+            if now - self._swept >= SWEEP:
+                self._sweep(now)
+            job, wait = self._pick(now)
+            if job:
+                task = asyncio.create_task(self._deliver(job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _sweep(self, now: float):
+        """Forget the buckets of idle chats that refilled since their last send
+        (a broadcast leaves one behind per recipient)."""
+        self._swept = now
+        for chat_id in [c for c, b in self._buckets.items()
+                        if c not in self._chats and c not in self._busy and b.full(now)
+                        and self._blocked.get(c, 0) <= now]:
+            del self._buckets[chat_id]
+
+    # ── Delivery ──────────────────────────────
+    async def _deliver(self, job: Job):
+        chat_id = job.chat_id
+        try:
+            result = await getattr(self.bot, job.method)(**job.kwargs)
+        except RetryAfter as e:
+            ra = e.retry_after
+            self._retry(job, ra.total_seconds() if hasattr(ra, "total_seconds") else float(ra))
+        except BadRequest as e:
+            self._finish(job, exc=e)
+            if "not modified" not in str(e):
+                logging.error(f"Outbox {job.method} to {chat_id} failed: {e}")
+        except Forbidden as e:
+            self._finish(job, exc=e)
+            logging.warning(f"Outbox {job.method} to {chat_id} refused: {e}")
+        except NetworkError as e:
+            job.attempts += 1
+            if job.attempts > self.retries:
+                self._finish(job, exc=e)
+                logging.error(f"Outbox {job.method} to {chat_id} gave up after {self.retries} retries: {e}")
+            else:
+                self._retry(job, min(BACKOFF_MAX, 0.5 * 2 ** job.attempts))
+        except Exception as e:
+            self._finish(job, exc=e)
+            logging.error(f"Outbox {job.method} to {chat_id} failed: {e}")
+        else:
+            self.sent += 1
+            self._finish(job, result=result)
+        finally:
+            self._busy.discard(chat_id)
+            now = self.clock()
+            if chat_id not in self._chats and self._blocked.get(chat_id, 0) <= now \
+                    and self._buckets[chat_id].full(now):
+                del self._buckets[chat_id]
+            self._wake.set()
+
+    def _retry(self, job: Job, delay: float):
+        """Put `job` back at the head of its chat, paused for `delay` seconds."""
+        self.retried += 1
+        newer = self._edits.get(job.key) if job.key else None
+        if newer is not None:                 # superseded while in flight: let the newer answer
+            newer.futures.extend(job.futures)
+            self.coalesced += 1
+        else:
+            self._enqueue(job, front=True)
+            self.depth += 1
+        self._blocked[job.chat_id] = self.clock() + delay
+
+    def _finish(self, job: Job, result=None, exc: Exception = None):
+        if exc is not None:
+            self.failed += 1
+        for fut in job.futures:
+            if fut.done():
+                continue
+            fut.set_exception(exc) if exc is not None else fut.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "depth":     self.depth,
+            "in_flight": len(self._busy),
+            "sent":      self.sent,
+            "coalesced": self.coalesced,
+            "retried":   self.retried,
+            "dropped":   self.dropped,
+            "failed":    self.failed,
+        }
+
+
+outbox = Outbox()
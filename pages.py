@@ -0,0 +1,120 @@
+import re
+from typing import Iterable, NamedTuple
+from telegram import InlineKeyboardButton
+
+MAX_TEXT = 4096                  # Telegram's message limit (UTF-16 code units, after parsing)
+BUDGET   = MAX_TEXT - 96         # what pages aim for, leaving room for a footer line
+
+_MD_SPECIAL = re.compile(r"([_*`\[])")
+
+
+# ──────────────────────────────────────────────
+#  ESCAPING (parse_mode="Markdown")
+# ──────────────────────────────────────────────
+
+def escape(text) -> str:
+    """`text` shown literally in a Markdown message (names, paths, unit names…)."""
+    return _MD_SPECIAL.sub(r"\\\1", str(text))
+
+
+def bold(text) -> str:
+    """`text` in bold.  Escaping does not work inside an entity, so each `*`
+    closes the bold, is escaped and reopens it (Bot API: *2*\\**2=4*)."""
+    return "\\*".join(f"*{part}*" if part else "" for part in str(text).split("*"))
+
+
+def code(text: str) -> str:
+    """`text` safe inside a ``` block, where nothing can be escaped: a
+    backtick would end the block, so it is swapped for a look-alike."""
+    return text.replace("`", "ˋ")
+
+
+def size(text: str) -> int:
+    """Length as Telegram counts it (UTF-16 code units; emoji count 2)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def clip(text: str, limit: int) -> str:
+    """`text` cut to at most `limit` UTF-16 units, "…" included (never
+    splitting an emoji)."""
+    if size(text) <= limit:
+        return text
+    units = text.encode("utf-16-le")[:2 * max(0, limit - 1)]
+    return units.decode("utf-16-le", errors="ignore") + "…"
+
+
+# ──────────────────────────────────────────────
+#  PAGES
+# ──────────────────────────────────────────────
+
+class Page(NamedTuple):
+    text:  str
+    first: object      # key of the first item shown (None if empty)
+    last:  object      # key of the last item shown
+    more:  bool        # the source had items left after `last`
+
+
+def fill(items: Iterable, head: str = "", foot: str = "", max_items: int = None,
+         budget: int = BUDGET, reverse: bool = False) -> Page:
+    """Pull `(key, text)` items until the next one would not fit.
+
+    `items` is consumed lazily — at most one item beyond the page is read
+    — so the source can be a generator over 100k users or a file read
+    backwards.  `reverse=True` shows the items in the opposite order they
+    were pulled (e.g. newest-first source, oldest-first page).  An item
+    too large for an empty page is cut.
+    """
+    room = budget - size(head) - size(foot)
+    keys, parts, more = [], [], False
+    for key, text in items:
+        n = size(text)
+        if (max_items and len(parts) >= max_items) or (parts and n > room):
+            more = True
+            break
+        if n > room:
+            text = clip(text, max(1, room))
+            n    = size(text)
+        keys.append(key)
+        parts.append(text)
+        room -= n
+    if reverse:
+        parts.reverse()
+    body = "".join(parts)
+    if not keys:
+        return Page(head + foot, None, None, False)
+    return Page(head + body + foot, keys[0], keys[-1], more)
+
+
+# ──────────────────────────────────────────────
+#  CURSOR TOKENS
+# ──────────────────────────────────────────────
+# callback_data is limited to 64 bytes; cursors (user ids, byte offsets)
+# go in base 36, e.g. "list:n:21i3v9" for "users after id 123456789".
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+def token(n: int) -> str:
+    if n == 0:
+        return "0"
+    sign, out = ("-" if n < 0 else ""), ""
+    n = abs(n)
+    while n:
+        n, r = divmod(n, 36)
+        out  = _DIGITS[r] + out
+    return sign + out
+
+
+def untoken(s: str) -> int:
+    """Inverse of token(); ValueError on anything malformed."""
+    return int(s, 36)
+
+
+def nav_row(view: str, prev: str = None, next: str = None, prev_label: str = "⬅️ Prev",
+            next_label: str = "Next ➡️") -> list:
+    """[Prev] [Next] buttons calling back `<view>:<prev|next>`; empty if neither."""
+    row = []
+    if prev is not None:
+        row.append(InlineKeyboardButton(prev_label, callback_data=f"{view}:{prev}"))
+    if next is not None:
+        row.append(InlineKeyboardButton(next_label, callback_data=f"{view}:{next}"))
+    return row
@@ -0,0 +1,63 @@
+import time
+import asyncio
+import logging
+from metrics import metrics
+from singleflight import flights
+from config import SERVICES, SYSTEMCTL, PROBE_TIMEOUT, PROBE_CACHE_TTL, PROBE_BATCH
+
+_cache = {}  # {unit: (checked_at, state)}
+
+
+# ──────────────────────────────────────────────
+#  SYSTEMD UNIT PROBES
+# ──────────────────────────────────────────────
+
+@metrics.timed("subprocess", "systemctl")
+async def _is_active(units: list, timeout: float) -> dict:
+    """One `systemctl is-active u1 u2 …` call; it prints one state per unit, in order."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            SYSTEMCTL, "is-active", "--", *units,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError as e:
+        logging.error(f"Cannot run {SYSTEMCTL}: {e}")
+        return {u: "unknown" for u in units}
+
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return {u: "timeout" for u in units}
+
+    states = out.decode(errors="replace").split()
+    if len(states) != len(units):
+        return {u: "unknown" for u in units}
+    return dict(zip(units, states))
+
+
+async def probe_services(units: list = None, timeout: float = PROBE_TIMEOUT) -> list:
+    """Return [(unit, state), …] for `units` (default: config.SERVICES).
+
+    Units are queried in batches of PROBE_BATCH, all batches in parallel,
+    each with its own timeout.  Results are cached for PROBE_CACHE_TTL s;
+    a batch already being queried (alerts and /services at once) is joined,
+    not queried again.
+    """
+    units = list(units or SERVICES)
+    now   = time.monotonic()
+    stale = [u for u in dict.fromkeys(units)
+             if u not in _cache or now - _cache[u][0] > PROBE_CACHE_TTL]
+
+    if stale:
+        batches = [stale[i:i + PROBE_BATCH] for i in range(0, len(stale), PROBE_BATCH)]
+        results = await asyncio.gather(*(flights.do(("systemctl", *b), lambda b=b: _is_active(b, timeout))
+                                         for b in batches))
+        now     = time.monotonic()
+        for res in results:
+            for unit, state in res.items():
+                _cache[unit] = (now, state)
+
+    return [(u, _cache[u][1]) for u in units]
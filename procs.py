@@ -0,0 +1,115 @@
+import time
+import heapq
+from typing import NamedTuple
+import psutil
+from config import PROC_DETAIL_INTERVAL, PROC_DETAIL_DEMAND
+
+SORT_KEYS = ("cpu", "mem", "io", "fds")
+
+
+class Proc(NamedTuple):
+    pid:  int
+    name: str
+    cpu:  float          # % of one core over the last tick
+    rss:  int
+    mem:  float          # % of total RAM
+    io:   float          # read + write bytes/s over the last tick (None = no access)
+    fds:  int            # open file descriptors (None = no access)
+
+
+# ──────────────────────────────────────────────
+#  PROCESS SAMPLER
+# ──────────────────────────────────────────────
+
+class ProcessSampler:
+    """Keeps a psutil.Process per pid across ticks and measures real deltas.
+
+    A cold `process_iter(['cpu_percent'])` reports 0.0 for almost everything;
+    here CPU % and IO rates come from the difference between two ticks.
+    Dead pids (and pids reused by a new process) are evicted on each tick.
+
+    IO counters and fd counts cost as much as everything else together, so
+    they are read every tick only for `demand` seconds after `want()` (a
+    `/system io|fds` view), and otherwise every `detail_every` seconds; in
+    between the last values are reported.
+    """
+
+    def __init__(self, detail_every: float = PROC_DETAIL_INTERVAL, demand: float = PROC_DETAIL_DEMAND):
+        self.detail_every = detail_every
+        self.demand       = demand
+        self.asked        = float("-inf")     # monotonic time of the last want()
+        self.detailed     = float("-inf")     # monotonic time IO / fds were last read
+        self._procs       = {}   # {pid: [Process, create_time, cpu_time, taken, io_bytes, io_taken, io_rate, fds]}
+
+    def want(self):
+        """IO / fd columns are being looked at: read them every tick for a while."""
+        self.asked = time.monotonic()
+
+    def _read(self, p: psutil.Process, detail: bool):
+        io = fds = None
+        with p.oneshot():
+            t    = p.cpu_times()
+            rss  = p.memory_info().rss
+            name = p.name()
+            ctime = p.create_time()
+            if detail:
+                try:
+                    c  = p.io_counters()
+                    io = c.read_bytes + c.write_bytes
+                except (psutil.AccessDenied, AttributeError):
+                    io = None
+                try:
+                    fds = p.num_fds()
+                except psutil.AccessDenied:
+                    fds = None
+        return ctime, t.user + t.system, rss, name, io, fds
+
+    def sample(self, total_ram: int) -> list:
+        """One tick: return a Proc row for every live process."""
+        rows   = []
+        now    = time.monotonic()
+        alive  = set(psutil.pids())
+        detail = now - self.asked < self.demand or now - self.detailed >= self.detail_every
+        if detail:
+            self.detailed = now
+
+        for pid in self._procs.keys() - alive:
+            del self._procs[pid]
+
+        for pid in alive:
+            entry = self._procs.get(pid)
+            try:
+                p = entry[0] if entry else psutil.Process(pid)
+                ctime, cpu_t, rss, name, io, fds = self._read(p, detail)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self._procs.pop(pid, None)
+                continue
+
+            same = entry is not None and entry[1] == ctime
+            cpu  = 0.0
+            if same and now > entry[3]:
+                cpu = max(0.0, cpu_t - entry[2]) / (now - entry[3]) * 100
+            if not detail:                       # keep the last IO / fd reading
+                io, io_taken, io_rate, fds = entry[4:8] if same else (None, None, None, None)
+            else:
+                io_taken = now
+                io_rate  = 0.0 if io is not None else None
+                if same and io is not None and entry[4] is not None and now > entry[5]:
+                    io_rate = max(0, io - entry[4]) / (now - entry[5])
+            self._procs[pid] = [p, ctime, cpu_t, now, io, io_taken, io_rate, fds]
+
+            rows.append(Proc(pid, name, cpu, rss, rss / total_ram * 100 if total_ram else 0.0,
+                             io_rate, fds))
+        return rows
+
+
+_KEYS = {
+    "cpu": lambda r: r.cpu,
+    "mem": lambda r: r.rss,
+    "io":  lambda r: r.io or 0.0,
+    "fds": lambda r: r.fds or 0,
+}
+
+def top(rows, n: int = 5, key: str = "cpu") -> tuple:
+    """Largest `n` rows by `key`; a heap, so no full sort of every process."""
+    return tuple(heapq.nlargest(n, rows, key=_KEYS[key]))
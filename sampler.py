@@ -0,0 +1,161 @@
+import time
+import logging
+import threading
+from typing import NamedTuple
+from types import MappingProxyType
+import psutil
+from config import SAMPLE_INTERVAL, PROC_TOP, CONN_INTERVAL, CGROUP_TOP
+from procs import ProcessSampler, SORT_KEYS, top
+from netstat import NicSampler, ConnSummary, conn_summary
+import cgroups
+from diskio import DiskSampler
+from metrics import metrics
+
+
+# ──────────────────────────────────────────────
+#  SNAPSHOT
+# ──────────────────────────────────────────────
+
+class Snapshot(NamedTuple):
+    """One immutable sample of the host, shared by every view."""
+    taken:  float         # time.time() when the sample finished
+    cpu:    float         # % over the last interval
+    cores:  int
+    ram:    tuple         # psutil.virtual_memory()
+    disk:   tuple         # psutil.disk_usage("/")
+    boot:   float         # psutil.boot_time()
+    net:    tuple         # psutil.net_io_counters()
+    nics:   tuple         # netstat.NicRate per interface, busiest first
+    disks:  tuple         # diskio.DiskRate per disk (partitions folded in), busiest first
+    conns:  ConnSummary   # refreshed every CONN_INTERVAL s
+    nprocs: int
+    pnames: frozenset     # names of all running processes
+    top:    MappingProxyType  # {sort key: tuple of procs.Proc}, see procs.SORT_KEYS
+    ngroup: int           # leaf cgroups seen
+    groups: MappingProxyType  # {sort key: tuple of cgroups.Cgroup}; None without cgroup v2
+
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was taken."""
+        return max(0.0, time.time() - self.taken)
+
+    @property
+    def uptime(self) -> str:
+        return fmt_uptime(self.taken - self.boot)
+
+
+def fmt_uptime(seconds: float) -> str:
+    """Same wording as `uptime -p`."""
+    mins  = int(seconds) // 60
+    parts = []
+    for unit, size in (("week", 10080), ("day", 1440), ("hour", 60), ("minute", 1)):
+        n, mins = divmod(mins, size)
+        if n:
+            parts.append(f"{n} {unit}{'s' if n != 1 else ''}")
+    return "up " + (", ".join(parts) or "0 minutes")
+
+
+# ──────────────────────────────────────────────
+#  SAMPLER
+# ──────────────────────────────────────────────
+
+class Sampler:
+    """Collects host metrics in a background thread, off the event loop.
+
+    Handlers call `snapshot()`, which is a single attribute read.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, top: int = PROC_TOP):
+        self.interval   = interval
+        self.top        = top
+        self.procs      = ProcessSampler()
+        self.nics       = NicSampler()
+        self.disks      = DiskSampler()
+        self.cgroups    = cgroups.CgroupSampler()
+        self._conns     = None
+        self._snap      = None
+        self._stop      = threading.Event()
+        self._thread    = None
+        self._listeners = []
+
+    def subscribe(self, fn):
+        """Call `fn(snapshot)` from the sampler thread after every sample."""
+        self._listeners.append(fn)
+
+    def start(self):
+        if self._thread:
+            return
+        # First sample is taken synchronously so views never see `None`;
+        # the short interval primes cpu_percent() before the loop starts.
+        self._snap = self._collect(cpu_interval=0.1)
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self) -> Snapshot:
+        if self._snap is None:
+            self._snap = self._collect(cpu_interval=0.1)
+        return self._snap
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with metrics.timer("psutil", "sample"):
+                    snap = self._collect()
+            except Exception as e:
+                logging.error(f"Sampler failed: {e}")
+                continue
+            self._snap = snap
+            for fn in self._listeners:
+                try:
+                    fn(snap)
+                except Exception as e:
+                    logging.error(f"Sampler listener {fn!r} failed: {e}")
+
+    def _collect(self, cpu_interval=None) -> Snapshot:
+        # cpu_percent(None) reports usage since the previous call, i.e.
+        # averaged over our sampling interval; ProcessSampler does the same
+        # per process.
+        if cpu_interval:
+            self.nics.sample()           # prime, so the first snapshot has rates
+            self.disks.sample()
+        cpu   = psutil.cpu_percent(interval=cpu_interval)
+        ram   = psutil.virtual_memory()
+        with metrics.timer("psutil", "processes"):
+            procs = self.procs.sample(ram.total)
+
+        groups = None
+        if self.cgroups.available:
+            with metrics.timer("psutil", "cgroups"):
+                groups = self.cgroups.sample()
+
+        # Streaming /proc/net is cheap, but on boxes with 100k+ sockets it is
+        # still the slowest part of a tick, so it runs on its own cadence.
+        conns = self._conns
+        if conns is None or time.time() - conns.taken >= CONN_INTERVAL:
+            with metrics.timer("psutil", "/proc/net"):
+                conns = self._conns = conn_summary()
+
+        return Snapshot(
+            taken  = time.time(),
+            cpu    = cpu,
+            cores  = psutil.cpu_count(),
+            ram    = ram,
+            disk   = psutil.disk_usage("/"),
+            boot   = psutil.boot_time(),
+            net    = psutil.net_io_counters(),
+            nics   = self.nics.sample(),
+            disks  = self.disks.sample(),
+            conns  = conns,
+            nprocs = len(procs),
+            pnames = frozenset(p.name for p in procs),
+            top    = MappingProxyType({k: top(procs, self.top, k) for k in SORT_KEYS}),
+            ngroup = len(groups or ()),
+            groups = None if groups is None else
+                     MappingProxyType({k: cgroups.top(groups, CGROUP_TOP, k) for k in cgroups.SORT_KEYS}),
+        )
+
+
+sampler = Sampler()
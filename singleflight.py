@@ -0,0 +1,86 @@
+import time
+import asyncio
+import inspect
+from typing import Callable, Hashable
+
+
+def _retrieve(task: asyncio.Task):
+    """Done-callback: a failure nobody waited for is not reported as unretrieved."""
+    if not task.cancelled():
+        task.exception()
+
+
+# ──────────────────────────────────────────────
+#  SINGLE-FLIGHT
+# ──────────────────────────────────────────────
+
+class SingleFlight:
+    """Concurrent calls for the same key share one computation.
+
+    `await flights.do(key, fn, fresh)` returns, in order of preference: a
+    result that finished less than `fresh` seconds ago, the result of the
+    call for `key` already in flight, or the result of a new `fn()` (sync
+    or async).  The computation runs as its own task, so a caller that is
+    cancelled or times out does not cancel it for the others.  Failures
+    are shared by the callers that were waiting but never kept.
+    """
+
+    def __init__(self, max_fresh: int = 1024, clock: Callable = time.monotonic):
+        self.max_fresh = max_fresh
+        self.clock     = clock
+        self._flights  = {}       # {key: Task} computations in progress
+        self._fresh    = {}       # {key: (expires, result)}
+        self.runs      = 0        # computations started
+        self.shared    = 0        # calls that joined one in flight
+        self.reused    = 0        # calls answered from a fresh result
+
+    async def do(self, key: Hashable, fn: Callable, fresh: float = 0.0):
+        hit = self._fresh.get(key)
+        if hit is not None:
+            if hit[0] > self.clock():
+                self.reused += 1
+                return hit[1]
+            del self._fresh[key]
+
+        task = self._flights.get(key)
+        if task is None:
+            self.runs += 1
+            task = self._flights[key] = asyncio.ensure_future(self._run(key, fn, fresh))
+            task.add_done_callback(_retrieve)
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable, fresh: float):
+        try:
+            result = fn()
+            if inspect.isawaitable(result):
+                result = await result
+        finally:
+            del self._flights[key]
+        if fresh > 0:
+            if len(self._fresh) >= self.max_fresh:
+                self._prune()
+            self._fresh[key] = (self.clock() + fresh, result)
+        return result
+
+    def _prune(self):
+        now = self.clock()
+        for key in [k for k, (exp, _) in self._fresh.items() if exp <= now]:
+            del self._fresh[key]
+        while len(self._fresh) >= self.max_fresh:          # all still fresh: drop the oldest
+            del self._fresh[next(iter(self._fresh))]
+
+    def forget(self, key: Hashable = None):
+        """Drop the fresh result for `key` (all of them when None)."""
+        if key is None:
+            self._fresh.clear()
+        else:
+            self._fresh.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._flights), "runs": self.runs,
+                "shared": self.shared, "reused": self.reused}
+
+
+flights = SingleFlight()
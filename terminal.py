@@ -1,5 +1,20 @@
+"""Admin panel: a client for the bot's control socket (control.py).
+
+    python terminal.py                           # interactive panel
+    python terminal.py add 111 222               # one command, then exit
+    python terminal.py import ids.txt --admin    # bulk grant from a file
+    python terminal.py broadcast users "text"    # message every authorized user
+    python terminal.py --json list               # raw JSON reply
+
+Runs as a separate process, so the bot needs no TTY (systemd friendly);
+it talks to the running bot over CONTROL_SOCKET.
+"""
 import os
-from auth import AUTHORIZED_USERS, ADMIN_USERS
+import re
+import sys
+import json
+import socket
+from config import CONTROL_SOCKET
 
 # ─── ANSI Colors ───────────────────────────────
 R  = "\033[0m"       # Reset
@@ -23,21 +38,27 @@ def header():
     print(f"{R}")
 
 def help_table():
-    print(f"{GY}  ┌─────────────────────────────────────────────┐{R}")
-    print(f"{GY}  │{R}  {B}Command{R}               {B}Description{R}           {GY}│{R}")
-    print(f"{GY}  ├─────────────────────────────────────────────┤{R}")
+    print(f"{GY}  ┌─────────────────────────────────────────────────────┐{R}")
+    print(f"{GY}  │{R}  {B}Command{R}                     {B}Description{R}             {GY}│{R}")
+    print(f"{GY}  ├─────────────────────────────────────────────────────┤{R}")
     cmds = [
-        ("add <id>",      "Authorize a user"),
-        ("addadmin <id>", "Add a user as admin"),
-        ("remove <id>",   "Remove user / admin"),
-        ("list",          "Show all users"),
-        ("clear",         "Clear the screen"),
-        ("help",          "Show this help"),
-        ("exit",          "Close the panel"),
+        ("add <id> [id…]",      "Authorize users"),
+        ("addadmin <id> [id…]", "Make users admins"),
+        ("remove <id> [id…]",   "Remove users / admins"),
+        ("import <file>",       "Authorize every id in a file"),
+        ("  … --admin",         "… as admins"),
+        ("  … --replace",       "… and revoke the rest"),
+        ("list",                "Show all users"),
+        ("stats",               "Count users and admins"),
+        ("broadcast <who> <text>", "Notify all/users/admins"),
+        ("broadcast [cancel]",  "Progress / stop it"),
+        ("clear",               "Clear the screen"),
+        ("help",                "Show this help"),
+        ("exit",                "Close the panel"),
     ]
     for cmd, desc in cmds:
-        print(f"{GY}  │{R}  {YE}{cmd:<22}{R}{desc:<23}{GY}│{R}")
-    print(f"{GY}  └─────────────────────────────────────────────┘{R}")
+        print(f"{GY}  │{R}  {YE}{cmd:<28}{R}{desc:<23}{GY}│{R}")
+    print(f"{GY}  └─────────────────────────────────────────────────────┘{R}")
     print()
 
 
@@ -46,87 +67,183 @@ def err(msg):  print(f"  {RE}✘  {msg}{R}")
 def info(msg): print(f"  {CY}ℹ  {msg}{R}")
 
 
-def terminal_listener():
+# ──────────────────────────────────────────────
+#  CONTROL SOCKET CLIENT
+# ──────────────────────────────────────────────
+
+class Control:
+    """Blocking client: one JSON line out, one JSON line back."""
+
+    def __init__(self, path: str = CONTROL_SOCKET):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rwb")
+
+    def call(self, cmd: str, **params) -> dict:
+        self.file.write(json.dumps({"cmd": cmd, **params}).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("the bot closed the control connection")
+        return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def read_ids(path: str) -> list:
+    """Every integer in a file: one per line, comma / space separated, # comments."""
+    with open(path) as f:
+        return [int(n) for line in f for n in re.findall(r"\d+", line.split("#", 1)[0])]
+
+
+def parse(parts: list):
+    """Panel words → (cmd, params), or raise ValueError with the usage text."""
+    cmd, args = parts[0], parts[1:]
+    if cmd in ("add", "addadmin", "remove"):
+        if not args or not all(a.isdigit() for a in args):
+            raise ValueError(f"Usage:  {cmd} <user_id> [user_id …]")
+        return cmd, {"ids": [int(a) for a in args]}
+    if cmd == "import":
+        files = [a for a in args if not a.startswith("--")]
+        if len(files) != 1:
+            raise ValueError("Usage:  import <file> [--admin] [--replace]")
+        ids = read_ids(files[0])
+        if not ids:
+            raise ValueError(f"No user ids found in {files[0]}")
+        return cmd, {"ids": ids, "role": "admin" if "--admin" in args else "user",
+                     "replace": "--replace" in args}
+    if cmd in ("list", "stats") and not args:
+        return cmd, {}
+    if cmd == "broadcast":
+        if not args or args == ["status"]:
+            return cmd, {}
+        if args == ["cancel"]:
+            return cmd, {"cancel": True}
+        if len(args) < 2 or args[0] not in ("all", "users", "admins"):
+            raise ValueError("Usage:  broadcast <all|users|admins> <text…>  |  broadcast [status|cancel]")
+        return cmd, {"audience": args[0], "text": " ".join(args[1:])}
+    raise ValueError(f"Unknown command: '{' '.join(parts)}'  —  type {YE}help{R}{RE} for commands.")
+
+
+def show(cmd: str, params: dict, reply: dict):
+    """Print a reply the way the panel always has."""
+    if not reply.get("ok"):
+        err(reply.get("error", "failed"))
+        return
+    if cmd == "list":
+        print()
+        print(f"{GY}  ┌──────────────────────────────────────────────────┐{R}")
+        print(f"{GY}  │{R}  {B}{'ID':<15} {'Role':<10} {'Name'}{R}                     {GY}│{R}")
+        print(f"{GY}  ├──────────────────────────────────────────────────┤{R}")
+        if not reply["users"]:
+            print(f"{GY}  │{R}    (no users)                                  {GY}│{R}")
+        for u in reply["users"]:
+            role = f"{MA}Admin 👑{R}" if u["role"] == "admin" else f"{CY}User    {R}"
+            print(f"{GY}  │{R}  {u['id']:<15} {role}   {(u['name'] or '—')[:20]:<20}  {GY}│{R}")
+        print(f"{GY}  └──────────────────────────────────────────────────┘{R}")
+        print()
+    elif cmd == "stats":
+        info(f"{reply['registered']} registered · {reply['users']} users · {reply['admins']} admins")
+    elif cmd == "broadcast":
+        if reply["status"] == "idle":
+            info("No broadcast since the bot started.")
+            return
+        if params.get("cancel") and not reply["cancelled"]:
+            info("No broadcast is running.")
+        done = reply["sent"] + reply["blocked"] + reply["failed"]
+        line = (f"Broadcast to {reply['audience']}: {reply['status']} — {done:,}/{reply['total']:,} · "
+                f"{reply['sent']:,} sent · {reply['blocked']:,} blocked · {reply['failed']:,} failed")
+        ok(line) if reply["status"] in ("running", "done") else info(line)
+    elif len(params.get("ids", ())) == 1 and cmd != "import":
+        uid = params["ids"][0]
+        if cmd == "remove":
+            ok(f"User {CY}{uid}{R}{GR} removed.") if reply["changed"] else err(f"User {uid} not found.")
+        elif not reply["changed"]:
+            info(f"{uid} already has that role.")
+        elif cmd == "add":
+            ok(f"User {CY}{uid}{R}{GR} added to authorized users.")
+        else:
+            ok(f"User {CY}{uid}{R}{GR} is now an admin 👑")
+    else:
+        what = {"add": "authorized", "addadmin": "made admin", "remove": "removed",
+                "import": f"granted {params.get('role', 'user')}"}[cmd]
+        ok(f"{reply['changed']} {what}, {reply.get('unchanged', len(reply.get('missing', ())))} unchanged"
+           + (f", {reply['revoked']} revoked" if "revoked" in reply else "") + ".")
+
+
+# ──────────────────────────────────────────────
+#  PANEL
+# ──────────────────────────────────────────────
+
+def panel(ctl: Control):
     header()
     help_table()
 
     while True:
         try:
-            cmd = input(f"{MA}{B}  panel ›{R} ").strip()
+            line = input(f"{MA}{B}  panel ›{R} ").strip()
         except (EOFError, KeyboardInterrupt):
+            print()
             info("Closing panel…")
             break
 
-        if not cmd:
+        if not line:
             continue
-
-        # ── add ──────────────────────────────────
-        if cmd.startswith("add "):
-            parts = cmd.split()
-            if len(parts) != 2 or not parts[1].isdigit():
-                err("Usage:  add <user_id>")
-                continue
-            uid = int(parts[1])
-            if uid in AUTHORIZED_USERS:
-                info(f"{uid} is already authorized.")
-            else:
-                AUTHORIZED_USERS.add(uid)
-                ok(f"User {CY}{uid}{R}{GR} added to authorized users.")
-
-        # ── addadmin ─────────────────────────────
-        elif cmd.startswith("addadmin "):
-            parts = cmd.split()
-            if len(parts) != 2 or not parts[1].isdigit():
-                err("Usage:  addadmin <user_id>")
-                continue
-            uid = int(parts[1])
-            ADMIN_USERS.add(uid)
-            AUTHORIZED_USERS.add(uid)
-            ok(f"User {CY}{uid}{R}{GR} is now an admin 👑")
-
-        # ── remove ───────────────────────────────
-        elif cmd.startswith("remove "):
-            parts = cmd.split()
-            if len(parts) != 2 or not parts[1].isdigit():
-                err("Usage:  remove <user_id>")
-                continue
-            uid = int(parts[1])
-            if uid not in AUTHORIZED_USERS and uid not in ADMIN_USERS:
-                err(f"User {uid} not found.")
-            else:
-                AUTHORIZED_USERS.discard(uid)
-                ADMIN_USERS.discard(uid)
-                ok(f"User {CY}{uid}{R}{GR} removed.")
-
-        # ── list ─────────────────────────────────
-        elif cmd == "list":
-            print()
-            print(f"{GY}  ┌──────────────────────────────────┐{R}")
-            print(f"{GY}  │{R}  {B}{'ID':<15} {'Role':<10} {'Status'}{R}   {GY}│{R}")
-            print(f"{GY}  ├──────────────────────────────────┤{R}")
-            all_ids = AUTHORIZED_USERS | ADMIN_USERS
-            if not all_ids:
-                print(f"{GY}  │{R}    (no users)                  {GY}│{R}")
-            for uid in sorted(all_ids):
-                role   = f"{MA}Admin 👑{R}" if uid in ADMIN_USERS else f"{CY}User{R}"
-                status = f"{GR}✔ authorized{R}"
-                print(f"{GY}  │{R}  {uid:<15} {role:<10}  {status}  {GY}│{R}")
-            print(f"{GY}  └──────────────────────────────────┘{R}")
-            print()
-
-        # ── clear ────────────────────────────────
-        elif cmd == "clear":
+        if line == "clear":
             header()
             help_table()
-
-        # ── help ─────────────────────────────────
-        elif cmd == "help":
+            continue
+        if line == "help":
             help_table()
-
-        # ── exit ─────────────────────────────────
-        elif cmd == "exit":
+            continue
+        if line == "exit":
             info("Closing panel…")
             break
 
+        try:
+            cmd, params = parse(line.split())
+        except (ValueError, OSError) as e:
+            err(str(e))
+            continue
+        try:
+            show(cmd, params, ctl.call(cmd, **params))
+        except OSError as e:
+            err(f"Lost the connection to the bot: {e}")
+            break
+
+
+def main(argv: list) -> int:
+    path, raw = CONTROL_SOCKET, "--json" in argv
+    argv = [a for a in argv if a != "--json"]
+    if "--socket" in argv:
+        i = argv.index("--socket")
+        path, argv = argv[i + 1], argv[:i] + argv[i + 2:]
+    try:
+        ctl = Control(path)
+    except OSError as e:
+        err(f"Cannot reach the bot on {path}: {e.strerror}. Is it running?")
+        return 2
+
+    try:
+        if not argv:
+            panel(ctl)
+            return 0
+        try:
+            cmd, params = parse(argv)
+        except (ValueError, OSError) as e:
+            err(str(e))
+            return 2
+        reply = ctl.call(cmd, **params)
+        if raw:
+            print(json.dumps(reply, indent=2))
         else:
-            err(f"Unknown command: '{cmd}'  —  type {YE}help{R}{RE} for commands.")
\ No newline at end of file
+            show(cmd, params, reply)
+        return 0 if reply.get("ok") else 1
+    finally:
+        ctl.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,311 @@
+import os
+import gzip
+import time
+import shutil
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import NamedTuple
+import httpx
+from telegram import InputFile
+from outbox import outbox
+from pages import bold, code
+from config import TRANSFER_PART_SIZE, TRANSFER_COMPRESS_MIN, TRANSFER_GZIP_LEVEL, TRANSFER_TIMEOUT, TRANSFER_TMP
+
+CHUNK = 1024 * 1024            # bytes per read / write; the most a transfer holds in memory at once
+
+# Not worth a gzip pass: already compressed or media.
+COMPRESSED = {".gz", ".tgz", ".bz2", ".xz", ".zst", ".lz4", ".zip", ".7z", ".rar",
+              ".jpg", ".jpeg", ".png", ".gif", ".webp", ".mp3", ".ogg", ".mp4", ".mkv",
+              ".webm", ".deb", ".rpm", ".apk", ".jar", ".whl"}
+
+
+class Part(NamedTuple):
+    index:  int        # 1-based
+    path:   str        # file holding the bytes
+    offset: int        # where they start in `path`
+    size:   int
+    sha256: str
+    last:   bool
+    temp:   bool       # `path` is ours to delete once sent
+
+
+class Cancelled(Exception):
+    pass
+
+
+# ──────────────────────────────────────────────
+#  FILE WINDOW
+# ──────────────────────────────────────────────
+
+class Window:
+    """Read-only file object over bytes [offset, offset + size) of `path`.
+
+    Handed to httpx (through InputFile(read_file_handle=False)), which
+    reads it in 64 KiB chunks while the request is written, so a part
+    is streamed from disk instead of loaded.  It seeks back to 0 before
+    each attempt, so outbox retries resend the same bytes.  There is
+    deliberately no fileno(): httpx would take the length of the whole
+    file from fstat().
+    """
+
+    def __init__(self, path: str, offset: int, size: int):
+        self.f      = open(path, "rb")
+        self.offset = offset
+        self.size   = size
+        self.pos    = 0
+        self.f.seek(offset)
+
+    def read(self, n: int = -1) -> bytes:
+        left = self.size - self.pos
+        n    = left if n is None or n < 0 else min(n, left)
+        data = self.f.read(n) if n > 0 else b""
+        self.pos += len(data)
+        return data
+
+    def seek(self, pos: int, whence: int = os.SEEK_SET) -> int:
+        base     = {os.SEEK_SET: 0, os.SEEK_CUR: self.pos, os.SEEK_END: self.size}[whence]
+        self.pos = max(0, min(self.size, base + pos))
+        self.f.seek(self.offset + self.pos)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def close(self):
+        self.f.close()
+
+
+# ──────────────────────────────────────────────
+#  PRODUCERS (worker thread)
+# ──────────────────────────────────────────────
+# Each calls emit(Part) as soon as a part is complete and returns
+# (sha256 of everything emitted, bytes emitted).  emit() blocks while
+# the uploader is a part behind, so at most two parts exist at a time.
+
+def split(path: str, size: int, part_size: int, emit, cancel: threading.Event) -> tuple:
+    """Hash `path` part by part; the parts are windows on the file itself.
+
+    Reading each part here also leaves it in the page cache just before
+    httpx reads it again from the event loop.
+    """
+    total, count = hashlib.sha256(), max(1, -(-size // part_size))
+    with open(path, "rb") as f:
+        for i in range(count):
+            sha, left = hashlib.sha256(), min(part_size, size - i * part_size)
+            while left:
+                if cancel.is_set():
+                    raise Cancelled()
+                chunk = f.read(min(CHUNK, left))
+                if not chunk:
+                    raise OSError(f"{path} shrank while being sent")
+                sha.update(chunk)
+                total.update(chunk)
+                left -= len(chunk)
+            emit(Part(i + 1, path, i * part_size, min(part_size, size - i * part_size),
+                      sha.hexdigest(), i == count - 1, False))
+    return total.hexdigest(), size
+
+
+class PartWriter:
+    """Write-only sink that cuts its input into part files of `part_size` bytes.
+
+    A full part is emitted when the next byte arrives (so it is known not
+    to be the last); the final one on close().
+    """
+
+    def __init__(self, folder: str, part_size: int, emit, cancel: threading.Event):
+        self.folder    = folder
+        self.part_size = part_size
+        self.emit      = emit
+        self.cancel    = cancel
+        self.total     = hashlib.sha256()
+        self.written   = 0
+        self.index     = 0
+        self.file      = None
+
+    def write(self, data) -> int:
+        if self.cancel.is_set():
+            raise Cancelled()
+        view = memoryview(data).cast("B")
+        while view:
+            if self.file is None or self.size == self.part_size:
+                self._next()
+            chunk = view[:self.part_size - self.size]
+            self.file.write(chunk)
+            self.sha.update(chunk)
+            self.total.update(chunk)
+            self.size    += len(chunk)
+            self.written += len(chunk)
+            view          = view[len(chunk):]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _next(self):
+        if self.file is not None:
+            self._emit(last=False)
+        self.index += 1
+        self.path   = os.path.join(self.folder, f"part{self.index:05d}")
+        self.file   = open(self.path, "wb")
+        self.sha    = hashlib.sha256()
+        self.size   = 0
+
+    def _emit(self, last: bool):
+        self.file.close()
+        self.emit(Part(self.index, self.path, 0, self.size, self.sha.hexdigest(), last, True))
+
+    def close(self):
+        if self.file is None:
+            self._next()
+        self._emit(last=True)
+
+
+def compress(path: str, folder: str, part_size: int, emit, cancel: threading.Event) -> tuple:
+    """gzip `path` into part files under `folder`, CHUNK bytes at a time."""
+    out = PartWriter(folder, part_size, emit, cancel)
+    with open(path, "rb") as src, gzip.GzipFile(os.path.basename(path), "wb", TRANSFER_GZIP_LEVEL, out,
+                                                os.stat(path).st_mtime) as gz:
+        while chunk := src.read(CHUNK):
+            gz.write(chunk)
+    out.close()
+    return out.total.hexdigest(), out.written
+
+
+# ──────────────────────────────────────────────
+#  SENDING
+# ──────────────────────────────────────────────
+
+def part_name(name: str, part: Part) -> str:
+    return name if part.index == 1 and part.last else f"{name}.part{part.index:03d}"
+
+
+async def send_file(chat_id: int, path: str, part_size: int = TRANSFER_PART_SIZE) -> str:
+    """Send `path` to `chat_id` as documents of at most `part_size` bytes.
+
+    Files over TRANSFER_COMPRESS_MIN are gzipped first (in a worker
+    thread, pipelined with the uploads).  Every part's caption carries
+    its SHA-256; the returned summary (Markdown) gives the digest of
+    the reassembled file and how to rebuild it.
+    """
+    t0     = time.monotonic()
+    size   = os.path.getsize(path)
+    name   = os.path.basename(path)
+    gz     = size > TRANSFER_COMPRESS_MIN and os.path.splitext(name)[1].lower() not in COMPRESSED
+    name   = name + ".gz" if gz else name
+    folder = tempfile.mkdtemp(prefix="transfer-", dir=TRANSFER_TMP) if gz else None
+    loop   = asyncio.get_running_loop()
+    parts  = asyncio.Queue(1)
+    cancel = threading.Event()
+
+    def emit(item):
+        asyncio.run_coroutine_threadsafe(parts.put(item), loop).result()
+
+    def work():
+        try:
+            emit(compress(path, folder, part_size, emit, cancel) if gz
+                 else split(path, size, part_size, emit, cancel))
+        except BaseException as e:
+            emit(e)
+
+    worker = asyncio.create_task(asyncio.to_thread(work))
+    count  = 0
+    try:
+        while isinstance(part := await parts.get(), Part):
+            window = Window(part.path, part.offset, part.size)
+            try:
+                await outbox.call(
+                    chat_id, "send_document",
+                    document=InputFile(window, filename=part_name(name, part), read_file_handle=False),
+                    caption=f"📦 {part_name(name, part)}\nsha256 {part.sha256}",
+                    write_timeout=TRANSFER_TIMEOUT, read_timeout=TRANSFER_TIMEOUT)
+            finally:
+                window.close()
+                if part.temp:
+                    os.unlink(part.path)
+            count += 1
+        if isinstance(part, BaseException):
+            raise part
+        digest, sent = part
+    except BaseException:
+        cancel.set()
+        while not worker.done():                # unblock the worker so it can see `cancel`
+            if not isinstance(await parts.get(), Part):
+                break
+        raise
+    finally:
+        await worker
+        if folder:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    secs = time.monotonic() - t0
+    logging.info(f"Sent {path} to {chat_id}: {count} part(s), {sent} bytes in {secs:.1f}s")
+    msg  = (f"📦 {bold(name)} — {count} part{'s' if count > 1 else ''}, {sent / 1e6:.1f} MB"
+            + (f" (gzip of {size / 1e6:.1f} MB)" if gz else "") + f" in {secs:.0f}s\n"
+            f"sha256 `{digest}`")
+    if count > 1:
+        msg += f"\n\nReassemble:\n`cat {code(name)}.part* > {code(name)}`"
+    if gz:
+        msg += f"\n`gunzip {code(name)}`"
+    return msg
+
+
+# ──────────────────────────────────────────────
+#  RECEIVING
+# ──────────────────────────────────────────────
+
+def _append(out, sha, chunks: list):
+    for c in chunks:
+        out.write(c)
+        sha.update(c)
+
+
+def _copy(src: str, dst: str) -> tuple:
+    sha, n = hashlib.sha256(), 0
+    with open(src, "rb") as i, open(dst, "wb") as o:
+        while chunk := i.read(CHUNK):
+            o.write(chunk)
+            sha.update(chunk)
+            n += len(chunk)
+    return sha.hexdigest(), n
+
+
+async def receive(bot, file_id: str, dest: str) -> tuple:
+    """Download `file_id` to `dest` (via `dest`.part, renamed when complete).
+
+    The body is streamed: CHUNK bytes are buffered, then written and
+    hashed in a worker thread.  With a local Bot API server file_path is
+    a path on this disk and is copied instead.  Returns (sha256, bytes).
+    """
+    f   = await bot.get_file(file_id, read_timeout=TRANSFER_TIMEOUT)
+    tmp = dest + ".part"
+    try:
+        if not f.file_path.startswith(("http://", "https://")):
+            digest, n = await asyncio.to_thread(_copy, f.file_path, tmp)
+        else:
+            sha, n = hashlib.sha256(), 0
+            async with httpx.AsyncClient(timeout=TRANSFER_TIMEOUT) as client:
+                async with client.stream("GET", f.file_path) as r:
+                    r.raise_for_status()
+                    with open(tmp, "wb") as out:
+                        batch, held = [], 0
+                        async for chunk in r.aiter_bytes():
+                            batch.append(chunk)
+                            held += len(chunk)
+                            if held >= CHUNK:
+                                await asyncio.to_thread(_append, out, sha, batch)
+                                n += held
+                                batch, held = [], 0
+                        await asyncio.to_thread(_append, out, sha, batch)
+                        n += held
+            digest = sha.hexdigest()
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    logging.info(f"Received {dest}: {n} bytes")
+    return digest, n
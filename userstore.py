@@ -0,0 +1,267 @@
+import os
+import time
+import queue
+import bisect
+import atexit
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from config import USERS_DB, USERS_FLUSH_INTERVAL, USERS_RELOAD_INTERVAL
+
+ROLE_NONE  = 0     # registered (or unknown), no access
+ROLE_USER  = 1     # authorized
+ROLE_ADMIN = 2     # admin (implies authorized)
+
+
+# ──────────────────────────────────────────────
+#  USER STORE
+# ──────────────────────────────────────────────
+
+class UserStore:
+    """Registered users and their roles, persisted to SQLite (WAL mode).
+
+    All reads come from in-memory dicts, so lookups are O(1) and never
+    touch the disk.  Writes update the dicts immediately and are queued for
+    a writer thread, which commits them in batches (synchronous=FULL, i.e.
+    fsync'd) every USERS_FLUSH_INTERVAL seconds.
+
+    While idle the writer also watches the file: when another process
+    commits (PRAGMA data_version changes) the table is re-read and
+    subscribers are told, so edits made outside the bot apply live.
+    """
+
+    def __init__(self, path: str = USERS_DB):
+        self.path    = path
+        self._names  = {}              # {user_id: name}  registered users
+        self._roles  = {}              # {user_id: role}  ROLE_USER / ROLE_ADMIN only
+        self._ids    = []              # sorted registered ids, for paging
+        self._lock   = threading.Lock()
+        self._queue  = queue.Queue()
+        self._thread = None
+        self._dirty  = Counter()       # {user_id: queued writes not yet committed}
+        self._subs   = []
+        self._stat   = None            # (mtime, size) of db + wal at the last check
+        self._dver   = None            # PRAGMA data_version at the last check
+
+    # ── lifecycle ─────────────────────────────
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=FULL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "  id   INTEGER PRIMARY KEY,"
+            "  name TEXT,"
+            "  role INTEGER NOT NULL DEFAULT 0"
+            ")"
+        )
+        return db
+
+    def subscribe(self, fn):
+        """Call `fn()` after every role change (from whichever thread made it)."""
+        self._subs.append(fn)
+
+    def _notify(self):
+        for fn in self._subs:
+            try:
+                fn()
+            except Exception as e:
+                logging.error(f"User store subscriber {fn!r} failed: {e}")
+
+    def load(self, seeds: dict = None):
+        """Read the whole table into memory and start the writer thread.
+
+        `seeds` ({user_id: role}) are granted only when the database file is
+        created, so ids hardcoded in auth.py work on a fresh install but a
+        role revoked later stays revoked across restarts.
+        """
+        fresh = not os.path.exists(self.path)
+        db    = self._connect()
+        names, roles = self._read(db)
+        db.close()
+        with self._lock:
+            self._names, self._roles = names, roles
+            self._ids = sorted(names)
+        if fresh and seeds:
+            logging.info(f"Created {self.path}, seeding {len(seeds)} role(s) from auth.py")
+            for role in sorted(set(seeds.values())):
+                self.set_roles([u for u, r in seeds.items() if r == role], role)
+        self._notify()
+        if not self._thread:
+            self._thread = threading.Thread(target=self._writer, name="userstore", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread."""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    @staticmethod
+    def _read(db) -> tuple:
+        names, roles = {}, {}
+        for uid, name, role in db.execute("SELECT id, name, role FROM users"):
+            if name is not None:
+                names[uid] = name
+            if role:
+                roles[uid] = role
+        return names, roles
+
+    def _changed_on_disk(self, db) -> bool:
+        """Cheap stat of db + wal first; PRAGMA data_version only if they moved.
+
+        data_version is per connection and ignores this connection's own
+        commits, so only other processes' writes register.
+        """
+        stat = []
+        for path in (self.path, self.path + "-wal"):
+            try:
+                st = os.stat(path)
+                stat.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stat.append(None)
+        if stat == self._stat:
+            return False
+        self._stat = stat
+        dver, self._dver = self._dver, db.execute("PRAGMA data_version").fetchone()[0]
+        return dver is not None and dver != self._dver
+
+    def _reload(self, db):
+        """Apply the table as another process left it; ids with queued writes keep ours."""
+        names, roles = self._read(db)
+        with self._lock:
+            for uid in set(self._names) | set(names):
+                if not self._dirty[uid]:
+                    if uid in names:
+                        self._names[uid] = names[uid]
+                    else:
+                        self._names.pop(uid, None)
+            for uid in set(self._roles) | set(roles):
+                if not self._dirty[uid]:
+                    if uid in roles:
+                        self._roles[uid] = roles[uid]
+                    else:
+                        self._roles.pop(uid, None)
+            self._ids = sorted(self._names)
+        logging.info(f"User store reloaded after an external change ({len(names)} users)")
+        self._notify()
+
+    def _writer(self):
+        db = self._connect()
+        self._changed_on_disk(db)
+        while True:
+            try:
+                batch = [self._queue.get(timeout=USERS_RELOAD_INTERVAL)]
+            except queue.Empty:
+                try:
+                    if self._changed_on_disk(db):
+                        self._reload(db)
+                except sqlite3.Error as e:
+                    logging.error(f"User store reload failed: {e}")
+                continue
+            deadline = time.monotonic() + USERS_FLUSH_INTERVAL
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stop  = batch[-1] is None
+            ids   = [uid for item in batch if item is not None for uid in item]
+            rows  = {uid: (uid, self._names.get(uid), self._roles.get(uid, ROLE_NONE)) for uid in ids}
+            try:
+                with db:
+                    db.executemany("INSERT OR REPLACE INTO users (id, name, role) VALUES (?, ?, ?)",
+                                   [r for r in rows.values() if r[1] is not None or r[2]])
+                    db.executemany("DELETE FROM users WHERE id = ?",
+                                   [(r[0],) for r in rows.values() if r[1] is None and not r[2]])
+            except sqlite3.Error as e:
+                logging.error(f"User store write failed: {e}")
+            with self._lock:
+                self._dirty.subtract(ids)
+                self._dirty += Counter()         # drop zero counts
+            if stop:
+                db.close()
+                return
+
+    # ── reads ─────────────────────────────────
+    def is_registered(self, user_id: int) -> bool:
+        return user_id in self._names
+
+    def name(self, user_id: int, default=None):
+        return self._names.get(user_id, default)
+
+    def role(self, user_id: int) -> int:
+        return self._roles.get(user_id, ROLE_NONE)
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def page(self, offset: int = 0, limit: int = 20) -> list:
+        """Registered users sorted by id: [(user_id, name, role), …]."""
+        ids = self._ids[offset:offset + limit]
+        return [(uid, self._names.get(uid, "?"), self.role(uid)) for uid in ids]
+
+    def iter_from(self, user_id: int = None, reverse: bool = False):
+        """Lazily yield (user_id, name, role) by id, starting after `user_id`
+        (or before it, descending, with reverse=True); None = from the end."""
+        ids = self._ids
+        if reverse:
+            i = len(ids) if user_id is None else bisect.bisect_left(ids, user_id)
+            positions = range(i - 1, -1, -1)
+        else:
+            i = 0 if user_id is None else bisect.bisect_right(ids, user_id)
+            positions = range(i, len(ids))
+        for i in positions:
+            uid = ids[i]
+            yield uid, self._names.get(uid, "?"), self.role(uid)
+
+    def position(self, user_id: int) -> int:
+        """Index of `user_id` among the sorted registered ids."""
+        return bisect.bisect_left(self._ids, user_id)
+
+    def roles(self) -> dict:
+        """Copy of {user_id: role} for ids holding any role."""
+        with self._lock:
+            return dict(self._roles)
+
+    def with_role(self, role: int) -> list:
+        """Sorted ids holding at least `role`."""
+        with self._lock:                         # set_roles may run in a worker thread
+            items = list(self._roles.items())
+        return sorted(uid for uid, r in items if r >= role)
+
+    # ── writes ────────────────────────────────
+    def register(self, user_id: int, name: str):
+        with self._lock:
+            if user_id not in self._names:
+                bisect.insort(self._ids, user_id)
+            self._names[user_id] = name
+            self._dirty[user_id] += 1
+        self._queue.put((user_id,))
+
+    def set_role(self, user_id: int, role: int):
+        self.set_roles([user_id], role)
+
+    def set_roles(self, user_ids, role: int):
+        """Give every id in `user_ids` exactly `role` (ROLE_NONE revokes).
+
+        Subscribers are notified once, however many ids change.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        with self._lock:
+            for uid in user_ids:
+                if role:
+                    self._roles[uid] = role
+                else:
+                    self._roles.pop(uid, None)
+                self._dirty[uid] += 1
+        self._queue.put(tuple(user_ids))        # one item: committed in one transaction
+        self._notify()
+
+
+store = UserStore()
@@ -0,0 +1,156 @@
+import inspect
+import logging
+from typing import Callable, NamedTuple
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from auth import is_authorized, is_admin
+from outbox import outbox
+from metrics import metrics
+from singleflight import flights
+
+PUBLIC, USER, ADMIN = 0, 1, 2
+
+
+# ──────────────────────────────────────────────
+#  REGISTRY
+# ──────────────────────────────────────────────
+
+class Request(NamedTuple):
+    """What a collector / renderer gets to know about the caller."""
+    user_id:   int
+    args:      tuple      # command arguments, or callback_data fields after the view name
+    user_data: dict       # context.user_data
+    button:    bool       # True when triggered by an inline button
+
+
+class View(NamedTuple):
+    name:    str
+    collect: Callable     # (req) -> data, sync or async
+    render:  Callable     # (data, req) -> text | (text, reply_markup)
+    level:   int          # PUBLIC / USER / ADMIN
+    ttl:     float        # seconds a rendered page is reused (0 = never)
+    command: bool         # also exposed as /<name>
+    fresh:   float        # seconds collected data is shared by requests with the same args (None = never)
+
+
+VIEWS = {}                # {name: View}
+
+
+def view(name: str, collect: Callable = None, level: int = USER, ttl: float = 0, command: bool = True,
+         fresh: float = None):
+    """Register the decorated function as the renderer of view `name`.
+
+    `collect` gathers the data (default: nothing); the renderer only formats
+    it.  Pages rendered without arguments are shared for `ttl` seconds.
+    With `fresh` set, requests with the same arguments share one collect
+    (in flight, and for `fresh` seconds after) — only for collectors that
+    do not depend on who asks.
+    """
+    def deco(render):
+        VIEWS[name] = View(name, collect or (lambda req: None), render, level, ttl, command, fresh)
+        return render
+    return deco
+
+
+def back_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back to Menu", callback_data="menu")]])
+
+
+def allowed(v: View, user_id: int) -> bool:
+    if v.level >= ADMIN:
+        return is_admin(user_id)
+    if v.level >= USER:
+        return is_authorized(user_id)
+    return True
+
+
+def denied(v: View, user_id: int) -> str:
+    if v.level >= ADMIN:
+        return f"❌ Admin only  |  ID: `{user_id}`"
+    return f"❌ No access  |  ID: `{user_id}`"
+
+
+async def render(name: str, req: Request):
+    """Return (text, reply_markup) for view `name`.
+
+    A page without arguments is built once for everyone asking while it
+    is being built and for `ttl` seconds after (see singleflight.py).
+    """
+    v = VIEWS[name]
+    if v.ttl > 0 and not req.args:
+        return await flights.do(("page", name), lambda: _build(v, req), v.ttl)
+    return await _build(v, req)
+
+
+async def _build(v: View, req: Request):
+    if v.fresh is None:
+        data = v.collect(req)
+        if inspect.isawaitable(data):
+            data = await data
+    else:
+        data = await flights.do(("data", v.name, req.args), lambda: v.collect(req), v.fresh)
+    out = v.render(data, req)
+    if inspect.isawaitable(out):
+        out = await out
+    return out if isinstance(out, tuple) else (out, back_keyboard())
+
+
+# ──────────────────────────────────────────────
+#  HANDLERS GENERATED FROM THE REGISTRY
+# ──────────────────────────────────────────────
+
+def reply(update: Update, text: str, **kwargs):
+    """Queue a message to the chat `update` came from (see outbox.py)."""
+    return outbox.send_message(update.effective_chat.id, text, **kwargs)
+
+
+def edit(query, text: str, **kwargs):
+    """Queue an edit of the message carrying the pressed button."""
+    return outbox.edit_message_text(text, query.message.chat_id, query.message.message_id, **kwargs)
+
+
+def command_handler(name: str):
+    """CommandHandler callback for /<name>."""
+    v = VIEWS[name]
+
+    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = update.effective_user.id
+        if not allowed(v, user_id):
+            reply(update, denied(v, user_id), parse_mode="Markdown")
+            return "denied"
+        req = Request(user_id, tuple(context.args or ()), context.user_data, False)
+        try:
+            text, markup = await render(name, req)
+        except Exception as e:
+            logging.error(f"/{name} failed: {e}")
+            metrics.errors[f"/{name}"] += 1
+            reply(update, f"❌ Error: {e}")
+            return "error"
+        reply(update, text, parse_mode="Markdown", reply_markup=markup)
+        logging.info(f"{user_id} used /{name} {' '.join(req.args)}".rstrip())
+
+    handler.__name__ = name
+    return handler
+
+
+async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Inline buttons: callback_data is `<view>[:<arg>…]`, dispatched by dict lookup."""
+    query   = update.callback_query
+    user_id = query.from_user.id
+    name, *args = query.data.split(":")
+    await query.answer()
+
+    v = VIEWS.get(name)
+    if v is None:
+        return "unknown"
+    if not allowed(v, user_id):
+        edit(query, denied(v, user_id), parse_mode="Markdown")
+        return "denied"
+    try:
+        text, markup = await render(name, Request(user_id, tuple(args), context.user_data, True))
+    except Exception as e:
+        logging.error(f"Button {query.data} failed: {e}")
+        metrics.errors[f"btn:{name}"] += 1
+        edit(query, f"❌ Error: {e}")
+        return "error"
+    edit(query, text, parse_mode="Markdown", reply_markup=markup)